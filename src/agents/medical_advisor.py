@@ -1,5 +1,6 @@
 # src/agents/medical_advisor.py
-from typing import Dict, List
+import re
+from typing import Dict, List, Optional
 from datetime import datetime
 from crewai import Agent
 from langchain.tools import Tool
@@ -10,6 +11,11 @@ logger = get_logger(__name__)
 
 
 class MedicalAdvisorAgent(BaseAgent):
+    def __init__(self, tools: Optional[List[Tool]] = None, data_manager=None):
+        # Optional DataManager, used to match specialist requirements to staff on duty
+        self.data_manager = data_manager
+        super().__init__(tools)
+
     def _create_agent(self) -> Agent:
         return Agent(
             role='Medical Advisor',
@@ -57,13 +63,15 @@ class MedicalAdvisorAgent(BaseAgent):
             # Get medical guidance from agent
             response = self.agent.run(guidance_prompt)
 
-            return self._parse_medical_guidance(response)
+            hospital = allocated_resources.get('hospital')
+            hospital_id = hospital.get('hospital_id') if isinstance(hospital, dict) else hospital
+            return self._parse_medical_guidance(response, hospital_id)
 
         except Exception as e:
             logger.error(f"Error in medical advisory: {str(e)}")
             raise
 
-    def _parse_medical_guidance(self, response: str) -> Dict:
+    def _parse_medical_guidance(self, response: str, hospital_id: Optional[str] = None) -> Dict:
         """
         Parse and structure the medical guidance response.
         """
@@ -71,7 +79,7 @@ class MedicalAdvisorAgent(BaseAgent):
             return {
                 "immediate_interventions": self._extract_interventions(response),
                 "transport_guidelines": self._extract_transport_guidelines(response),
-                "hospital_preparations": self._extract_hospital_preparations(response),
+                "hospital_preparations": self._extract_hospital_preparations(response, hospital_id),
                 "medical_protocols": self._extract_protocols(response),
                 "raw_guidance": response
             }
@@ -127,9 +135,11 @@ class MedicalAdvisorAgent(BaseAgent):
 
         return guidelines
 
-    def _extract_hospital_preparations(self, response: str) -> Dict:
+    def _extract_hospital_preparations(self, response: str, hospital_id: Optional[str] = None) -> Dict:
         """
-        Extract hospital preparation instructions from the response.
+        Extract hospital preparation instructions from the response. With a
+        DataManager and a receiving hospital, specialist requirements are
+        matched to on-duty staff there.
         """
         preparations = {
             "immediate_needs": [],
@@ -149,8 +159,42 @@ class MedicalAdvisorAgent(BaseAgent):
                     else:
                         preparations["immediate_needs"].append(line)
 
+        if self.data_manager is not None and hospital_id:
+            preparations["available_specialists"] = self._match_specialists(
+                preparations["specialist_requirements"],
+                hospital_id
+            )
+
         return preparations
 
+    def _match_specialists(self, requirements: List[str], hospital_id: str) -> List[Dict]:
+        """
+        Find on-duty staff at the hospital for each specialist requirement
+        that names known certifications, specializations or staff types.
+        """
+        index = self.data_manager.snapshot().personnel_index()
+        matches = []
+        for requirement in requirements:
+            text = requirement.lower()
+            words = set(re.findall(r"[a-z0-9]+", text))
+            certifications = [name for name in index.values('certification') if name.lower() in words]
+            specializations = [name for name in index.values('specialization') if name.lower() in words]
+            staff_types = [name for name in index.values('type') if name.replace('_', ' ').lower() in text]
+            if not (certifications or specializations or staff_types):
+                continue
+            personnel = self.data_manager.find_personnel(
+                certifications=certifications,
+                specialization=specializations[0] if specializations else None,
+                staff_type=staff_types[0] if staff_types else None,
+                hospital_id=hospital_id,
+                status='on_duty'
+            )
+            matches.append({
+                "requirement": requirement,
+                "personnel": [person['id'] for person in personnel]
+            })
+        return matches
+
     def _extract_protocols(self, response: str) -> List[Dict]:
         """
         Extract specific medical protocols from the response.
@@ -25,4 +25,141 @@ EMERGENCY_SEVERITY_LEVELS = {
 
 # Logging Configuration
 LOG_DIR = BASE_DIR / "logs"
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Geospatial Configuration
+SPATIAL_INDEX_CELL_KM = float(os.getenv("SPATIAL_INDEX_CELL_KM", "1.0"))
+
+# Offline road network and precomputed ETA tables
+ROAD_GRAPH_PATH = Path(os.getenv("ROAD_GRAPH_PATH", str(DATA_DIR / "road_network.osm")))
+ETA_TABLE_PATH = Path(os.getenv("ETA_TABLE_PATH", str(DATA_DIR / "eta_table.npz")))
+ETA_GRID_CELL_KM = float(os.getenv("ETA_GRID_CELL_KM", "0.5"))
+
+# Coverage raster configuration
+COVERAGE_CELL_KM = float(os.getenv("COVERAGE_CELL_KM", "1.0"))
+COVERAGE_THRESHOLDS_MINUTES = [
+    int(minutes) for minutes in os.getenv("COVERAGE_THRESHOLDS_MINUTES", "8,15").split(",")
+]
+# Average speed for straight-line travel times: always used for ambulance
+# coverage, and for hospital reachability when no road ETA table is loaded
+COVERAGE_SPEED_KMH = float(os.getenv("COVERAGE_SPEED_KMH", "40"))
+
+# Maps lookup cache
+MAPS_CACHE_PATH = Path(os.getenv("MAPS_CACHE_PATH", str(BASE_DIR / "cache" / "maps_cache.sqlite3")))
+# Decimal places kept when quantizing coordinates (4 ~ 11 m)
+MAPS_CACHE_PRECISION = int(os.getenv("MAPS_CACHE_PRECISION", "4"))
+MAPS_CACHE_MEMORY_ENTRIES = int(os.getenv("MAPS_CACHE_MEMORY_ENTRIES", "4096"))
+MAPS_CACHE_TTLS = {
+    "reverse_geocode": int(os.getenv("MAPS_CACHE_TTL_REVERSE_GEOCODE", str(30 * 24 * 3600))),
+    "places_nearby": int(os.getenv("MAPS_CACHE_TTL_PLACES_NEARBY", str(24 * 3600))),
+}
+MAPS_CACHE_NEGATIVE_TTL = int(os.getenv("MAPS_CACHE_NEGATIVE_TTL", "3600"))
+
+# Google Maps HTTP client
+GOOGLE_MAPS_PUBLIC_BASE_URL = "https://maps.googleapis.com"
+# Point at a local stand-in (tests/maps_standin.py) to run without network
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", GOOGLE_MAPS_PUBLIC_BASE_URL)
+GOOGLE_MAPS_MAX_CONNECTIONS = int(os.getenv("GOOGLE_MAPS_MAX_CONNECTIONS", "20"))
+GOOGLE_MAPS_ENDPOINT_CONCURRENCY = int(os.getenv("GOOGLE_MAPS_ENDPOINT_CONCURRENCY", "10"))
+GOOGLE_MAPS_QPS = float(os.getenv("GOOGLE_MAPS_QPS", "50"))
+GOOGLE_MAPS_MAX_RETRIES = int(os.getenv("GOOGLE_MAPS_MAX_RETRIES", "3"))
+GOOGLE_MAPS_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_MAPS_TIMEOUT_SECONDS", "10"))
+
+# Batched Distance Matrix ETA service
+ETA_BATCH_WINDOW_MS = float(os.getenv("ETA_BATCH_WINDOW_MS", "5"))
+ETA_CACHE_TTL_SECONDS = float(os.getenv("ETA_CACHE_TTL_SECONDS", "120"))
+ETA_CACHE_MAX_ENTRIES = int(os.getenv("ETA_CACHE_MAX_ENTRIES", "10000"))
+# Straight-line nearest units re-ranked by live ETA, per unit requested
+ETA_RERANK_CANDIDATES = int(os.getenv("ETA_RERANK_CANDIDATES", "3"))
+
+# Local hospital directory
+PLACES_HOSPITALS_PATH = Path(os.getenv("PLACES_HOSPITALS_PATH", str(DATA_DIR / "places_hospitals.json")))
+# Places results closer than this to a known hospital are treated as the same facility
+HOSPITAL_DEDUPE_DISTANCE_KM = float(os.getenv("HOSPITAL_DEDUPE_DISTANCE_KM", "0.1"))
+
+# Reference data hot reload (mtime polling); 0 disables it
+DATA_RELOAD_INTERVAL_SECONDS = float(os.getenv("DATA_RELOAD_INTERVAL_SECONDS", "5"))
+# In-memory layout of the reference data: "dict" (parsed JSON) or "columnar"
+DATA_LAYOUT = os.getenv("DATA_LAYOUT", "dict")
+# Compiled memory-mapped snapshot (python -m src.services.binary_snapshot);
+# used by the columnar layout when it is newer than the JSON files
+DATA_SNAPSHOT_PATH = Path(os.getenv("DATA_SNAPSHOT_PATH", str(DATA_DIR / "reference_data.snap")))
+
+# Mutable resource state: "memory" (per process) or "sqlite" (shared by workers)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_DB_PATH = Path(os.getenv("STATE_DB_PATH", str(BASE_DIR / "cache" / "resource_state.sqlite3")))
+STATE_BUSY_TIMEOUT_MS = int(os.getenv("STATE_BUSY_TIMEOUT_MS", "5000"))
+# How often a worker pulls other workers' changes into memory
+STATE_SYNC_INTERVAL_SECONDS = float(os.getenv("STATE_SYNC_INTERVAL_SECONDS", "0.05"))
+STATE_CHANGE_RETENTION_SECONDS = float(os.getenv("STATE_CHANGE_RETENTION_SECONDS", "3600"))
+
+# Append-only history of resource state changes, for audits and fast restart
+EVENT_LOG_ENABLED = os.getenv("EVENT_LOG_ENABLED", "false").lower() == "true"
+EVENT_LOG_DIR = Path(os.getenv("EVENT_LOG_DIR", str(BASE_DIR / "cache" / "events")))
+EVENT_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("EVENT_SNAPSHOT_INTERVAL_SECONDS", "300"))
+# fsync every append (survives power loss, at a few ms per write); otherwise
+# appends are only flushed to the OS and survive process crashes
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "false").lower() == "true"
+# Position-only changes are buffered and logged in one write at most this
+# often, off the ingest path; a crash loses up to this much position
+# history (0 logs every change as it is made)
+EVENT_LOG_POSITION_FLUSH_SECONDS = float(os.getenv("EVENT_LOG_POSITION_FLUSH_SECONDS", "1"))
+# History older than this is pruned when snapshots are written (0 keeps everything)
+EVENT_LOG_RETENTION_SECONDS = float(os.getenv("EVENT_LOG_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# Notification webhooks; a channel without a URL only logs its messages.
+# Hospital and status URLs are templates: {hospital_id} / {recipient}
+NOTIFICATION_EMERGENCY_SERVICES_URL = os.getenv("NOTIFICATION_EMERGENCY_SERVICES_URL")
+NOTIFICATION_HOSPITAL_URL = os.getenv("NOTIFICATION_HOSPITAL_URL")
+NOTIFICATION_STATUS_URL = os.getenv("NOTIFICATION_STATUS_URL")
+NOTIFICATION_MAX_CONNECTIONS = int(os.getenv("NOTIFICATION_MAX_CONNECTIONS", "256"))
+# Deliveries in flight at once across all fan-outs
+NOTIFICATION_CONCURRENCY = int(os.getenv("NOTIFICATION_CONCURRENCY", "256"))
+NOTIFICATION_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_TIMEOUT_SECONDS", "5"))
+NOTIFICATION_MAX_RETRIES = int(os.getenv("NOTIFICATION_MAX_RETRIES", "2"))
+
+# Durable notification outbox, opt-in: webhook notifications are committed
+# here and delivered by a background worker in per-destination batches.
+# Receivers then get {"notifications": [...]} bodies instead of single
+# objects. Off, notifications are sent within the request and a crash
+# loses any not yet delivered. The outbox is a separate database from the
+# incident log, so an incident and its notification are not written
+# atomically: a crash between the two can leave either without the other
+NOTIFICATION_OUTBOX_ENABLED = os.getenv("NOTIFICATION_OUTBOX_ENABLED", "false").lower() == "true"
+NOTIFICATION_OUTBOX_PATH = Path(os.getenv("NOTIFICATION_OUTBOX_PATH", str(BASE_DIR / "cache" / "notification_outbox.sqlite3")))
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", "50"))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", "10"))
+NOTIFICATION_OUTBOX_POLL_SECONDS = float(os.getenv("NOTIFICATION_OUTBOX_POLL_SECONDS", "1"))
+# Batch requests per second sent to any one destination
+NOTIFICATION_DESTINATION_RATE = float(os.getenv("NOTIFICATION_DESTINATION_RATE", "20"))
+# Outbox only (no effect unless NOTIFICATION_OUTBOX_ENABLED; direct sends are
+# never delayed or merged): hospital and status notifications wait this
+# long in the outbox so bursts
+# to one destination share batches and older status updates for an
+# incident are superseded
+NOTIFICATION_COALESCE_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_WINDOW_SECONDS", "1"))
+
+# Incident scheduler: incidents processed at once, and per-stage limits on
+# the agent calls, report writing and notifications within them
+SCHEDULER_MAX_CONCURRENT_INCIDENTS = int(os.getenv("SCHEDULER_MAX_CONCURRENT_INCIDENTS", "16"))
+SCHEDULER_STAGE_CONCURRENCY = {
+    "detection": int(os.getenv("SCHEDULER_DETECTION_CONCURRENCY", "8")),
+    "allocation": int(os.getenv("SCHEDULER_ALLOCATION_CONCURRENCY", "8")),
+    "guidance": int(os.getenv("SCHEDULER_GUIDANCE_CONCURRENCY", "4")),
+    "report": int(os.getenv("SCHEDULER_REPORT_CONCURRENCY", "4")),
+    "notify": int(os.getenv("SCHEDULER_NOTIFY_CONCURRENCY", "8")),
+}
+# Queued incidents beyond which low-acuity work (triage severity at most
+# SCHEDULER_LOW_ACUITY_MAX_SEVERITY; calculate_severity scores normal vitals
+# 2 and minor complaints 1) is deferred, then shed
+SCHEDULER_DEFER_QUEUE_DEPTH = int(os.getenv("SCHEDULER_DEFER_QUEUE_DEPTH", "50"))
+SCHEDULER_SHED_QUEUE_DEPTH = int(os.getenv("SCHEDULER_SHED_QUEUE_DEPTH", "200"))
+SCHEDULER_LOW_ACUITY_MAX_SEVERITY = int(os.getenv("SCHEDULER_LOW_ACUITY_MAX_SEVERITY", "2"))
+# Seconds of waiting worth one severity level
+SCHEDULER_AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "30"))
+SCHEDULER_DEFER_SECONDS = float(os.getenv("SCHEDULER_DEFER_SECONDS", "60"))
+
+# Incident store: append-only log of incident records, and how many are
+# kept in memory
+INCIDENT_LOG_PATH = Path(os.getenv("INCIDENT_LOG_PATH", str(BASE_DIR / "cache" / "incidents.log")))
+INCIDENT_CACHE_SIZE = int(os.getenv("INCIDENT_CACHE_SIZE", "1024"))
@@ -1,14 +1,30 @@
 # src/main.py
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from typing import Dict
+from typing import Dict, List, Optional
 from datetime import datetime
+import asyncio
+import functools
 import json
+import math
 import os
 from pathlib import Path
 
+from src.config.settings import DATA_RELOAD_INTERVAL_SECONDS, ETA_RERANK_CANDIDATES, EVENT_SNAPSHOT_INTERVAL_SECONDS
 from src.models.incident import Incident, Location, VitalSigns
+from src.models.position_update import PositionUpdate
+from src.services.coverage import CoverageMap
+from src.services.data_manager import DataManager
+from src.services.eta_service import create_eta_service
+from src.services.fleet_tracker import FleetTracker
+from src.services.geolocation import GeolocationService
+from src.services.incident_scheduler import IncidentScheduler, SchedulerOverloaded
+from src.services.incident_store import INCIDENT_STATUSES, IncidentStore
+from src.services.notification import NotificationService
+from src.services.state_backend import VersionConflict
+from src.services.travel_time import load_travel_time_engine
 from src.utils.logger import get_logger
+from src.utils.timestamps import to_epoch, to_iso
 
 # Initialize logging
 logger = get_logger(__name__)
@@ -24,6 +40,45 @@ app = FastAPI(
 REPORTS_DIR = Path("reports")
 REPORTS_DIR.mkdir(exist_ok=True)
 
+# Shared resource state
+data_manager = DataManager()
+fleet_tracker = FleetTracker(data_manager)
+# Road-network ETAs when a table has been built, straight-line otherwise
+travel_time_engine = load_travel_time_engine()
+coverage_map = CoverageMap(data_manager, travel_time_engine)
+# Live Distance Matrix ETAs for dispatch ranking; None without a Maps API key
+eta_service = create_eta_service(data_manager)
+geolocation_service = GeolocationService(travel_time_engine, eta_service)
+if DATA_RELOAD_INTERVAL_SECONDS > 0:
+    data_manager.start_auto_reload(DATA_RELOAD_INTERVAL_SECONDS)
+# No-op unless a shared STATE_BACKEND is configured
+data_manager.start_state_sync()
+if data_manager.event_log is not None:
+    data_manager.event_log.start_snapshots(EVENT_SNAPSHOT_INTERVAL_SECONDS)
+notification_service = NotificationService()
+incident_scheduler = IncidentScheduler()
+incident_store = IncidentStore()
+
+
+@app.on_event("startup")
+async def start_notifications():
+    # Deliver anything left in the outbox by a previous run
+    notification_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_notifications():
+    await notification_service.close()
+    incident_store.close()
+    data_manager.flush_event_log()
+    if eta_service is not None:
+        await eta_service.close()
+
+
+async def _run_store(method, *args, **kwargs):
+    """Incident store calls take file locks and may block, so they run in the default executor"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
+
 
 @app.get("/")
 async def health_check():
@@ -83,46 +138,340 @@ async def create_incident(incident_data: Dict):
                 detail=f"Invalid data format: {str(e)}"
             )
 
+        # Pre-score triage severity so the most urgent work is admitted first
+        incident.severity_level = calculate_severity(incident_data)
+        incident_id = f"INC-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{incident.id.hex[:8]}"
+        await _run_store(incident_store.put, {
+            "incident_id": incident_id,
+            "status": "queued",
+            "severity_level": incident.severity_level,
+            "patient_age": incident_data['patient_age'],
+            "patient_gender": incident_data['patient_gender'],
+            "chief_complaint": incident_data['chief_complaint'],
+            "location": incident_data['location'],
+            "vitals": incident_data['vitals']
+        })
+        try:
+            return await incident_scheduler.submit(
+                incident.severity_level,
+                lambda: _process_incident(incident_id, incident_data, incident.severity_level)
+            )
+        except SchedulerOverloaded as e:
+            await _run_store(incident_store.update, incident_id, status="shed")
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+        except asyncio.CancelledError:
+            # Client went away while the incident was queued or processing
+            await _run_store(incident_store.update, incident_id, status="failed", error="Request cancelled")
+            raise
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+async def _process_incident(incident_id: str, incident_data: Dict, severity: int) -> Dict:
+    """
+    Process an incident once the scheduler has admitted it, each step under
+    the scheduler's stage limit at the incident's priority
+    """
+    await _run_store(incident_store.update, incident_id, status="processing")
+    try:
         # Generate mock response for testing
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_path = REPORTS_DIR / f"incident_report_{timestamp}.txt"
 
         # Create a simple report
-        with open(report_path, 'w') as f:
-            f.write(f"=== Emergency Incident Report ===\n")
-            f.write(f"Time: {datetime.now().isoformat()}\n")
-            f.write(f"\nPatient Information:\n")
-            f.write(f"Age: {incident_data['patient_age']}\n")
-            f.write(f"Gender: {incident_data['patient_gender']}\n")
-            f.write(f"Chief Complaint: {incident_data['chief_complaint']}\n")
-            f.write(f"\nVital Signs:\n")
-            for key, value in incident_data['vitals'].items():
-                f.write(f"{key}: {value}\n")
+        async with incident_scheduler.stage("report"):
+            with open(report_path, 'w') as f:
+                f.write(f"=== Emergency Incident Report ===\n")
+                f.write(f"Time: {datetime.now().isoformat()}\n")
+                f.write(f"\nPatient Information:\n")
+                f.write(f"Age: {incident_data['patient_age']}\n")
+                f.write(f"Gender: {incident_data['patient_gender']}\n")
+                f.write(f"Chief Complaint: {incident_data['chief_complaint']}\n")
+                f.write(f"\nVital Signs:\n")
+                for key, value in incident_data['vitals'].items():
+                    f.write(f"{key}: {value}\n")
 
-        return {
-            "status": "success",
-            "incident_id": f"INC-{timestamp}",
-            "report_path": str(report_path),
-            "summary": {
-                "severity_level": calculate_severity(incident_data),
-                "response_time": "immediate",
-                "assigned_resources": ["ambulance-1", "trauma-team-A"]
-            }
+        summary = {
+            "severity_level": severity,
+            "response_time": "immediate",
+            "assigned_resources": ["ambulance-1", "trauma-team-A"]
         }
 
-    except HTTPException:
-        raise
+        # With the outbox enabled, returns once the notification is committed
+        # there (not atomically with the incident record); otherwise once it
+        # has been delivered or given up on
+        async with incident_scheduler.stage("notify"):
+            await notification_service.notify_emergency_services(incident_id, summary)
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        await _run_store(incident_store.update, incident_id, status="failed", error=str(e))
+        raise
+
+    await _run_store(
+        incident_store.update, incident_id, status="processed", report_path=str(report_path), summary=summary
+    )
+
+    return {
+        "status": "success",
+        "incident_id": incident_id,
+        "report_path": str(report_path),
+        "summary": summary
+    }
+
+
+@app.post("/ambulances/positions")
+async def ingest_positions(updates: List[Dict]):
+    """Ingest a batch of live ambulance position updates"""
+    try:
+        batch = [PositionUpdate.from_dict(update) for update in updates]
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Invalid position update: {str(e)}")
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=400,
+            detail=f"Invalid position update: {str(e)}"
         )
 
+    result = fleet_tracker.ingest_batch(batch)
+    return {"status": "success", **result}
+
+
+@app.get("/ambulances/nearest")
+async def nearest_ambulances(
+    lat: float,
+    lng: float,
+    k: int = 1,
+    max_distance: Optional[float] = None,
+    min_shift_minutes: Optional[float] = None,
+    by_eta: bool = False
+):
+    """
+    Find the ambulances nearest to a location; with min_shift_minutes, only
+    units on shift now with at least that much of their shift left. With
+    by_eta, the straight-line nearest candidates are re-ranked by live ETA
+    """
+    if by_eta and eta_service is None:
+        raise HTTPException(status_code=503, detail="Live ETAs are not configured")
+    predicate = None
+    if min_shift_minutes is not None:
+        on_shift = set(data_manager.get_on_shift_ids('ambulances', min_remaining_minutes=min_shift_minutes))
+        predicate = on_shift.__contains__
+    candidates = k * ETA_RERANK_CANDIDATES if by_eta else k
+    nearest = fleet_tracker.nearest((lat, lng), k=candidates, max_distance=max_distance, predicate=predicate)
+    ambulances = [
+        {"ambulance_id": unit_id, "distance": distance, "location": fleet_tracker.position(unit_id)}
+        for unit_id, distance in nearest
+    ]
+    if by_eta:
+        ambulances = await geolocation_service.find_fastest_resources_live(
+            (lat, lng),
+            [ambulance for ambulance in ambulances if ambulance["location"] is not None],
+            k=k
+        )
+    return {"ambulances": ambulances}
+
+
+@app.get("/coverage")
+async def coverage_at(lat: float, lng: float):
+    """Coverage of the grid cell containing a location"""
+    coverage = coverage_map.coverage_at((lat, lng))
+    if coverage is None:
+        raise HTTPException(status_code=404, detail="Location outside coverage grid")
+    return coverage
+
+
+@app.get("/coverage/gaps")
+async def coverage_gaps(threshold: int, min_units: int = 1):
+    """Grid cells not reached by enough available ambulances"""
+    try:
+        return {
+            "threshold_minutes": threshold,
+            "ambulance_gaps": coverage_map.coverage_gaps(threshold, min_units),
+            "hospital_gaps": coverage_map.hospital_gaps(threshold)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/incidents/")
+async def list_incidents(
+    status: Optional[str] = None,
+    severity: Optional[int] = None,
+    min_severity: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 100
+):
+    """
+    Incidents newest first, filtered by status, severity (exact or minimum)
+    and creation time (ISO-8601 or epoch seconds, since inclusive)
+    """
+    if status is not None and status not in INCIDENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    incidents = await _run_store(
+        incident_store.query,
+        status=status,
+        severity=severity,
+        min_severity=min_severity,
+        since=_parse_time(since) if since is not None else None,
+        until=_parse_time(until) if until is not None else None,
+        limit=max(0, min(limit, 1000))
+    )
+    return {"count": len(incidents), "incidents": incidents}
+
+
+@app.get("/incidents/stats")
+async def incident_stats():
+    """Incident counts by status and severity"""
+    return await _run_store(incident_store.stats)
+
+
+@app.get("/incidents/{incident_id}")
+async def get_incident(incident_id: str):
+    """An incident's current record"""
+    incident = await _run_store(incident_store.get, incident_id)
+    if incident is None:
+        raise HTTPException(status_code=404, detail=f"Unknown incident: {incident_id}")
+    return incident
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Incident queue depth and admission wait per severity class"""
+    return incident_scheduler.stats()
+
+
+def _get_resource(dataset: str, record_id: str) -> Dict:
+    record = data_manager.snapshot().get(dataset, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown {dataset} record: {record_id}")
+    return {"record": record, "version": data_manager.get_version(dataset, record_id)}
+
+
+def _patch_resource(dataset: str, record_id: str, update: Dict) -> Dict:
+    """PATCH body: fields to change plus an optional expected_version for compare-and-set"""
+    fields = {field: value for field, value in update.items() if field != 'expected_version'}
+    expected_version = update.get('expected_version')
+    try:
+        result = data_manager.update_record(dataset, record_id, fields, expected_version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except VersionConflict as e:
+        logger.info(f"Version conflict updating {dataset} {record_id}: {str(e)}")
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(e), "current_version": e.current}
+        )
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Unknown {dataset} record: {record_id}")
+    record, version = result
+    return {"status": "success", "record": record, "version": version}
+
+
+@app.get("/ambulances/{ambulance_id}")
+async def get_ambulance(ambulance_id: str):
+    """An ambulance record and its version"""
+    return _get_resource('ambulances', ambulance_id)
+
+
+@app.patch("/ambulances/{ambulance_id}")
+async def update_ambulance(ambulance_id: str, update: Dict):
+    """Update an ambulance's status and/or location"""
+    return _patch_resource('ambulances', ambulance_id, update)
+
+
+@app.get("/hospitals/{hospital_id}")
+async def get_hospital(hospital_id: str):
+    """A hospital record and its version"""
+    return _get_resource('hospitals', hospital_id)
+
+
+@app.patch("/hospitals/{hospital_id}")
+async def update_hospital(hospital_id: str, update: Dict):
+    """Update a hospital's emergency department occupancy and/or resources"""
+    return _patch_resource('hospitals', hospital_id, update)
+
+
+@app.get("/personnel/{person_id}")
+async def get_personnel(person_id: str):
+    """A staff member's record and its version"""
+    return _get_resource('personnel', person_id)
+
+
+@app.patch("/personnel/{person_id}")
+async def update_personnel(person_id: str, update: Dict):
+    """Update a staff member's status"""
+    return _patch_resource('personnel', person_id, update)
+
+
+@app.post("/resources/updates")
+async def bulk_update_resources(updates: List[Dict]):
+    """
+    Apply a batch of telemetry updates, each
+    {"dataset", "id", "fields", "expected_version" (optional)}.
+    Items succeed or conflict independently.
+    """
+    try:
+        batch = [
+            (update['dataset'], update['id'], update['fields'], update.get('expected_version'))
+            for update in updates
+        ]
+        results = data_manager.update_records(batch)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Invalid resource update: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid resource update: {str(e)}"
+        )
+
+    counts = {"updated": 0, "conflict": 0, "not_found": 0}
+    for result in results:
+        counts[result['status']] += 1
+    return {
+        "status": "success",
+        **counts,
+        "results": [
+            {"dataset": dataset, "id": record_id, "status": result['status'], "version": result['version']}
+            for (dataset, record_id, _, _), result in zip(batch, results)
+        ]
+    }
+
+
+def _parse_time(value: str) -> float:
+    """Epoch seconds from an ISO-8601 time or epoch seconds query parameter"""
+    try:
+        return float(value) if value.replace('.', '', 1).isdigit() else to_epoch(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {str(e)}")
+
+
+@app.get("/history/{dataset}")
+async def resources_at(dataset: str, at: str):
+    """Ambulances, hospitals or personnel as they were at a past time (ISO-8601 or epoch seconds)"""
+    if dataset not in ('ambulances', 'hospitals', 'personnel'):
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    timestamp = _parse_time(at)
+    records = data_manager.get_records_at(dataset, timestamp)
+    if records is None:
+        raise HTTPException(status_code=404, detail=f"No history recorded for {at}")
+    return {"at": to_iso(timestamp), dataset: records}
+
 
 def calculate_severity(incident_data: Dict) -> int:
-    """Calculate incident severity (mock implementation)"""
-    severity = 3  # Default moderate severity
+    """
+    Calculate incident severity, 1 (minor) to 5 (critical), on the scale
+    the scheduler's low-acuity threshold uses (mock implementation)
+    """
+    severity = 2  # Default low acuity: vitals in the normal range
 
     vitals = incident_data['vitals']
 
@@ -132,6 +481,22 @@ def calculate_severity(incident_data: Dict) -> int:
             vitals['blood_pressure_systolic'] < 90 or
             vitals['spo2'] < 90):
         severity = 4
+    elif (vitals['heart_rate'] > 100 or vitals['heart_rate'] < 60 or
+            vitals['blood_pressure_systolic'] > 160 or
+            vitals['blood_pressure_systolic'] < 100 or
+            vitals['spo2'] < 94 or
+            vitals['respiratory_rate'] > 24 or vitals['respiratory_rate'] < 10):
+        severity = 3
+    else:
+        minor_conditions = [
+            "minor",
+            "sprain",
+            "rash",
+            "prescription"
+        ]
+        if any(condition in incident_data['chief_complaint'].lower()
+               for condition in minor_conditions):
+            severity = 1
 
     # Check chief complaint for critical conditions
     critical_conditions = [
@@ -0,0 +1,43 @@
+# src/models/position_update.py
+import math
+from dataclasses import dataclass
+from typing import Dict
+from src.utils.timestamps import Timestamp, to_epoch
+
+
+@dataclass
+class PositionUpdate:
+    unit_id: str
+    lat: float
+    lng: float
+    last_updated: float  # epoch seconds
+
+    @classmethod
+    def create(cls, unit_id: str, lat: float, lng: float, last_updated: Timestamp):
+        """Raises ValueError for a missing unit id or a non-finite or out-of-range position."""
+        if not isinstance(unit_id, str) or not unit_id:
+            raise ValueError(f"Invalid unit id: {unit_id!r}")
+        lat, lng = float(lat), float(lng)
+        if not (math.isfinite(lat) and -90.0 <= lat <= 90.0):
+            raise ValueError(f"Invalid latitude for {unit_id}: {lat}")
+        if not (math.isfinite(lng) and -180.0 <= lng <= 180.0):
+            raise ValueError(f"Invalid longitude for {unit_id}: {lng}")
+        last_updated = to_epoch(last_updated)
+        if not math.isfinite(last_updated):
+            raise ValueError(f"Invalid last_updated for {unit_id}: {last_updated}")
+        return cls(
+            unit_id=unit_id,
+            lat=lat,
+            lng=lng,
+            last_updated=last_updated
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Build from {"ambulance_id", "lat", "lng", "last_updated"} payloads."""
+        return cls.create(
+            unit_id=data.get('ambulance_id') or data['unit_id'],
+            lat=data['lat'],
+            lng=data['lng'],
+            last_updated=data['last_updated']
+        )
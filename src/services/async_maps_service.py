@@ -0,0 +1,269 @@
+# src/services/async_maps_service.py
+import asyncio
+import functools
+import random
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+from src.config.settings import (
+    GOOGLE_MAPS_API_KEY,
+    GOOGLE_MAPS_BASE_URL,
+    GOOGLE_MAPS_PUBLIC_BASE_URL,
+    GOOGLE_MAPS_MAX_CONNECTIONS,
+    GOOGLE_MAPS_ENDPOINT_CONCURRENCY,
+    GOOGLE_MAPS_QPS,
+    GOOGLE_MAPS_MAX_RETRIES,
+    GOOGLE_MAPS_TIMEOUT_SECONDS
+)
+from src.services.hospital_directory import HospitalDirectory
+from src.services.maps_cache import GeoCache
+from src.utils.rate_limiter import TokenBucket
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ENDPOINT_PATHS = {
+    "reverse_geocode": "/maps/api/geocode/json",
+    "places_nearby": "/maps/api/place/nearbysearch/json",
+    "distance_matrix": "/maps/api/distancematrix/json",
+}
+
+# API statuses that carry a usable (possibly empty) payload
+SUCCESS_STATUSES = {"OK", "ZERO_RESULTS"}
+# API statuses worth retrying after backing off
+RETRYABLE_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+# Placeholder key sent to stand-in servers, which do not need a real one
+STANDIN_API_KEY = "standin"
+
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 5.0
+
+
+class MapsAPIError(Exception):
+    """Raised when a Maps API request fails or returns an error status."""
+
+
+def format_location(location: Tuple[float, float]) -> str:
+    return f"{location[0]},{location[1]}"
+
+
+class AsyncMapsService:
+    """
+    Asynchronous Google Maps client on a shared aiohttp connection pool.
+
+    Each endpoint gets its own concurrency semaphore, every request first
+    takes a token from a client-side bucket sized to the API quota, and
+    transient failures are retried with full-jitter exponential backoff.
+    Cache hits in memory are answered on the event loop; the cache's SQLite
+    reads and writes run in the default executor.
+    Instances are bound to the event loop they are first used on.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = GOOGLE_MAPS_BASE_URL,
+        cache: Optional[GeoCache] = None,
+        directory: Optional[HospitalDirectory] = None,
+        data_manager=None,
+        max_connections: int = GOOGLE_MAPS_MAX_CONNECTIONS,
+        endpoint_concurrency: int = GOOGLE_MAPS_ENDPOINT_CONCURRENCY,
+        requests_per_second: float = GOOGLE_MAPS_QPS,
+        max_retries: int = GOOGLE_MAPS_MAX_RETRIES,
+        timeout_seconds: float = GOOGLE_MAPS_TIMEOUT_SECONDS
+    ):
+        self.api_key = api_key or GOOGLE_MAPS_API_KEY
+        if not self.api_key and base_url.rstrip('/') != GOOGLE_MAPS_PUBLIC_BASE_URL:
+            self.api_key = STANDIN_API_KEY
+        if not self.api_key:
+            logger.error("Google Maps API key not found in environment variables")
+            raise ValueError("Google Maps API key not configured")
+
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache or GeoCache()
+        self.directory = directory if directory is not None else HospitalDirectory(data_manager)
+        self.max_connections = max_connections
+        self.endpoint_concurrency = endpoint_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.timeout_seconds = timeout_seconds
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._rate_limiter: Optional[TokenBucket] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+            self._rate_limiter = TokenBucket(self.requests_per_second)
+        return self._session
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = asyncio.Semaphore(self.endpoint_concurrency)
+        return self._semaphores[endpoint]
+
+    async def _backoff(self, attempt: int) -> None:
+        await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+    async def request(self, endpoint: str, params: Dict) -> Dict:
+        """
+        Call a Maps web-service endpoint and return the decoded payload.
+        """
+        session = await self._get_session()
+        url = self.base_url + ENDPOINT_PATHS[endpoint]
+        params = {**params, "key": self.api_key}
+
+        async with self._semaphore(endpoint):
+            for attempt in range(self.max_retries + 1):
+                await self._rate_limiter.acquire()
+                try:
+                    async with session.get(url, params=params) as response:
+                        if response.status >= 500 or response.status == 429:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info,
+                                response.history,
+                                status=response.status
+                            )
+                        response.raise_for_status()
+                        payload = await response.json(content_type=None)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Never log the exception itself: its URL carries the API key
+                    if isinstance(e, aiohttp.ClientResponseError):
+                        reason = f"HTTP {e.status}"
+                        retryable = e.status >= 500 or e.status == 429
+                    else:
+                        reason = type(e).__name__
+                        retryable = True
+                    if not retryable or attempt == self.max_retries:
+                        raise MapsAPIError(f"{endpoint} request failed: {reason}") from None
+                    logger.warning(f"{endpoint} request failed ({reason}), retrying")
+                    await self._backoff(attempt)
+                    continue
+
+                status = payload.get("status", "OK")
+                if status in SUCCESS_STATUSES:
+                    return payload
+                if status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                    logger.warning(f"{endpoint} returned {status}, retrying")
+                    await self._backoff(attempt)
+                    continue
+                raise MapsAPIError(f"{endpoint} returned {status}: {payload.get('error_message', '')}")
+
+    async def _cache_get(self, endpoint: str, location: Tuple[float, float], radius: Optional[int] = None):
+        hit, value = self.cache.get(endpoint, location, radius, memory_only=True)
+        if hit:
+            return hit, value
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.cache.get, endpoint, location, radius)
+        )
+
+    async def _cache_set(self, endpoint: str, location: Tuple[float, float], value, radius: Optional[int] = None):
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.cache.set, endpoint, location, value, radius)
+        )
+
+    async def get_nearest_hospital(self, location: Tuple[float, float], radius: int = 5000) -> Dict:
+        """
+        Find the nearest hospital within radius (meters). The local hospital
+        directory answers first; Places API is only queried when it has no
+        hospital in range, and its results are merged into the directory.
+        """
+        local = self.directory.nearest(location, k=1, radius_km=radius / 1000.0)
+        if local:
+            return self.directory.as_place(local[0])
+
+        hit, cached = await self._cache_get('places_nearby', location, radius)
+        if hit:
+            return cached
+
+        try:
+            logger.debug(f"Searching for hospitals near {location}")
+            places_result = await self.request("places_nearby", {
+                "location": format_location(location),
+                "radius": radius,
+                "keyword": "hospital",
+                "type": "hospital"
+            })
+
+            hospitals = places_result.get('results', [])
+            if hospitals:
+                self.directory.merge_places_results(hospitals)
+                merged = self.directory.nearest(location, k=1, radius_km=radius / 1000.0)
+                if merged:
+                    nearest = self.directory.as_place(merged[0])
+                else:
+                    # Results without usable geometry: keep Places' own ordering
+                    nearest = hospitals[0]
+                await self._cache_set('places_nearby', location, nearest, radius)
+                return nearest
+
+            logger.warning(f"No hospitals found near {location}")
+            await self._cache_set('places_nearby', location, None, radius)
+            return None
+
+        except Exception as e:
+            logger.error(f"Error in get_nearest_hospital: {str(e)}")
+            return None
+
+    async def get_location_details(self, location: Tuple[float, float]) -> Dict:
+        """Get detailed information about a location"""
+        hit, cached = await self._cache_get('reverse_geocode', location)
+        if hit:
+            return cached
+
+        try:
+            logger.debug(f"Getting location details for {location}")
+            reverse_geocode_result = await self.request("reverse_geocode", {
+                "latlng": format_location(location)
+            })
+
+            results = reverse_geocode_result.get('results', [])
+            if results:
+                address = results[0]
+                details = {
+                    'formatted_address': address.get('formatted_address', 'Unknown'),
+                    'place_id': address.get('place_id', ''),
+                    'location_type': address.get('geometry', {}).get('location_type', ''),
+                    'components': address.get('address_components', [])
+                }
+                await self._cache_set('reverse_geocode', location, details)
+                return details
+
+            logger.warning(f"No location details found for {location}")
+            await self._cache_set('reverse_geocode', location, None)
+            return None
+
+        except Exception as e:
+            logger.error(f"Error in get_location_details: {str(e)}")
+            return None
+
+    async def get_distance_matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        mode: str = "driving",
+        departure_time: Optional[str] = None
+    ) -> Dict:
+        """
+        Raw Distance Matrix response for origins x destinations. Pass
+        departure_time (e.g. "now") only when traffic-aware durations are
+        needed: it selects the more expensive traffic tier.
+        """
+        params = {
+            "origins": "|".join(format_location(o) for o in origins),
+            "destinations": "|".join(format_location(d) for d in destinations),
+            "mode": mode
+        }
+        if departure_time is not None:
+            params["departure_time"] = departure_time
+        return await self.request("distance_matrix", params)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
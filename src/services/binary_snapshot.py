@@ -0,0 +1,223 @@
+# src/services/binary_snapshot.py
+"""
+Compiled, memory-mapped snapshot of the reference datasets.
+
+File layout (little-endian, blocks aligned to 64 bytes):
+
+    magic "MEDSNAP\\0" | u4 format version | u4 header length | header JSON
+    | padding | blocks (offsets relative to the first aligned byte)
+
+The JSON header describes each dataset's schema, column vocabularies,
+row dtype and the offsets of its blocks: the fixed-width row array, the
+row order sorted by id, and string tables (u8 offsets + UTF-8 blob) for
+ids and string columns. Workers map the file read-only with private
+copy-on-write pages, so rows and strings are never parsed up front and
+unmodified pages are shared by every process on the host.
+"""
+import argparse
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+import numpy as np
+from src.config.settings import DATA_DIR, DATA_SNAPSHOT_PATH
+from src.services.columnar import ColumnarSnapshot, ColumnarTable, EnumColumn
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"MEDSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a compiled snapshot is missing, corrupt or incompatible."""
+
+
+class MappedStrings(Sequence):
+    """Read-only sequence of strings decoded on access from a string table."""
+
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return str(self._blob[start:end], 'utf-8')
+
+
+class _Writer:
+    """Accumulates aligned binary blocks and records their offsets."""
+
+    def __init__(self):
+        self.blocks: List[bytes] = []
+        self.size = 0
+
+    def add(self, payload: bytes) -> List[int]:
+        padding = -self.size % ALIGNMENT
+        if padding:
+            self.blocks.append(b"\0" * padding)
+            self.size += padding
+        offset = self.size
+        self.blocks.append(payload)
+        self.size += len(payload)
+        return [offset, len(payload)]
+
+    def add_strings(self, values: Sequence[str]) -> Dict:
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {
+            "offsets": self.add(offsets.tobytes()),
+            "blob": self.add(b"".join(encoded))
+        }
+
+
+def _write_table(writer: _Writer, table: ColumnarTable) -> Dict:
+    return {
+        "id_field": table.id_field,
+        "schema": [[list(path), kind] for path, kind in table.schema],
+        "states": [column.state() for column in table.columns],
+        "enum_values": {
+            column.name: writer.add_strings(column.table.values)
+            for column in table.columns
+            if isinstance(column, EnumColumn)
+        },
+        "dtype": [[name, table.dtype.fields[name][0].str] for name in table.dtype.names],
+        "rows": len(table.ids),
+        "data": writer.add(table.data.tobytes()),
+        "ids": writer.add_strings(table.ids),
+        "id_order": writer.add(table.id_order().astype('<u4').tobytes()),
+        "extras": [
+            [row, [[list(path), value] for path, value in extras.items()]]
+            for row, extras in table.extras.items()
+        ]
+    }
+
+
+def write_snapshot(snapshot: ColumnarSnapshot, path: Path = DATA_SNAPSHOT_PATH) -> None:
+    """Serialize a ColumnarSnapshot, replacing path atomically."""
+    writer = _Writer()
+    header = {
+        "created_at": time.time(),
+        "source_mtimes": snapshot.mtimes,
+        "datasets": {dataset: _write_table(writer, table) for dataset, table in snapshot.tables.items()}
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_end = PREAMBLE.size + len(header_bytes)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (-header_end % ALIGNMENT))
+        for block in writer.blocks:
+            f.write(block)
+    temp_path.replace(path)
+
+
+def _read_table(buffer: mmap.mmap, base: int, spec: Dict) -> ColumnarTable:
+    view = memoryview(buffer)
+
+    def block(ref: List[int], dtype: str, count: int) -> np.ndarray:
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=base + ref[0])
+
+    def strings(ref: Dict) -> MappedStrings:
+        offsets = np.frombuffer(buffer, dtype='<u8', count=ref["offsets"][1] // 8, offset=base + ref["offsets"][0])
+        blob_offset, blob_length = ref["blob"]
+        return MappedStrings(offsets, view[base + blob_offset:base + blob_offset + blob_length])
+
+    rows = spec["rows"]
+    dtype = np.dtype([(name, code) for name, code in spec["dtype"]])
+    return ColumnarTable.from_parts(
+        id_field=spec["id_field"],
+        schema=[(tuple(path), kind) for path, kind in spec["schema"]],
+        states=spec["states"],
+        enum_values={name: strings(ref) for name, ref in spec["enum_values"].items()},
+        data=block(spec["data"], dtype, rows),
+        ids=strings(spec["ids"]),
+        id_order=block(spec["id_order"], '<u4', rows),
+        extras={
+            row: {tuple(path): value for path, value in extras}
+            for row, extras in spec["extras"]
+        }
+    )
+
+
+def load_snapshot(path: Path = DATA_SNAPSHOT_PATH, generation: int = 0) -> ColumnarSnapshot:
+    """Map a compiled snapshot. Raises SnapshotFormatError if it is unusable."""
+    try:
+        with open(path, 'rb') as f:
+            # ACCESS_COPY: pages stay shared until this process writes to them
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError) as e:
+        raise SnapshotFormatError(f"Cannot map snapshot {path}: {e}") from None
+
+    if len(buffer) < PREAMBLE.size:
+        raise SnapshotFormatError(f"Snapshot {path} is truncated")
+    magic, version, header_length = PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotFormatError(f"{path} is not a data snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotFormatError(f"Snapshot {path} has format {version}, expected {FORMAT_VERSION}")
+    try:
+        header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length])
+        header_end = PREAMBLE.size + header_length
+        base = header_end + (-header_end % ALIGNMENT)
+        tables = {
+            dataset: _read_table(buffer, base, spec)
+            for dataset, spec in header["datasets"].items()
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise SnapshotFormatError(f"Snapshot {path} is corrupt: {e}") from None
+
+    return ColumnarSnapshot.from_tables(tables, header["source_mtimes"], generation)
+
+
+def compile_snapshot(
+    path: Path = DATA_SNAPSHOT_PATH,
+    data_dir: Path = DATA_DIR
+) -> ColumnarSnapshot:
+    """Build a ColumnarSnapshot from the JSON datasets and write it to path."""
+    from src.services.data_manager import DATA_FILES
+
+    records = {}
+    mtimes = {}
+    for dataset, filename in DATA_FILES.items():
+        file_path = Path(data_dir) / filename
+        mtimes[dataset] = file_path.stat().st_mtime
+        with open(file_path, 'r') as f:
+            records[dataset] = json.load(f).get(dataset, [])
+
+    snapshot = ColumnarSnapshot(records['ambulances'], records['hospitals'], records['personnel'], mtimes)
+    write_snapshot(snapshot, path)
+    logger.info(f"Compiled data snapshot to {path}")
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the JSON datasets into a memory-mapped snapshot")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--output", type=Path, default=DATA_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    snapshot = compile_snapshot(args.output, args.data_dir)
+    counts = ", ".join(f"{len(table.ids)} {dataset}" for dataset, table in snapshot.tables.items())
+    print(f"Wrote {args.output} ({args.output.stat().st_size} bytes): {counts}")
+
+
+if __name__ == "__main__":
+    main()
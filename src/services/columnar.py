@@ -0,0 +1,742 @@
+# src/services/columnar.py
+import calendar
+import copy
+import functools
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.services.personnel_index import PersonnelIndex
+from src.services.shift_index import SHIFT_FIELDS, ShiftIndex
+
+FieldPath = Tuple[str, ...]
+
+# Distinct bitset values whose decoded form is kept per column
+DECODE_CACHE_SIZE = 4096
+
+
+class EnumTable:
+    """Interns repeated strings (statuses, types) as small integer codes."""
+
+    def __init__(self, max_codes: int = 2 ** 16, values: Optional[Sequence[str]] = None):
+        # values may be a read-only mapped sequence; it is copied on first growth
+        self.values: Sequence[str] = values if values is not None else []
+        self._codes: Optional[Dict[str, int]] = None if values is not None else {}
+        self.max_codes = max_codes
+
+    @property
+    def codes(self) -> Dict[str, int]:
+        if self._codes is None:
+            self._codes = {value: code for code, value in enumerate(self.values)}
+        return self._codes
+
+    def code(self, value: str) -> Optional[int]:
+        """Code for value, assigning a new one if needed. None when full."""
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= self.max_codes:
+                return None
+            if not isinstance(self.values, list):
+                self.values = list(self.values)
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self.codes.get(value)
+
+
+class BitsetTable:
+    """Maps a vocabulary of names (equipment, certifications) to bits of a uint64."""
+
+    MAX_BITS = 64
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._bits: Dict[str, int] = {}
+
+    def bit(self, name: str) -> Optional[int]:
+        bit = self._bits.get(name)
+        if bit is None:
+            if len(self.names) >= self.MAX_BITS:
+                return None
+            bit = len(self.names)
+            self.names.append(name)
+            self._bits[name] = bit
+        return bit
+
+    def encode(self, names) -> Optional[int]:
+        """Mask for names, or None if any of them cannot get a bit."""
+        mask = 0
+        for name in names:
+            bit = self.bit(name) if isinstance(name, str) else None
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def mask_of(self, names) -> Optional[int]:
+        """Mask for names without extending the vocabulary. None if any is unknown."""
+        mask = 0
+        for name in names:
+            bit = self._bits.get(name)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def decode(self, mask: int) -> List[str]:
+        return [name for bit, name in enumerate(self.names) if mask >> bit & 1]
+
+
+class Column(ABC):
+    """
+    One leaf of a record schema, stored in one or more structured-array
+    fields. encode() returns the field values, or None when the value
+    cannot be represented exactly (the caller then keeps it verbatim).
+    """
+
+    def __init__(self, path: FieldPath):
+        self.path = path
+        self.name = '.'.join(path)
+
+    @abstractmethod
+    def fields(self) -> List[Tuple[str, str]]:
+        """(name, dtype) of the structured-array fields this column uses."""
+
+    @abstractmethod
+    def encode(self, value: Any) -> Optional[tuple]:
+        """Field values for value, or None if it cannot be stored exactly."""
+
+    @abstractmethod
+    def decode(self, values: tuple) -> Any:
+        """Inverse of encode()."""
+
+    def prepare(self, value: Any) -> None:
+        """Called with every value before the table is laid out."""
+
+    def state(self) -> Dict:
+        """JSON-serializable vocabulary needed to decode stored values."""
+        return {}
+
+    def restore(self, state: Dict) -> None:
+        """Inverse of state(), used when loading a compiled snapshot."""
+
+
+class FloatColumn(Column):
+    def fields(self):
+        return [(self.name, 'f8')]
+
+    def encode(self, value):
+        return (value,) if type(value) is float else None
+
+    def decode(self, values):
+        return values[0]
+
+
+class IntColumn(Column):
+    def fields(self):
+        return [(self.name, 'i4')]
+
+    def encode(self, value):
+        return (value,) if type(value) is int and -2 ** 31 <= value < 2 ** 31 else None
+
+    def decode(self, values):
+        return values[0]
+
+
+class BoolColumn(Column):
+    def fields(self):
+        return [(self.name, '?')]
+
+    def encode(self, value):
+        return (value,) if type(value) is bool else None
+
+    def decode(self, values):
+        return values[0]
+
+
+class EnumColumn(Column):
+    def __init__(self, path: FieldPath):
+        super().__init__(path)
+        self.table = EnumTable()
+
+    def fields(self):
+        return [(self.name, 'u2')]
+
+    def encode(self, value):
+        code = self.table.code(value) if type(value) is str else None
+        return None if code is None else (code,)
+
+    def decode(self, values):
+        return self.table.values[values[0]]
+
+
+class StrColumn(EnumColumn):
+    """Free-form strings (names, addresses), deduplicated in a string table."""
+
+    def __init__(self, path: FieldPath):
+        super().__init__(path)
+        self.table = EnumTable(max_codes=2 ** 32)
+
+    def fields(self):
+        return [(self.name, 'u4')]
+
+
+@functools.lru_cache(maxsize=65536)
+def _format_epoch(epoch: float) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+
+CANONICAL_TIMESTAMP = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z')
+
+
+class TimeColumn(Column):
+    """ISO-8601 timestamps (in the datasets' canonical form) as epoch seconds."""
+
+    def fields(self):
+        return [(self.name, 'f8')]
+
+    def encode(self, value):
+        match = CANONICAL_TIMESTAMP.fullmatch(value) if type(value) is str else None
+        if match is None:
+            return None
+        epoch = float(calendar.timegm(tuple(int(part) for part in match.groups())))
+        # Out-of-range fields (e.g. month 13) don't round-trip; keep those verbatim
+        return (epoch,) if self.decode((epoch,)) == value else None
+
+    def decode(self, values):
+        return _format_epoch(values[0])
+
+
+class TagsColumn(Column):
+    """
+    A list of names (certifications, specialties) as a bitset. Names decode
+    in one shared order, chosen by majority from the orders seen in the
+    data, so lists that follow the common ordering round-trip exactly.
+    """
+
+    def __init__(self, path: FieldPath):
+        super().__init__(path)
+        self.table = BitsetTable()
+        self._precedes: Dict[Tuple[str, str], int] = {}
+        self._order: Optional[List[str]] = None
+        self._decoded: Dict[int, List[str]] = {}
+
+    def prepare(self, value):
+        if type(value) is not list or any(type(name) is not str for name in value):
+            return
+        for position, name in enumerate(value):
+            self.table.bit(name)
+            for later in value[position + 1:]:
+                self._precedes[(name, later)] = self._precedes.get((name, later), 0) + 1
+
+    @property
+    def order(self) -> List[str]:
+        names = self.table.names
+        if self._order is None:
+            wins = {
+                name: sum(
+                    self._precedes.get((name, other), 0) > self._precedes.get((other, name), 0)
+                    for other in names
+                )
+                for name in names
+            }
+            # sorted() is stable, so ties keep first-seen order
+            self._order = sorted(names, key=lambda name: -wins[name])
+        elif len(self._order) != len(names):
+            # Names first seen after layout have no ordering votes: append them
+            self._order.extend(names[len(self._order):])
+        return self._order
+
+    def state(self):
+        return {"names": self.table.names, "order": self.order}
+
+    def restore(self, state):
+        for name in state["names"]:
+            self.table.bit(name)
+        self._order = list(state["order"])
+
+    def fields(self):
+        return [(self.name, 'u8')]
+
+    def encode(self, value):
+        if type(value) is not list:
+            return None
+        mask = self.table.encode(value)
+        # Lists are ordered: only store them if decoding gives the same list back
+        if mask is None or self.decode((mask,)) != value:
+            return None
+        return (mask,)
+
+    def decode(self, values):
+        mask = int(values[0])
+        names = self._decoded.get(mask)
+        if names is None:
+            names = [name for name in self.order if mask >> self.table.bit(name) & 1]
+            if len(self._decoded) < DECODE_CACHE_SIZE:
+                self._decoded[mask] = names
+        return list(names)
+
+
+class FlagsColumn(Column):
+    """A dict of booleans (equipment) as a key bitset plus a value bitset."""
+
+    def __init__(self, path: FieldPath):
+        super().__init__(path)
+        self.table = BitsetTable()
+        self._decoded: Dict[Tuple[int, int], Dict[str, bool]] = {}
+
+    def state(self):
+        return {"names": self.table.names}
+
+    def restore(self, state):
+        for name in state["names"]:
+            self.table.bit(name)
+
+    def fields(self):
+        return [(self.name + '#keys', 'u8'), (self.name, 'u8')]
+
+    def encode(self, value):
+        if type(value) is not dict or any(type(flag) is not bool for flag in value.values()):
+            return None
+        keys = self.table.encode(value)
+        if keys is None:
+            return None
+        return keys, self.table.mask_of(name for name, flag in value.items() if flag)
+
+    def decode(self, values):
+        keys, flags = int(values[0]), int(values[1])
+        decoded = self._decoded.get((keys, flags))
+        if decoded is None:
+            decoded = {
+                name: bool(flags >> bit & 1)
+                for bit, name in enumerate(self.table.names)
+                if keys >> bit & 1
+            }
+            if len(self._decoded) < DECODE_CACHE_SIZE:
+                self._decoded[(keys, flags)] = decoded
+        return dict(decoded)
+
+
+class CountsColumn(Column):
+    """A dict of small integers (crew, free resources), one int field per key."""
+
+    MAX_KEYS = 16
+
+    def __init__(self, path: FieldPath):
+        super().__init__(path)
+        self.keys: List[str] = []
+
+    def prepare(self, value):
+        if type(value) is dict:
+            for key in value:
+                if key not in self.keys and len(self.keys) < self.MAX_KEYS:
+                    self.keys.append(key)
+
+    def state(self):
+        return {"keys": self.keys}
+
+    def restore(self, state):
+        self.keys = list(state["keys"])
+
+    def fields(self):
+        return [(self.name + '#keys', 'u2')] + [(f"{self.name}.{key}", 'i4') for key in self.keys]
+
+    def encode(self, value):
+        if type(value) is not dict or not set(value) <= set(self.keys):
+            return None
+        present = 0
+        counts = [0] * len(self.keys)
+        for slot, key in enumerate(self.keys):
+            if key in value:
+                count = value[key]
+                if type(count) is not int or not -2 ** 31 <= count < 2 ** 31:
+                    return None
+                present |= 1 << slot
+                counts[slot] = count
+        return (present, *counts)
+
+    def decode(self, values):
+        present = values[0]
+        return {
+            key: values[slot + 1]
+            for slot, key in enumerate(self.keys)
+            if present >> slot & 1
+        }
+
+
+COLUMN_KINDS = {
+    'float': FloatColumn,
+    'int': IntColumn,
+    'bool': BoolColumn,
+    'str': StrColumn,
+    'enum': EnumColumn,
+    'time': TimeColumn,
+    'tags': TagsColumn,
+    'flags': FlagsColumn,
+    'counts': CountsColumn,
+}
+
+AMBULANCE_SCHEMA = [
+    (('vehicle_type',), 'enum'),
+    (('location', 'lat'), 'float'),
+    (('location', 'lng'), 'float'),
+    (('location', 'last_updated'), 'time'),
+    (('status',), 'enum'),
+    (('crew',), 'counts'),
+    (('equipment',), 'flags'),
+    (('current_shift_start',), 'time'),
+    (('current_shift_end',), 'time'),
+]
+
+HOSPITAL_SCHEMA = [
+    (('name',), 'str'),
+    (('location', 'lat'), 'float'),
+    (('location', 'lng'), 'float'),
+    (('location', 'address'), 'str'),
+    (('emergency_department', 'capacity'), 'int'),
+    (('emergency_department', 'current_occupancy'), 'int'),
+    (('emergency_department', 'wait_time_minutes'), 'int'),
+    (('specialties',), 'tags'),
+    (('resources',), 'counts'),
+    (('helicopter_pad',), 'bool'),
+]
+
+PERSONNEL_SCHEMA = [
+    (('type',), 'enum'),
+    (('specialization',), 'enum'),
+    (('status',), 'enum'),
+    (('location', 'hospital_id'), 'enum'),
+    (('location', 'department'), 'enum'),
+    (('shift', 'start'), 'time'),
+    (('shift', 'end'), 'time'),
+    (('certifications',), 'tags'),
+]
+
+
+def _set_path(record: Dict, path: FieldPath, value: Any) -> None:
+    for key in path[:-1]:
+        record = record.setdefault(key, {})
+    record[path[-1]] = value
+
+
+class ColumnarTable:
+    """
+    Records of one dataset stored column-wise in a NumPy structured array.
+
+    Numeric fields become fixed-width columns, repeated strings become
+    enum codes and name lists/flag dicts become bitsets. Anything the
+    schema cannot represent exactly is kept verbatim per row, so
+    record() always returns the original dict. Each row is written with
+    a single array assignment and read back as one copied tuple.
+    """
+
+    def __init__(self, id_field: str, schema: Sequence[Tuple[FieldPath, str]], records: List[Dict]):
+        self._init_columns(id_field, schema)
+        for record in records:
+            for column in self.columns:
+                value = self._lookup(record, column.path)
+                if value is not None:
+                    column.prepare(value)
+        self._layout()
+
+        self.ids: Sequence[str] = []
+        self._rows: Optional[Dict[str, int]] = {}
+        self._id_order: Optional[np.ndarray] = None
+        self.extras: Dict[int, Dict[FieldPath, Any]] = {}
+        encoded = []
+        for row, record in enumerate(records):
+            record_id = record[id_field]
+            self.ids.append(record_id)
+            self._rows[record_id] = row
+            values, extras = self._encode(record)
+            encoded.append(values)
+            if extras:
+                self.extras[row] = extras
+        self.data = np.array(encoded, dtype=self.dtype)
+
+    @classmethod
+    def from_parts(
+        cls,
+        id_field: str,
+        schema: Sequence[Tuple[FieldPath, str]],
+        states: List[Dict],
+        enum_values: Dict[str, Sequence[str]],
+        data: np.ndarray,
+        ids: Sequence[str],
+        id_order: np.ndarray,
+        extras: Dict[int, Dict[FieldPath, Any]]
+    ) -> 'ColumnarTable':
+        """
+        Rebuild a table from stored parts without touching the rows: data,
+        ids and string tables may be views on a memory-mapped file. Ids
+        are looked up by binary search over id_order (rows sorted by id).
+        """
+        table = cls.__new__(cls)
+        table._init_columns(id_field, schema)
+        for column, state in zip(table.columns, states):
+            column.restore(state)
+            if isinstance(column, EnumColumn):
+                column.table = EnumTable(column.table.max_codes, enum_values[column.name])
+        table._layout()
+        if data.dtype != table.dtype:
+            raise ValueError(f"Stored layout for {id_field} does not match its schema")
+        table.ids = ids
+        table._rows = None
+        table._id_order = id_order
+        table.extras = extras
+        table.data = data
+        return table
+
+    def _init_columns(self, id_field: str, schema: Sequence[Tuple[FieldPath, str]]) -> None:
+        self.id_field = id_field
+        self.schema = [(tuple(path), kind) for path, kind in schema]
+        self.columns = [COLUMN_KINDS[kind](path) for path, kind in self.schema]
+        if len(self.columns) > 64:
+            raise ValueError("A columnar table supports at most 64 schema columns")
+        self._by_path = {column.path: column for column in self.columns}
+        self._positions = {column.path: index for index, column in enumerate(self.columns)}
+
+    def _layout(self) -> None:
+        """Derive the row dtype and the encode tree from the prepared columns."""
+        fields = [('#present', 'u8')]
+        # Leaves: (column, schema bit, first field, end field)
+        self._leaves = []
+        for index, column in enumerate(self.columns):
+            start = len(fields)
+            fields.extend(column.fields())
+            self._leaves.append((column, index, start, len(fields)))
+        self.dtype = np.dtype(fields)
+        self._width = len(fields)
+        self._tree: Dict = {}
+        for leaf in self._leaves:
+            node = self._tree
+            for key in leaf[0].path[:-1]:
+                node = node.setdefault(key, {})
+            node[leaf[0].path[-1]] = leaf
+
+    def row_of(self, record_id: str) -> Optional[int]:
+        if self._rows is not None:
+            return self._rows.get(record_id)
+        # Binary search over rows in id order, touching only the ids probed
+        # (bisect's key= would need Python 3.10)
+        ids, order = self.ids, self._id_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if ids[int(order[middle])] < record_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order):
+            row = int(order[low])
+            if ids[row] == record_id:
+                return row
+        return None
+
+    def id_order(self) -> np.ndarray:
+        """Row numbers sorted by record id."""
+        if self._id_order is None:
+            self._id_order = np.array(sorted(range(len(self.ids)), key=self.ids.__getitem__), dtype=np.uint32)
+        return self._id_order
+
+    @staticmethod
+    def _lookup(record: Dict, path: FieldPath) -> Any:
+        for key in path:
+            if type(record) is not dict or key not in record:
+                return None
+            record = record[key]
+        return record
+
+    def _walk(self, node: Dict, value: Dict, prefix: FieldPath, values: List, extras: Dict) -> None:
+        for key, item in value.items():
+            leaf = node.get(key)
+            if type(leaf) is tuple:
+                column, index, start, stop = leaf
+                encoded = column.encode(item)
+                if encoded is not None:
+                    values[start:stop] = encoded
+                    values[0] |= 1 << index
+                    continue
+            elif leaf is not None and type(item) is dict and item:
+                self._walk(leaf, item, prefix + (key,), values, extras)
+                continue
+            extras[prefix + (key,)] = item
+
+    def _encode(self, record: Dict) -> Tuple[tuple, Dict[FieldPath, Any]]:
+        values = [0] * self._width
+        extras: Dict[FieldPath, Any] = {}
+        self._walk(self._tree, {k: v for k, v in record.items() if k != self.id_field}, (), values, extras)
+        return tuple(values), extras
+
+    def store(self, row: int, record: Dict) -> None:
+        values, extras = self._encode(record)
+        self.data[row] = values
+        if extras:
+            self.extras[row] = extras
+        else:
+            self.extras.pop(row, None)
+
+    def _materialize(self, row: int, values: tuple) -> Dict:
+        present = values[0]
+        record = {self.id_field: self.ids[row]}
+        for column, index, start, stop in self._leaves:
+            if present >> index & 1:
+                path = column.path
+                value = column.decode(values[start:stop])
+                if len(path) == 1:
+                    record[path[0]] = value
+                else:
+                    _set_path(record, path, value)
+        extras = self.extras.get(row)
+        if extras:
+            for path, value in extras.items():
+                _set_path(record, path, copy.deepcopy(value))
+        return record
+
+    def record(self, row: int) -> Dict:
+        """Materialize one row as the original nested dict."""
+        return self._materialize(row, self.data[row].item())
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        row = self.row_of(record_id)
+        return None if row is None else self.record(row)
+
+    def records(self, rows: Optional[Sequence[int]] = None) -> List[Dict]:
+        if rows is None:
+            rows = range(len(self.ids))
+            values = self.data.tolist()
+        else:
+            values = self.data[np.asarray(rows, dtype=np.intp)].tolist()
+        return [self._materialize(row, row_values) for row, row_values in zip(rows, values)]
+
+    def _present(self, column: Column) -> np.ndarray:
+        bit = np.uint64(1 << self._positions[column.path])
+        return (self.data['#present'] & bit) != 0
+
+    def column(self, path: FieldPath) -> np.ndarray:
+        """Raw values of a single-field column (rows where it is absent hold 0)."""
+        return self.data[self._by_path[tuple(path)].name]
+
+    def epochs(self, path: FieldPath, parse: Callable[[Any], float]) -> np.ndarray:
+        """
+        Epoch seconds of a time column, NaN where absent. Values kept
+        verbatim (not in canonical form) are converted with parse.
+        """
+        path = tuple(path)
+        column = self._by_path[path]
+        values = np.where(self._present(column), self.data[column.name], np.nan)
+        for row, extras in self.extras.items():
+            if path in extras:
+                values[row] = parse(extras[path])
+        return values
+
+    def rows_where(self, path: FieldPath, value: str) -> np.ndarray:
+        """Rows whose enum column at path equals value."""
+        column = self._by_path[tuple(path)]
+        code = column.table.lookup(value)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero((self.data[column.name] == code) & self._present(column))
+
+    def rows_with_all(self, path: FieldPath, names: Sequence[str]) -> np.ndarray:
+        """Rows whose tags/flags column at path includes every name."""
+        column = self._by_path[tuple(path)]
+        mask = column.table.mask_of(names)
+        if mask is None:
+            return np.empty(0, dtype=np.intp)
+        mask = np.uint64(mask)
+        return np.flatnonzero(((self.data[column.name] & mask) == mask) & self._present(column))
+
+
+class ColumnarSnapshot:
+    """
+    DataSnapshot with the same interface, backed by ColumnarTables.
+    Dicts are only materialized for the records a caller asks for.
+    """
+
+    ID_FIELDS = {'ambulances': 'ambulance_id', 'hospitals': 'hospital_id', 'personnel': 'id'}
+    SCHEMAS = {'ambulances': AMBULANCE_SCHEMA, 'hospitals': HOSPITAL_SCHEMA, 'personnel': PERSONNEL_SCHEMA}
+
+    def __init__(
+        self,
+        ambulances: List[Dict],
+        hospitals: List[Dict],
+        personnel: List[Dict],
+        mtimes: Optional[Dict[str, float]] = None,
+        generation: int = 0
+    ):
+        datasets = {'ambulances': ambulances, 'hospitals': hospitals, 'personnel': personnel}
+        self._init_tables(
+            {
+                dataset: ColumnarTable(self.ID_FIELDS[dataset], self.SCHEMAS[dataset], records)
+                for dataset, records in datasets.items()
+            },
+            mtimes,
+            generation
+        )
+
+    @classmethod
+    def from_tables(
+        cls,
+        tables: Dict[str, ColumnarTable],
+        mtimes: Optional[Dict[str, float]] = None,
+        generation: int = 0
+    ) -> 'ColumnarSnapshot':
+        snapshot = cls.__new__(cls)
+        snapshot._init_tables(tables, mtimes, generation)
+        return snapshot
+
+    def _init_tables(self, tables: Dict[str, ColumnarTable], mtimes: Optional[Dict[str, float]], generation: int):
+        self.mtimes = mtimes or {}
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.tables = tables
+        self._shift_indexes: Dict[str, ShiftIndex] = {}
+        self._personnel_index: Optional[PersonnelIndex] = None
+
+    def get(self, dataset: str, record_id: str) -> Optional[Dict]:
+        return self.tables[dataset].get(record_id)
+
+    def records(self, dataset: str) -> List[Dict]:
+        return self.tables[dataset].records()
+
+    def by_status(self, dataset: str, status: str) -> List[Dict]:
+        table = self.tables[dataset]
+        return table.records(table.rows_where(('status',), status))
+
+    def shift_index(self, dataset: str) -> ShiftIndex:
+        """Shift interval index for a dataset, built from the time columns on first use."""
+        index = self._shift_indexes.get(dataset)
+        if index is None:
+            table = self.tables[dataset]
+            start_path, end_path = SHIFT_FIELDS[dataset]
+            index = ShiftIndex(
+                table.ids,
+                table.epochs(start_path, ShiftIndex.parse),
+                table.epochs(end_path, ShiftIndex.parse)
+            )
+            self._shift_indexes[dataset] = index
+        return index
+
+    def personnel_index(self) -> PersonnelIndex:
+        """Certification/specialization/hospital/status bitsets over personnel, built on first use."""
+        if self._personnel_index is None:
+            self._personnel_index = PersonnelIndex(self.records('personnel'), self.ID_FIELDS['personnel'])
+        return self._personnel_index
+
+    def set_field(self, dataset: str, record_id: str, field: str, value: Any) -> Optional[Dict]:
+        """Replace one top-level field of a record. Caller serializes writers."""
+        table = self.tables[dataset]
+        row = table.row_of(record_id)
+        if row is None:
+            return None
+        record = table.record(row)
+        if field == 'status' and dataset == 'personnel' and self._personnel_index is not None:
+            self._personnel_index.set_status(record_id, record.get('status'), value)
+        record[field] = value
+        table.store(row, record)
+        return record
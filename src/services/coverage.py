@@ -0,0 +1,285 @@
+# src/services/coverage.py
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.config.settings import COVERAGE_CELL_KM, COVERAGE_THRESHOLDS_MINUTES, COVERAGE_SPEED_KMH
+from src.services.geolocation import haversine_distances
+from src.services.spatial_index import KM_PER_DEGREE_MIN
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Bounds = Tuple[float, float, float, float]  # lat_min, lng_min, lat_max, lng_max
+
+
+class CoverageMap:
+    """
+    Cached raster of ambulance coverage and hospital reachability.
+
+    For every grid cell it keeps the number of available ambulances that
+    can reach it within each threshold, and the travel minutes from the
+    cell to every hospital.
+
+    The two layers can use different travel models. Hospital minutes come
+    from the road-network ETA table when a travel_time_engine is given.
+    That table only holds times to its precomputed destinations (the
+    hospitals), not from arbitrary moving units, so ambulance reach is
+    always straight-line distance at speed_kmh. summary() reports the
+    model behind each layer.
+
+    rebuild() is the batch job; afterwards the
+    map follows DataManager status/position events and only re-rasterises
+    the window around the ambulance that changed. A data reload triggers a
+    full rebuild.
+    """
+
+    def __init__(
+        self,
+        data_manager,
+        travel_time_engine=None,
+        bounds: Optional[Bounds] = None,
+        cell_size_km: float = COVERAGE_CELL_KM,
+        thresholds_minutes: Optional[List[int]] = None,
+        speed_kmh: float = COVERAGE_SPEED_KMH
+    ):
+        self.data_manager = data_manager
+        self.travel_time_engine = travel_time_engine
+        self.cell_size_km = cell_size_km
+        self.thresholds = sorted(thresholds_minutes or COVERAGE_THRESHOLDS_MINUTES)
+        self.speed_kmh = speed_kmh
+        self._bounds = bounds
+        self._lock = threading.Lock()
+
+        self._center_lats = np.empty(0)
+        self._center_lngs = np.empty(0)
+        self._ambulance_counts = np.zeros((len(self.thresholds), 0, 0), dtype=np.int32)
+        self._hospital_ids: List[str] = []
+        self._hospital_minutes = np.zeros((0, 0, 0), dtype=np.float32)
+        self._contributions: Dict[str, Tuple[float, float]] = {}
+
+        self.rebuild()
+        data_manager.add_listener(self._on_data_change)
+
+    @property
+    def reach_km(self) -> float:
+        """Straight-line distance covered within the largest threshold."""
+        return self.speed_kmh * self.thresholds[-1] / 60.0
+
+    def _default_bounds(self, ambulances: List[Dict], hospitals: List[Dict]) -> Bounds:
+        points = [r['location'] for r in ambulances + hospitals]
+        if not points:
+            raise ValueError("Coverage bounds needed when there are no located resources")
+        pad_lat = self.reach_km / KM_PER_DEGREE_MIN
+        lat_min = min(p['lat'] for p in points) - pad_lat
+        lat_max = max(p['lat'] for p in points) + pad_lat
+        pad_lng = self.reach_km / (111.32 * math.cos(math.radians(max(abs(lat_min), abs(lat_max)))))
+        return (
+            lat_min,
+            min(p['lng'] for p in points) - pad_lng,
+            lat_max,
+            max(p['lng'] for p in points) + pad_lng
+        )
+
+    def rebuild(self) -> None:
+        """Recompute the whole raster from the current DataManager state."""
+        try:
+            ambulances = self.data_manager.get_ambulances()
+            hospitals = self.data_manager.get_hospitals()
+            lat_min, lng_min, lat_max, lng_max = self._bounds or self._default_bounds(ambulances, hospitals)
+
+            lat_step = self.cell_size_km / KM_PER_DEGREE_MIN
+            mid_lat = math.radians((lat_min + lat_max) / 2)
+            lng_step = self.cell_size_km / (111.32 * math.cos(mid_lat))
+            rows = max(1, math.ceil((lat_max - lat_min) / lat_step))
+            cols = max(1, math.ceil((lng_max - lng_min) / lng_step))
+
+            center_lats = lat_min + (np.arange(rows) + 0.5) * lat_step
+            center_lngs = lng_min + (np.arange(cols) + 0.5) * lng_step
+            hospital_minutes = np.empty((len(hospitals), rows, cols), dtype=np.float32)
+            hospital_ids = [h['hospital_id'] for h in hospitals]
+
+            if self.travel_time_engine is not None:
+                hospital_minutes.fill(np.inf)
+                for row in range(rows):
+                    for col in range(cols):
+                        etas = self.travel_time_engine.etas((center_lats[row], center_lngs[col]))
+                        for slot, hospital_id in enumerate(hospital_ids):
+                            if hospital_id in etas:
+                                hospital_minutes[slot, row, col] = etas[hospital_id] / 60.0
+            else:
+                for slot, hospital in enumerate(hospitals):
+                    location = hospital['location']
+                    distances = haversine_distances(
+                        (location['lat'], location['lng']),
+                        center_lats[:, None],
+                        center_lngs[None, :]
+                    )
+                    hospital_minutes[slot] = distances / self.speed_kmh * 60.0
+
+            with self._lock:
+                self._origin = (lat_min, lng_min)
+                self._steps = (lat_step, lng_step)
+                self._center_lats = center_lats
+                self._center_lngs = center_lngs
+                self._ambulance_counts = np.zeros((len(self.thresholds), rows, cols), dtype=np.int32)
+                self._hospital_ids = hospital_ids
+                self._hospital_minutes = hospital_minutes
+                self._contributions = {}
+                for amb in ambulances:
+                    if amb['status'] == 'available':
+                        position = (amb['location']['lat'], amb['location']['lng'])
+                        self._contributions[amb['ambulance_id']] = position
+                        self._rasterise(position, 1)
+
+            logger.info(f"Coverage raster rebuilt: {rows}x{cols} cells, {len(self._contributions)} units")
+
+        except Exception as e:
+            logger.error(f"Error rebuilding coverage raster: {str(e)}")
+            raise
+
+    def _rasterise(self, position: Tuple[float, float], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one ambulance's reach. Caller holds the lock."""
+        lat, lng = position
+        _, rows, cols = self._ambulance_counts.shape
+        row_span = math.ceil(self.reach_km / KM_PER_DEGREE_MIN / self._steps[0]) + 1
+        lng_km = 111.32 * math.cos(math.radians(min(abs(lat) + self.reach_km / KM_PER_DEGREE_MIN, 89.9)))
+        col_span = math.ceil(self.reach_km / lng_km / self._steps[1]) + 1
+        row = int((lat - self._origin[0]) // self._steps[0])
+        col = int((lng - self._origin[1]) // self._steps[1])
+
+        r0, r1 = max(0, row - row_span), min(rows, row + row_span + 1)
+        c0, c1 = max(0, col - col_span), min(cols, col + col_span + 1)
+        if r0 >= r1 or c0 >= c1:
+            return
+
+        minutes = haversine_distances(
+            position,
+            self._center_lats[r0:r1, None],
+            self._center_lngs[None, c0:c1]
+        ) / self.speed_kmh * 60.0
+        for slot, threshold in enumerate(self.thresholds):
+            self._ambulance_counts[slot, r0:r1, c0:c1] += sign * (minutes <= threshold)
+
+    def _on_data_change(self, event: str, record: Dict) -> None:
+        if event == 'data_reloaded':
+            # Runs on the reload thread; queries keep the old raster until the swap
+            self.rebuild()
+            return
+        if event not in ('ambulance_status', 'ambulance_location'):
+            return
+        ambulance_id = record['ambulance_id']
+        position = None
+        if record['status'] == 'available':
+            position = (record['location']['lat'], record['location']['lng'])
+
+        with self._lock:
+            previous = self._contributions.get(ambulance_id)
+            if previous == position:
+                return
+            if previous is not None:
+                self._rasterise(previous, -1)
+                del self._contributions[ambulance_id]
+            if position is not None:
+                self._rasterise(position, 1)
+                self._contributions[ambulance_id] = position
+
+    def _slot(self, threshold_minutes: int) -> int:
+        if threshold_minutes not in self.thresholds:
+            raise ValueError(f"Threshold {threshold_minutes} not in configured thresholds {self.thresholds}")
+        return self.thresholds.index(threshold_minutes)
+
+    def _cell(self, location: Tuple[float, float]) -> Optional[Tuple[int, int]]:
+        _, rows, cols = self._ambulance_counts.shape
+        row = int((location[0] - self._origin[0]) // self._steps[0])
+        col = int((location[1] - self._origin[1]) // self._steps[1])
+        if 0 <= row < rows and 0 <= col < cols:
+            return row, col
+        return None
+
+    def coverage_at(self, location: Tuple[float, float]) -> Optional[Dict]:
+        """Return unit counts and reachable hospitals for the cell at location."""
+        with self._lock:
+            cell = self._cell(location)
+            if cell is None:
+                return None
+            row, col = cell
+            hospital_minutes = self._hospital_minutes[:, row, col]
+            return {
+                "cell": {"lat": float(self._center_lats[row]), "lng": float(self._center_lngs[col])},
+                "ambulances_within": {
+                    threshold: int(self._ambulance_counts[slot, row, col])
+                    for slot, threshold in enumerate(self.thresholds)
+                },
+                "hospitals_within": {
+                    threshold: [
+                        self._hospital_ids[i]
+                        for i in np.flatnonzero(hospital_minutes <= threshold)
+                    ]
+                    for threshold in self.thresholds
+                }
+            }
+
+    def coverage_gaps(self, threshold_minutes: int, min_units: int = 1) -> List[Dict]:
+        """Return cells reached by fewer than min_units available ambulances."""
+        slot = self._slot(threshold_minutes)
+        with self._lock:
+            counts = self._ambulance_counts[slot]
+            rows, cols = np.nonzero(counts < min_units)
+            return [
+                {
+                    "lat": float(self._center_lats[row]),
+                    "lng": float(self._center_lngs[col]),
+                    "ambulances": int(counts[row, col])
+                }
+                for row, col in zip(rows.tolist(), cols.tolist())
+            ]
+
+    def hospital_gaps(self, threshold_minutes: int) -> List[Dict]:
+        """Return cells that cannot reach any hospital within the threshold."""
+        self._slot(threshold_minutes)
+        with self._lock:
+            if len(self._hospital_ids):
+                reachable = (self._hospital_minutes <= threshold_minutes).any(axis=0)
+            else:
+                reachable = np.zeros(self._ambulance_counts.shape[1:], dtype=bool)
+            rows, cols = np.nonzero(~reachable)
+            return [
+                {"lat": float(self._center_lats[row]), "lng": float(self._center_lngs[col])}
+                for row, col in zip(rows.tolist(), cols.tolist())
+            ]
+
+    def summary(self) -> Dict:
+        """Return covered-cell fractions per threshold and the travel model behind each layer."""
+        with self._lock:
+            cells = int(self._ambulance_counts[0].size) if self.thresholds else 0
+            return {
+                "cells": cells,
+                "tracked_units": len(self._contributions),
+                "travel_models": {
+                    "ambulances": "straight_line",
+                    "hospitals": "road_network" if self.travel_time_engine is not None else "straight_line"
+                },
+                "thresholds": {
+                    threshold: {
+                        "covered_fraction": float((self._ambulance_counts[slot] > 0).mean()) if cells else 0.0,
+                        "gap_cells": int((self._ambulance_counts[slot] == 0).sum())
+                    }
+                    for slot, threshold in enumerate(self.thresholds)
+                }
+            }
+
+
+def main():
+    from src.services.data_manager import DataManager
+    from src.services.travel_time import load_travel_time_engine
+
+    coverage = CoverageMap(DataManager(), load_travel_time_engine())
+    summary = coverage.summary()
+    print(f"Coverage raster: {summary['cells']} cells, {summary['tracked_units']} available units")
+    for threshold, stats in summary['thresholds'].items():
+        print(f"  {threshold} min: {stats['covered_fraction']:.1%} covered, {stats['gap_cells']} gap cells")
+
+
+if __name__ == "__main__":
+    main()
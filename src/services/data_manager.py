@@ -1,24 +1,205 @@
 import json
-from typing import Dict, List, Optional
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
-from src.config.settings import DATA_DIR
+from src.config.settings import (
+    DATA_DIR,
+    DATA_LAYOUT,
+    DATA_RELOAD_INTERVAL_SECONDS,
+    DATA_SNAPSHOT_PATH,
+    EVENT_LOG_POSITION_FLUSH_SECONDS,
+    STATE_SYNC_INTERVAL_SECONDS
+)
+from src.services.binary_snapshot import SnapshotFormatError, load_snapshot
+from src.services.columnar import ColumnarSnapshot
+from src.services.event_log import EventLog, create_event_log
+from src.services.personnel_index import PersonnelIndex
+from src.services.shift_index import SHIFT_FIELDS, ShiftIndex
+from src.services.state_backend import (
+    BED_FIELDS,
+    MUTABLE_FIELDS,
+    VERSION_FIELD,
+    Change,
+    StateBackend,
+    VersionConflict,
+    Versions,
+    adjust_beds,
+    create_state_backend,
+    merge_field
+)
 from src.utils.logger import get_logger
+from src.utils.timestamps import Timestamp, to_epoch, to_iso
 
 logger = get_logger(__name__)
 
+DATA_FILES = {
+    'ambulances': "ambulances.json",
+    'hospitals': "hospitals.json",
+    'personnel': "medical_personnel.json",
+}
+
+
+class DataSnapshot:
+    """
+    One loaded generation of the reference data and its indexes.
+
+    Reloads never modify a snapshot; they build a new one and swap it in.
+    Live updates (set_field) do modify the current snapshot in place,
+    though: a changed record is replaced by an updated copy, so a reader
+    holding a record always sees one consistent version of it, but the
+    id -> record map, the status sets and the personnel status bitsets
+    are updated one after another. A lock-free reader may therefore see a
+    record under its old status index entry, or vice versa, for the
+    duration of an update; readers needing all indexes to agree must hold
+    DataManager's write lock.
+    """
+
+    ID_FIELDS = {'ambulances': 'ambulance_id', 'hospitals': 'hospital_id', 'personnel': 'id'}
+    STATUS_INDEXED = ('ambulances', 'personnel')
+
+    def __init__(
+        self,
+        ambulances: List[Dict],
+        hospitals: List[Dict],
+        personnel: List[Dict],
+        mtimes: Optional[Dict[str, float]] = None,
+        generation: int = 0
+    ):
+        self.mtimes = mtimes or {}
+        self.generation = generation
+        self.loaded_at = time.time()
+
+        # Primary (id -> record) and secondary (status -> ids) indexes
+        datasets = {'ambulances': ambulances, 'hospitals': hospitals, 'personnel': personnel}
+        self._records: Dict[str, Dict[str, Dict]] = {
+            dataset: {record[self.ID_FIELDS[dataset]]: record for record in records}
+            for dataset, records in datasets.items()
+        }
+        self._shift_indexes: Dict[str, ShiftIndex] = {}
+        self._personnel_index: Optional[PersonnelIndex] = None
+        self._ids_by_status: Dict[str, Dict[str, Set[str]]] = {}
+        for dataset in self.STATUS_INDEXED:
+            index: Dict[str, Set[str]] = {}
+            for record_id, record in self._records[dataset].items():
+                index.setdefault(record['status'], set()).add(record_id)
+            self._ids_by_status[dataset] = index
+
+    @staticmethod
+    def _reindex_status(index: Dict[str, Set[str]], record_id: str, old: str, new: str) -> None:
+        if old == new:
+            return
+        ids = index.get(old)
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del index[old]
+        index.setdefault(new, set()).add(record_id)
+
+    def get(self, dataset: str, record_id: str) -> Optional[Dict]:
+        return self._records[dataset].get(record_id)
+
+    def records(self, dataset: str) -> List[Dict]:
+        return list(self._records[dataset].values())
+
+    def by_status(self, dataset: str, status: str) -> List[Dict]:
+        records = self._records[dataset]
+        # tuple() copies the id set in one step, so a concurrent update can't break iteration
+        return [records[record_id] for record_id in tuple(self._ids_by_status[dataset].get(status, ()))]
+
+    def shift_index(self, dataset: str) -> ShiftIndex:
+        """Shift interval index for a dataset, built on first use (shifts are reference data)."""
+        index = self._shift_indexes.get(dataset)
+        if index is None:
+            start_path, end_path = SHIFT_FIELDS[dataset]
+            index = ShiftIndex.from_records(
+                self._records[dataset].values(), self.ID_FIELDS[dataset], start_path, end_path
+            )
+            self._shift_indexes[dataset] = index
+        return index
+
+    def personnel_index(self) -> PersonnelIndex:
+        """Certification/specialization/hospital/status bitsets over personnel, built on first use."""
+        if self._personnel_index is None:
+            self._personnel_index = PersonnelIndex(self._records['personnel'].values(), self.ID_FIELDS['personnel'])
+        return self._personnel_index
+
+    def set_field(self, dataset: str, record_id: str, field: str, value: Any) -> Optional[Dict]:
+        """Copy-on-write update of one top-level field. Caller serializes writers."""
+        records = self._records[dataset]
+        record = records.get(record_id)
+        if record is None:
+            return None
+        if field == 'status' and dataset in self._ids_by_status:
+            self._reindex_status(self._ids_by_status[dataset], record_id, record['status'], value)
+        if field == 'status' and dataset == 'personnel' and self._personnel_index is not None:
+            self._personnel_index.set_status(record_id, record.get('status'), value)
+        record = {**record, field: value}
+        records[record_id] = record
+        return record
+
+
+SNAPSHOT_LAYOUTS = {
+    'dict': DataSnapshot,
+    'columnar': ColumnarSnapshot,
+}
+
+
+# Listener event emitted when a field changes
+FIELD_EVENTS = {
+    ('ambulances', 'status'): 'ambulance_status',
+    ('ambulances', 'location'): 'ambulance_location',
+    ('hospitals', 'emergency_department'): 'hospital_capacity',
+    ('hospitals', 'resources'): 'hospital_capacity',
+    ('personnel', 'status'): 'personnel_status',
+}
+
+
 class DataManager:
-    def __init__(self):
-        self._ambulances = None
-        self._hospitals = None
-        self._personnel = None
+    def __init__(
+        self,
+        layout: str = DATA_LAYOUT,
+        snapshot_path: Path = DATA_SNAPSHOT_PATH,
+        state_backend: Optional[StateBackend] = None,
+        event_log: Optional[EventLog] = None
+    ):
+        if layout not in SNAPSHOT_LAYOUTS:
+            raise ValueError(f"Unknown data layout {layout!r}, expected one of {sorted(SNAPSHOT_LAYOUTS)}")
+        self._snapshot_class = SNAPSHOT_LAYOUTS[layout]
+        self.snapshot_path = Path(snapshot_path)
+        self._snapshot = self._snapshot_class([], [], [])
+        self._write_lock = threading.Lock()
+        # (dataset, record_id, field) -> (updated_at, value); re-applied on
+        # reload when newer than the data file being reloaded
+        self._live_updates: Dict[Tuple[str, str, str], Tuple[float, Any]] = {}
+        # (dataset, record_id) -> number of runtime updates; survives reloads
+        self._versions: Versions = {}
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._reload_thread: Optional[threading.Thread] = None
+        self._stop_reload = threading.Event()
+        self._failed_mtimes: Optional[Dict[str, float]] = None
+        # Mutable fields live in the backend when one is configured
+        self.state_backend = state_backend if state_backend is not None else create_state_backend()
+        self._state_seq = 0
+        self._sync_thread: Optional[threading.Thread] = None
+        self._stop_sync = threading.Event()
+        # History of every change; on start-up the last logged values are
+        # treated as live updates, so they survive a restart
+        self.event_log = event_log if event_log is not None else create_event_log()
+        # Buffered position-only (timestamp, changes, only_changed) batches,
+        # written by a timer; _log_lock keeps all appends in order
+        self._log_lock = threading.Lock()
+        self._pending_log: List[Tuple[float, List[Change], bool]] = []
+        self._log_timer: Optional[threading.Timer] = None
+        if self.event_log is not None and self.state_backend is None:
+            self._live_updates.update(self.event_log.latest())
         self.load_all_data()
 
     def load_all_data(self) -> None:
         """Load all data from JSON files."""
         try:
-            self._ambulances = self._load_json_file("ambulances.json")
-            self._hospitals = self._load_json_file("hospitals.json")
-            self._personnel = self._load_json_file("medical_personnel.json")
+            self._install(self._build_snapshot())
             logger.info("Successfully loaded all data")
         except Exception as e:
             logger.error(f"Error loading data: {str(e)}")
@@ -34,16 +215,660 @@ class DataManager:
             logger.error(f"File not found: {filename}")
             return {}
 
-    def get_available_ambulances(self) -> List[Dict]:
-        """Return list of available ambulances."""
-        return [
-            amb for amb in self._ambulances.get('ambulances', [])
-            if amb['status'] == 'available'
-        ]
+    def _file_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for dataset, filename in DATA_FILES.items():
+            try:
+                mtimes[dataset] = (DATA_DIR / filename).stat().st_mtime
+            except FileNotFoundError:
+                mtimes[dataset] = 0.0
+        return mtimes
+
+    def _build_snapshot(self) -> DataSnapshot:
+        """Parse and index the data files without touching the live snapshot."""
+        mtimes = self._file_mtimes()
+        generation = self._snapshot.generation + 1
+        if self._snapshot_class is ColumnarSnapshot and self.snapshot_path.exists():
+            try:
+                snapshot = load_snapshot(self.snapshot_path, generation)
+                if snapshot.mtimes == mtimes:
+                    return snapshot
+                logger.warning(f"{self.snapshot_path.name} was compiled from older data files, loading JSON")
+            except SnapshotFormatError as e:
+                logger.warning(f"Ignoring compiled data snapshot: {str(e)}")
+
+        return self._snapshot_class(
+            self._load_json_file(DATA_FILES['ambulances']).get('ambulances', []),
+            self._load_json_file(DATA_FILES['hospitals']).get('hospitals', []),
+            self._load_json_file(DATA_FILES['personnel']).get('personnel', []),
+            mtimes=mtimes,
+            generation=generation
+        )
+
+    def _apply_live_updates(self, snapshot) -> None:
+        """Carry live updates newer than their data file over to a new snapshot. Caller holds the write lock."""
+        for key, (updated_at, value) in list(self._live_updates.items()):
+            dataset, record_id, field = key
+            if updated_at <= snapshot.mtimes.get(dataset, 0.0) or \
+                    snapshot.set_field(dataset, record_id, field, value) is None:
+                # The file is newer (or the record is gone): it wins
+                del self._live_updates[key]
+
+    def _install(self, snapshot) -> None:
+        """Bring a freshly built snapshot up to date with live state and swap it in."""
+        if self.state_backend is None:
+            with self._write_lock:
+                self._apply_live_updates(snapshot)
+                self._snapshot = snapshot
+                self._log_reference_values(snapshot)
+            return
+
+        self.state_backend.seed({dataset: snapshot.records(dataset) for dataset in DATA_FILES})
+        with self._write_lock:
+            seq, changes = self.state_backend.load()
+            for dataset, record_id, field, value in changes:
+                if field == VERSION_FIELD:
+                    self._versions[(dataset, record_id)] = value
+                else:
+                    snapshot.set_field(dataset, record_id, field, value)
+            self._state_seq = seq
+            self._snapshot = snapshot
+            self._log_reference_values(snapshot)
+
+    def _log_reference_values(self, snapshot) -> None:
+        """
+        Log mutable fields whose value differs from the event log, such as
+        first-run values or data file edits. Caller holds the write lock.
+        """
+        if self.event_log is None:
+            return
+        self._log_changes(
+            [
+                (dataset, record[DataSnapshot.ID_FIELDS[dataset]], field, record[field])
+                for dataset in DATA_FILES
+                for record in snapshot.records(dataset)
+                for field in MUTABLE_FIELDS[dataset]
+                if field in record
+            ],
+            only_changed=True
+        )
+
+    def _log_changes(self, changes: List[Change], only_changed: bool = False) -> None:
+        """
+        Append changes to the event log. Position-only changes are buffered
+        for up to EVENT_LOG_POSITION_FLUSH_SECONDS, so high-rate ingest does
+        not write the log on every update; anything else flushes the buffer
+        first, keeping the log in commit order.
+        """
+        with self._log_lock:
+            if EVENT_LOG_POSITION_FLUSH_SECONDS > 0 and all(change[2] == 'location' for change in changes):
+                self._pending_log.append((time.time(), changes, only_changed))
+                if self._log_timer is None:
+                    self._log_timer = threading.Timer(EVENT_LOG_POSITION_FLUSH_SECONDS, self.flush_event_log)
+                    self._log_timer.daemon = True
+                    self._log_timer.start()
+                return
+            self._flush_pending_log()
+            self.event_log.append(changes, only_changed)
+
+    def _flush_pending_log(self) -> None:
+        # Caller holds _log_lock
+        if self._log_timer is not None:
+            self._log_timer.cancel()
+            self._log_timer = None
+        if self._pending_log:
+            pending, self._pending_log = self._pending_log, []
+            self.event_log.append_many(pending)
+
+    def flush_event_log(self) -> None:
+        """Write buffered position changes to the event log now."""
+        if self.event_log is None:
+            return
+        with self._log_lock:
+            self._flush_pending_log()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Swap in a freshly loaded snapshot if any data file changed.
+        Parsing and indexing run outside the write lock, so readers and
+        live updates are only held up for the swap. Returns True on reload.
+        """
+        mtimes = self._file_mtimes()
+        if mtimes == self._snapshot.mtimes or mtimes == self._failed_mtimes:
+            return False
+        try:
+            snapshot = self._build_snapshot()
+        except Exception as e:
+            # Typically a file caught mid-write; retried once it changes again
+            self._failed_mtimes = mtimes
+            logger.error(f"Error reloading data, keeping current snapshot: {str(e)}")
+            return False
+
+        self._install(snapshot)
+        logger.info(f"Reloaded data files (generation {snapshot.generation})")
+        self._notify('data_reloaded', {'generation': snapshot.generation})
+        return True
+
+    def start_auto_reload(self, interval: float = DATA_RELOAD_INTERVAL_SECONDS) -> None:
+        """Poll the data files in a background thread and hot-reload on change."""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return
+        self._stop_reload.clear()
+
+        def poll():
+            while not self._stop_reload.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"Error in data reload loop: {str(e)}")
+
+        self._reload_thread = threading.Thread(target=poll, name="data-reload", daemon=True)
+        self._reload_thread.start()
+
+    def stop_auto_reload(self) -> None:
+        """Stop the background reload thread, if running."""
+        self._stop_reload.set()
+        if self._reload_thread is not None:
+            self._reload_thread.join()
+            self._reload_thread = None
+
+    def sync_state(self) -> int:
+        """Pull other workers' changes from the state backend. Returns how many were applied."""
+        if self.state_backend is None:
+            return 0
+        with self._write_lock:
+            result = self.state_backend.changes_since(self._state_seq)
+            if result is None:
+                # Fell behind the retained change log: reapply the full state
+                seq, changes = self.state_backend.load()
+            else:
+                seq, changes = result
+            applied = []
+            logged = []
+            for dataset, record_id, field, value in changes:
+                if field == VERSION_FIELD:
+                    self._versions[(dataset, record_id)] = value
+                    continue
+                record = self._snapshot.set_field(dataset, record_id, field, value)
+                if record is not None:
+                    applied.append((FIELD_EVENTS.get((dataset, field)), record))
+                    logged.append((dataset, record_id, field, value))
+            if self.event_log is not None and logged:
+                self._log_changes(logged, only_changed=result is None)
+            self._state_seq = seq
+        for event, record in applied:
+            if event is not None:
+                self._notify(event, record)
+        return len(applied)
+
+    def start_state_sync(self, interval: float = STATE_SYNC_INTERVAL_SECONDS) -> None:
+        """Poll the state backend for other workers' changes in a background thread."""
+        if self.state_backend is None or (self._sync_thread is not None and self._sync_thread.is_alive()):
+            return
+        self._stop_sync.clear()
+
+        def poll():
+            last_pruned = time.monotonic()
+            while not self._stop_sync.wait(interval):
+                try:
+                    self.sync_state()
+                    if time.monotonic() - last_pruned > 60 and hasattr(self.state_backend, 'prune_changes'):
+                        self.state_backend.prune_changes()
+                        last_pruned = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Error syncing resource state: {str(e)}")
+
+        self._sync_thread = threading.Thread(target=poll, name="state-sync", daemon=True)
+        self._sync_thread.start()
+
+    def stop_state_sync(self) -> None:
+        """Stop the background state sync thread, if running."""
+        self._stop_sync.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+
+    def snapshot(self):
+        """Return the current snapshot, for reads that must see one generation."""
+        return self._snapshot
+
+    def get_ambulance(self, ambulance_id: str) -> Optional[Dict]:
+        """Get an ambulance by ID."""
+        return self._snapshot.get('ambulances', ambulance_id)
+
+    def get_hospital(self, hospital_id: str) -> Optional[Dict]:
+        """Get a hospital by ID."""
+        return self._snapshot.get('hospitals', hospital_id)
+
+    def get_personnel(self, person_id: str) -> Optional[Dict]:
+        """Get a member of medical personnel by ID."""
+        return self._snapshot.get('personnel', person_id)
+
+    def get_ambulances(self) -> List[Dict]:
+        """Return list of all ambulances."""
+        return self._snapshot.records('ambulances')
+
+    def get_hospitals(self) -> List[Dict]:
+        """Return list of all hospitals."""
+        return self._snapshot.records('hospitals')
+
+    def add_listener(self, listener: Callable[[str, Dict], None]) -> None:
+        """Register a callback invoked as listener(event, record) on changes."""
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, record: Dict) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event, record)
+            except Exception as e:
+                logger.error(f"Error in data listener for {event}: {str(e)}")
+
+    def get_records_at(self, dataset: str, timestamp: Timestamp) -> Optional[List[Dict]]:
+        """
+        Records of a dataset with their status/occupancy/position fields as
+        they were at timestamp, from the event log. Records that no longer
+        exist are not reported. None if there is no history for that time.
+        """
+        if self.event_log is None:
+            return None
+        self.flush_event_log()
+        state = self.event_log.state_at(to_epoch(timestamp))
+        if state is None:
+            return None
+        records = []
+        for record in self._snapshot.records(dataset):
+            record_id = record[DataSnapshot.ID_FIELDS[dataset]]
+            past = {
+                field: state[(dataset, record_id, field)][1]
+                for field in MUTABLE_FIELDS[dataset]
+                if (dataset, record_id, field) in state
+            }
+            records.append({**record, **past})
+        return records
+
+    def find_personnel(
+        self,
+        certifications: Sequence[str] = (),
+        specialization: Optional[str] = None,
+        staff_type: Optional[str] = None,
+        hospital_id: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Return medical personnel meeting every given criterion, e.g. holding
+        both ATLS and ACLS, on duty at HOSP-001.
+        """
+        snapshot = self._snapshot
+        ids = snapshot.personnel_index().query(
+            certifications=certifications,
+            specialization=specialization,
+            staff_type=staff_type,
+            hospital_id=hospital_id,
+            status=status
+        )
+        return [record for record in (snapshot.get('personnel', person_id) for person_id in ids) if record is not None]
+
+    def find_personnel_by_hospital(
+        self,
+        certifications: Sequence[str] = (),
+        specialization: Optional[str] = None,
+        staff_type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        """Ids of the personnel meeting every given criterion, grouped by hospital."""
+        return self._snapshot.personnel_index().query_by_hospital(
+            certifications=certifications,
+            specialization=specialization,
+            staff_type=staff_type,
+            status=status
+        )
+
+    def get_ambulances_by_status(self, status: str) -> List[Dict]:
+        """Return list of ambulances with the given status."""
+        return self._snapshot.by_status('ambulances', status)
+
+    def get_on_shift_ids(
+        self,
+        dataset: str,
+        at: Optional[Timestamp] = None,
+        min_remaining_minutes: float = 0
+    ) -> List[str]:
+        """
+        Ids of ambulances or personnel on shift at a time (default now) with
+        at least min_remaining_minutes of their shift left.
+        """
+        at = time.time() if at is None else to_epoch(at)
+        return self._snapshot.shift_index(dataset).on_shift(at, min_remaining_minutes * 60)
+
+    def _on_shift(self, dataset: str, records: List[Dict], at: Optional[Timestamp], min_remaining_minutes: float):
+        on_shift = set(self.get_on_shift_ids(dataset, at, min_remaining_minutes))
+        id_field = DataSnapshot.ID_FIELDS[dataset]
+        return [record for record in records if record[id_field] in on_shift]
+
+    def get_available_ambulances(
+        self,
+        at: Optional[Timestamp] = None,
+        min_remaining_minutes: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Return list of available ambulances. When at or min_remaining_minutes
+        is given, only units on shift then (default now) with at least that
+        much of their shift left are returned.
+        """
+        available = self.get_ambulances_by_status('available')
+        if at is None and min_remaining_minutes is None:
+            return available
+        return self._on_shift('ambulances', available, at, min_remaining_minutes or 0)
+
+    def get_personnel_on_shift(
+        self,
+        at: Optional[Timestamp] = None,
+        min_remaining_minutes: float = 0,
+        status: Optional[str] = None
+    ) -> List[Dict]:
+        """Return medical personnel on shift at a time (default now), optionally with a given status."""
+        snapshot = self._snapshot
+        if status is not None:
+            return self._on_shift('personnel', snapshot.by_status('personnel', status), at, min_remaining_minutes)
+        at = time.time() if at is None else to_epoch(at)
+        ids = snapshot.shift_index('personnel').on_shift(at, min_remaining_minutes * 60)
+        return [record for record in (snapshot.get('personnel', person_id) for person_id in ids) if record is not None]
+
+    def get_personnel_by_status(self, status: str) -> List[Dict]:
+        """Return list of medical personnel with the given status."""
+        return self._snapshot.by_status('personnel', status)
 
     def get_hospital_capacity(self, hospital_id: str) -> Optional[Dict]:
         """Get current capacity for a specific hospital."""
-        for hospital in self._hospitals.get('hospitals', []):
-            if hospital['hospital_id'] == hospital_id:
-                return hospital['emergency_department']
-        return None
\ No newline at end of file
+        hospital = self._snapshot.get('hospitals', hospital_id)
+        if hospital is None:
+            return None
+        return hospital['emergency_department']
+
+    def get_version(self, dataset: str, record_id: str) -> int:
+        """Version of a record: the number of runtime updates applied to it."""
+        return self._versions.get((dataset, record_id), 0)
+
+    def _commit(self, changes: Sequence[Change], versions: Optional[Versions] = None) -> List[Dict]:
+        """
+        Apply field changes to the snapshot and bump record versions, writing
+        them through to the state backend unless versions come from an
+        already committed backend write. Caller holds the write lock and has
+        checked that the records exist.
+        """
+        if self.state_backend is not None:
+            if versions is None:
+                versions = self.state_backend.set_fields(changes)
+        else:
+            now = time.time()
+            versions = {}
+            for dataset, record_id, field, value in changes:
+                self._live_updates[(dataset, record_id, field)] = (now, value)
+                key = (dataset, record_id)
+                if key not in versions:
+                    versions[key] = self._versions.get(key, 0) + 1
+        self._versions.update(versions)
+        if self.event_log is not None:
+            self._log_changes(list(changes))
+        return [
+            self._snapshot.set_field(dataset, record_id, field, value)
+            for dataset, record_id, field, value in changes
+        ]
+
+    def _replace_record(self, dataset: str, record_id: str, field: str, value: Any) -> Optional[Dict]:
+        """Update one field and remember it as a live update. Caller holds the write lock."""
+        if self._snapshot.get(dataset, record_id) is None:
+            return None
+        return self._commit([(dataset, record_id, field, value)])[0]
+
+    def update_ambulance_location(
+        self,
+        ambulance_id: str,
+        lat: float,
+        lng: float,
+        last_updated: str
+    ) -> bool:
+        """Record a new position for an ambulance. Returns False if unknown."""
+        with self._write_lock:
+            amb = self._snapshot.get('ambulances', ambulance_id)
+            if amb is None:
+                return False
+            location = {
+                **amb.get('location', {}),
+                'lat': lat,
+                'lng': lng,
+                'last_updated': last_updated
+            }
+            amb = self._replace_record('ambulances', ambulance_id, 'location', location)
+        self._notify('ambulance_location', amb)
+        return True
+
+    def update_ambulance_status(self, ambulance_id: str, status: str) -> bool:
+        """Set an ambulance's status. Returns False if unknown."""
+        with self._write_lock:
+            amb = self._replace_record('ambulances', ambulance_id, 'status', status)
+        if amb is None:
+            return False
+        self._notify('ambulance_status', amb)
+        return True
+
+    def update_personnel_status(self, person_id: str, status: str) -> bool:
+        """Set a staff member's status. Returns False if unknown."""
+        with self._write_lock:
+            person = self._replace_record('personnel', person_id, 'status', status)
+        if person is None:
+            return False
+        self._notify('personnel_status', person)
+        return True
+
+    def update_ambulance_locations(self, updates: List[Tuple[str, float, float, str]]) -> int:
+        """
+        Record a batch of (ambulance_id, lat, lng, last_updated) positions,
+        written to the state backend in one transaction. Positions older
+        than the stored one are skipped. Returns how many were recorded.
+        """
+        applied = []
+        with self._write_lock:
+            changes = []
+            for ambulance_id, lat, lng, last_updated in updates:
+                amb = self._snapshot.get('ambulances', ambulance_id)
+                if amb is None:
+                    continue
+                current = amb.get('location', {}).get('last_updated')
+                if current and to_epoch(last_updated) < to_epoch(current):
+                    # Another writer already stored a newer fix
+                    continue
+                location = {
+                    **amb.get('location', {}),
+                    'lat': lat,
+                    'lng': lng,
+                    'last_updated': last_updated
+                }
+                changes.append(('ambulances', ambulance_id, 'location', location))
+            if changes:
+                applied = self._commit(changes)
+        for amb in applied:
+            self._notify('ambulance_location', amb)
+        return len(applied)
+
+    def claim_ambulance(self, candidates: Sequence[str], status: str = 'dispatched') -> Optional[Dict]:
+        """
+        Atomically move the first still-available ambulance among candidates
+        (in preference order) to status. With a shared state backend no two
+        workers can claim the same unit. Returns the claimed record or None.
+        """
+        with self._write_lock:
+            versions = None
+            if self.state_backend is not None:
+                claimed = self.state_backend.compare_and_set(
+                    'ambulances', candidates, 'status', 'available', status
+                )
+                if claimed is None:
+                    return None
+                ambulance_id, version = claimed
+                versions = {('ambulances', ambulance_id): version}
+            else:
+                ambulance_id = next(
+                    (
+                        candidate for candidate in candidates
+                        if (self._snapshot.get('ambulances', candidate) or {}).get('status') == 'available'
+                    ),
+                    None
+                )
+                if ambulance_id is None:
+                    return None
+            amb = self._commit([('ambulances', ambulance_id, 'status', status)], versions)[0]
+        self._notify('ambulance_status', amb)
+        return amb
+
+    def _adjust_beds(self, hospital_id: str, bed_type: str, count: int) -> Optional[Dict]:
+        if bed_type not in BED_FIELDS:
+            raise ValueError(f"Unknown bed type {bed_type!r}, expected one of {sorted(BED_FIELDS)}")
+        field = BED_FIELDS[bed_type]
+        with self._write_lock:
+            hospital = self._snapshot.get('hospitals', hospital_id)
+            if hospital is None:
+                return None
+            versions = None
+            if self.state_backend is not None:
+                updated = self.state_backend.update_field(
+                    'hospitals', hospital_id, field, lambda current: adjust_beds(current, bed_type, count)
+                )
+                if updated is None:
+                    return None
+                value, version = updated
+                versions = {('hospitals', hospital_id): version}
+            else:
+                value = adjust_beds(hospital.get(field), bed_type, count)
+                if value is None:
+                    return None
+            hospital = self._commit([('hospitals', hospital_id, field, value)], versions)[0]
+        self._notify('hospital_capacity', hospital)
+        return value
+
+    def reserve_bed(self, hospital_id: str, bed_type: str = 'emergency', count: int = 1) -> Optional[Dict]:
+        """
+        Atomically take count beds ('emergency' or 'icu') if the hospital has
+        room. Returns the updated bed field, or None if it is full or unknown.
+        """
+        return self._adjust_beds(hospital_id, bed_type, count)
+
+    def release_bed(self, hospital_id: str, bed_type: str = 'emergency', count: int = 1) -> Optional[Dict]:
+        """Return count previously reserved beds. Returns the updated bed field or None."""
+        return self._adjust_beds(hospital_id, bed_type, -count)
+
+    def _validate_patch(self, dataset: str, fields: Dict[str, Any]) -> None:
+        if dataset not in MUTABLE_FIELDS:
+            raise ValueError(f"Unknown dataset {dataset!r}, expected one of {sorted(MUTABLE_FIELDS)}")
+        if not isinstance(fields, dict) or not fields:
+            raise ValueError("No fields to update")
+        for field, value in fields.items():
+            if field not in MUTABLE_FIELDS[dataset]:
+                raise ValueError(
+                    f"Field {field!r} of {dataset} cannot be updated, expected one of {list(MUTABLE_FIELDS[dataset])}"
+                )
+            if field == 'status' and not isinstance(value, str):
+                raise ValueError("status must be a string")
+            if field != 'status' and not isinstance(value, dict):
+                raise ValueError(f"{field} must be an object")
+            if field == 'location':
+                # Same bounds as PositionUpdate
+                for key, limit in (('lat', 90.0), ('lng', 180.0)):
+                    coordinate = value.get(key)
+                    if key in value and (
+                            isinstance(coordinate, bool) or not isinstance(coordinate, (int, float))
+                            or not math.isfinite(coordinate) or abs(coordinate) > limit):
+                        raise ValueError(f"location.{key} must be a number between -{limit:g} and {limit:g}")
+
+    def update_records(
+        self,
+        updates: Sequence[Tuple[str, str, Dict[str, Any], Optional[int]]]
+    ) -> List[Dict]:
+        """
+        Apply a batch of (dataset, record_id, fields, expected_version)
+        partial updates; object fields are merged one level deep. An update
+        with expected_version set only applies if the record is still at
+        that version (compare-and-set), so clients never hold locks between
+        reading and writing. Updates are independent: each result is
+        {'status': 'updated' | 'conflict' | 'not_found', 'version', 'record'}.
+        A patched ambulance location gets last_updated set to now, so
+        position trackers take it as the newest fix. Raises ValueError for
+        fields that cannot be updated or out-of-range coordinates.
+        """
+        for dataset, _, fields, expected_version in updates:
+            self._validate_patch(dataset, fields)
+            if expected_version is not None and (
+                    not isinstance(expected_version, int) or isinstance(expected_version, bool)):
+                raise ValueError("expected_version must be an integer")
+        now = to_iso(time.time())
+        updates = [
+            (
+                dataset,
+                record_id,
+                {**fields, 'location': {**fields['location'], 'last_updated': now}}
+                if dataset == 'ambulances' and 'location' in fields else fields,
+                expected_version
+            )
+            for dataset, record_id, fields, expected_version in updates
+        ]
+
+        results: List[Dict] = [{}] * len(updates)
+        events = []
+        with self._write_lock:
+            pending = []
+            for index, (dataset, record_id, fields, expected_version) in enumerate(updates):
+                if self._snapshot.get(dataset, record_id) is None:
+                    results[index] = {'status': 'not_found', 'version': None, 'record': None}
+                else:
+                    pending.append(index)
+
+            if self.state_backend is not None:
+                outcomes = iter(self.state_backend.update_records([updates[index] for index in pending]))
+
+            for index in pending:
+                dataset, record_id, fields, expected_version = updates[index]
+                if self.state_backend is not None:
+                    applied, version, values = next(outcomes)
+                    versions = {(dataset, record_id): version}
+                else:
+                    version = self.get_version(dataset, record_id)
+                    applied = expected_version is None or expected_version == version
+                    record = self._snapshot.get(dataset, record_id)
+                    values = {field: merge_field(record.get(field), value) for field, value in fields.items()}
+                    versions = None
+                if not applied:
+                    results[index] = {'status': 'conflict', 'version': version, 'record': None}
+                    continue
+                changes = [(dataset, record_id, field, value) for field, value in values.items()]
+                record = self._commit(changes, versions)[-1]
+                results[index] = {
+                    'status': 'updated',
+                    'version': self.get_version(dataset, record_id),
+                    'record': record
+                }
+                events.extend(
+                    (event, record) for event in dict.fromkeys(FIELD_EVENTS.get((dataset, field)) for field in values)
+                    if event is not None
+                )
+        for event, record in events:
+            self._notify(event, record)
+        return results
+
+    def update_record(
+        self,
+        dataset: str,
+        record_id: str,
+        fields: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Optional[Tuple[Dict, int]]:
+        """
+        Partially update one record. Returns the updated record and its new
+        version, or None if it is unknown. Raises VersionConflict if
+        expected_version is set and no longer current.
+        """
+        result = self.update_records([(dataset, record_id, fields, expected_version)])[0]
+        if result['status'] == 'not_found':
+            return None
+        if result['status'] == 'conflict':
+            raise VersionConflict(dataset, record_id, expected_version, result['version'])
+        return result['record'], result['version']
@@ -3,40 +3,48 @@ from typing import Dict, List
 from uuid import UUID
 from src.models.incident import Incident
 from src.services.data_manager import DataManager
+from src.services.eta_service import create_eta_service
 from src.services.geolocation import GeolocationService
+from src.services.incident_scheduler import IncidentScheduler
 from src.services.notification import NotificationService
+from src.services.travel_time import load_travel_time_engine
 from src.utils.logger import get_logger
 from src.utils.report_generator import ReportGenerator
 
 logger = get_logger(__name__)
 
 class EmergencyHandler:
-    def __init__(self):
+    def __init__(self, scheduler: IncidentScheduler):
+        """scheduler is the process-wide one, so its limits cover every incident path."""
         self.data_manager = DataManager()
-        self.geo_service = GeolocationService()
+        self.geo_service = GeolocationService(load_travel_time_engine(), create_eta_service(self.data_manager))
         self.notification_service = NotificationService()
         self.report_generator = ReportGenerator()
-
+        self.scheduler = scheduler
 
     async def handle_emergency(self, incident: Incident) -> Dict:
         """
-        Handle an emergency incident from start to finish.
+        Handle an emergency incident from start to finish. Run it through
+        scheduler.submit so its stages queue at the incident's priority.
         """
         try:
             # Convert incident to dict for processing
             incident_data = incident.dict()
 
-            # Process with agents
-            severity_analysis = await self.emergency_detector.process(incident_data)
-            resource_allocation = await self.resource_coordinator.process({
-                **incident_data,
-                **severity_analysis
-            })
-            medical_guidance = await self.medical_advisor.process({
-                **incident_data,
-                **severity_analysis,
-                **resource_allocation
-            })
+            # Process with agents, each stage under its own concurrency limit
+            async with self.scheduler.stage("detection"):
+                severity_analysis = await self.emergency_detector.process(incident_data)
+            async with self.scheduler.stage("allocation"):
+                resource_allocation = await self.resource_coordinator.process({
+                    **incident_data,
+                    **severity_analysis
+                })
+            async with self.scheduler.stage("guidance"):
+                medical_guidance = await self.medical_advisor.process({
+                    **incident_data,
+                    **severity_analysis,
+                    **resource_allocation
+                })
 
             # Compile results
             analysis_results = {
@@ -47,10 +55,11 @@ class EmergencyHandler:
             }
 
             # Generate report
-            report_path = self.report_generator.generate_emergency_report(
-                incident_data,
-                analysis_results
-            )
+            async with self.scheduler.stage("report"):
+                report_path = self.report_generator.generate_emergency_report(
+                    incident_data,
+                    analysis_results
+                )
 
             return {
                 "incident_id": str(incident.id),
@@ -0,0 +1,248 @@
+# src/services/eta_service.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from src.config.settings import ETA_BATCH_WINDOW_MS, ETA_CACHE_TTL_SECONDS, ETA_CACHE_MAX_ENTRIES, MAPS_CACHE_PRECISION
+from src.services.async_maps_service import AsyncMapsService
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Distance Matrix API limits per request
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+Point = Tuple[float, float]
+Pair = Tuple[Point, Point]
+
+
+def _group_blocks(
+    pairs: List[Pair],
+    max_rows: int,
+    max_columns: int,
+    max_elements: int
+) -> List[Tuple[List[Point], List[Point]]]:
+    """
+    Greedy union packing. Each row's column set (split to fit a call),
+    largest first, joins the block it adds the fewest unrequested elements
+    to, provided the block stays within the limits and that waste is no
+    more than the row's own elements; otherwise it starts a new block.
+    """
+    columns_by_row: Dict[Point, Set[Point]] = {}
+    for row, column in pairs:
+        columns_by_row.setdefault(row, set()).add(column)
+
+    column_chunk = min(max_columns, max_elements)
+    pieces = []
+    for row, columns in columns_by_row.items():
+        ordered = sorted(columns)
+        for j in range(0, len(ordered), column_chunk):
+            pieces.append((row, set(ordered[j:j + column_chunk])))
+    pieces.sort(key=lambda piece: len(piece[1]), reverse=True)
+
+    blocks: List[Tuple[List[Point], Set[Point]]] = []
+    for row, columns in pieces:
+        best, best_waste = None, None
+        for block in blocks:
+            rows, union = block
+            if len(rows) >= max_rows or row in rows:
+                continue
+            merged = len(union | columns)
+            elements = (len(rows) + 1) * merged
+            if merged > max_columns or elements > max_elements:
+                continue
+            waste = elements - len(rows) * len(union) - len(columns)
+            if waste <= len(columns) and (best is None or waste < best_waste):
+                best, best_waste = block, waste
+        if best is None:
+            blocks.append(([row], set(columns)))
+        else:
+            best[0].append(row)
+            best[1].update(columns)
+    return [(rows, sorted(union)) for rows, union in blocks]
+
+
+def pack_matrix_requests(
+    pairs: List[Pair],
+    max_origins: int = MAX_ORIGINS,
+    max_destinations: int = MAX_DESTINATIONS,
+    max_elements: int = MAX_ELEMENTS
+) -> List[Tuple[List[Point], List[Point]]]:
+    """
+    Pack (origin, destination) pairs into origins x destinations blocks
+    within the API limits. Origins with overlapping destination sets
+    (incidents x nearby hospitals) or destinations with overlapping origin
+    sets (candidate units x incidents) share blocks, at the cost of a few
+    unrequested elements (see _group_blocks); whichever grouping needs
+    fewer calls, then fewer elements, wins.
+    """
+    by_origin = _group_blocks(pairs, max_origins, max_destinations, max_elements)
+    transposed = [(d, o) for o, d in pairs]
+    by_destination = [
+        (origins, destinations)
+        for destinations, origins in _group_blocks(transposed, max_destinations, max_origins, max_elements)
+    ]
+
+    def cost(blocks):
+        return len(blocks), sum(len(origins) * len(destinations) for origins, destinations in blocks)
+
+    return by_destination if cost(by_destination) < cost(by_origin) else by_origin
+
+
+class ETAService:
+    """
+    Batched ETA lookups over the Distance Matrix API.
+
+    Requests arriving within a short window are collected, packed greedily
+    into few matrix calls within the API limits (pack_matrix_requests),
+    and the results are fanned back to every waiter; unrequested pairs a
+    packed call returns are cached too. Per-pair ETAs are kept in an LRU for a short TTL,
+    and a pair already queued or in flight is shared rather than
+    re-requested. departure_time opts into traffic-aware durations, at the
+    API's higher traffic tier.
+    """
+
+    def __init__(
+        self,
+        maps_service: AsyncMapsService,
+        window_ms: float = ETA_BATCH_WINDOW_MS,
+        cache_ttl: float = ETA_CACHE_TTL_SECONDS,
+        precision: int = MAPS_CACHE_PRECISION,
+        mode: str = "driving",
+        departure_time: Optional[str] = None,
+        cache_max_entries: int = ETA_CACHE_MAX_ENTRIES
+    ):
+        self.maps_service = maps_service
+        self.window = window_ms / 1000.0
+        self.cache_ttl = cache_ttl
+        self.precision = precision
+        self.mode = mode
+        self.departure_time = departure_time
+        self.cache_max_entries = cache_max_entries
+
+        self._cache: "OrderedDict[Pair, Tuple[float, Optional[float]]]" = OrderedDict()
+        self._pending: Dict[Pair, asyncio.Future] = {}
+        self._inflight: Dict[Pair, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {"requests": 0, "cache_hits": 0, "shared": 0, "upstream_calls": 0, "elements": 0}
+
+    def _quantize(self, point: Point) -> Point:
+        return round(point[0], self.precision), round(point[1], self.precision)
+
+    async def eta(self, origin: Point, destination: Point) -> Optional[float]:
+        """Travel time in seconds (traffic-aware with departure_time), or None."""
+        pair = (self._quantize(origin), self._quantize(destination))
+        self._stats["requests"] += 1
+
+        cached = self._cache.get(pair)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._cache.move_to_end(pair)
+                self._stats["cache_hits"] += 1
+                return cached[1]
+            del self._cache[pair]
+
+        future = self._pending.get(pair) or self._inflight.get(pair)
+        if future is not None:
+            self._stats["shared"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[pair] = future
+            if self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._schedule_flush)
+        return await asyncio.shield(future)
+
+    async def etas(self, origin: Point, destinations: List[Point]) -> List[Optional[float]]:
+        """ETAs from one origin to many destinations, in order."""
+        return await asyncio.gather(*(self.eta(origin, d) for d in destinations))
+
+    def _remember(self, pair: Pair, expires_at: float, seconds: Optional[float]) -> None:
+        self._cache[pair] = (expires_at, seconds)
+        self._cache.move_to_end(pair)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def _resolve(self, pair: Pair, batch: Dict[Pair, asyncio.Future], seconds: Optional[float]) -> None:
+        future = batch.get(pair)
+        if future is None:
+            # Packed in but not requested by this batch
+            return
+        if self._inflight.get(pair) is future:
+            del self._inflight[pair]
+        if not future.done():
+            future.set_result(seconds)
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        self._inflight.update(batch)
+        asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch: Dict[Pair, asyncio.Future]) -> None:
+        blocks = pack_matrix_requests(list(batch))
+        await asyncio.gather(*(self._fetch_block(origins, destinations, batch) for origins, destinations in blocks))
+
+    async def _fetch_block(
+        self,
+        origins: List[Point],
+        destinations: List[Point],
+        batch: Dict[Pair, asyncio.Future]
+    ) -> None:
+        self._stats["upstream_calls"] += 1
+        self._stats["elements"] += len(origins) * len(destinations)
+        try:
+            response = await self.maps_service.get_distance_matrix(
+                origins, destinations, self.mode, self.departure_time
+            )
+            rows = response.get('rows', [])
+        except Exception as e:
+            logger.error(f"Error fetching distance matrix: {str(e)}")
+            rows = None
+
+        expires_at = time.monotonic() + self.cache_ttl
+        try:
+            for i, origin in enumerate(origins):
+                try:
+                    elements = rows[i].get('elements', []) if rows is not None and i < len(rows) else []
+                except AttributeError:
+                    elements = []
+                for j, destination in enumerate(destinations):
+                    pair = (origin, destination)
+                    seconds = None
+                    try:
+                        if j < len(elements) and elements[j].get('status') == 'OK':
+                            element = elements[j]
+                            seconds = float((element.get('duration_in_traffic') or element['duration'])['value'])
+                    except (AttributeError, KeyError, TypeError, ValueError) as e:
+                        logger.warning(f"Unparseable distance matrix element for {pair}: {str(e)}")
+                    if rows is not None:
+                        self._remember(pair, expires_at, seconds)
+                    self._resolve(pair, batch, seconds)
+        finally:
+            # Never leave a waiter (or its in-flight entry) behind
+            for origin in origins:
+                for destination in destinations:
+                    self._resolve((origin, destination), batch, None)
+
+    def stats(self) -> Dict:
+        """Request, cache and upstream call counters."""
+        calls = self._stats["upstream_calls"]
+        return {
+            **self._stats,
+            "pairs_per_call": (self._stats["elements"] / calls) if calls else 0.0
+        }
+
+    async def close(self) -> None:
+        await self.maps_service.close()
+
+
+def create_eta_service(data_manager=None) -> Optional[ETAService]:
+    """ETA service over the configured Maps API, or None if no API key is set."""
+    try:
+        return ETAService(AsyncMapsService(data_manager=data_manager))
+    except ValueError as e:
+        logger.warning(f"Live ETAs unavailable: {str(e)}")
+        return None
@@ -0,0 +1,379 @@
+# src/services/event_log.py
+"""
+Append-only binary log of resource state changes, with periodic snapshots.
+
+Segment files events-<first seq>.log hold one record per changed field:
+
+    u4 payload length | u4 CRC-32 of payload | u8 seq | f8 timestamp | payload
+    payload = u1 field code | u2 id length | id UTF-8 | value JSON
+
+Field codes index LOGGED_FIELDS. A snapshot-<seq>-<epoch ms>.json file
+holds the (timestamp, value) of every logged field after event seq and
+is written at that time; writing one
+starts a new segment. Recovery and time-travel queries load the latest
+snapshot at or before their target and replay only the segments after it.
+A torn record at the end of the last segment (crash mid-append) is
+truncated on recovery.
+
+Appends are flushed to the OS, so they survive a process crash; with
+EVENT_LOG_FSYNC they are also fsynced and survive power loss. Rotated
+segments and snapshots are always fsynced. Snapshots and segments older
+than EVENT_LOG_RETENTION_SECONDS are pruned as new snapshots are
+written, always keeping one snapshot at or before the cutoff.
+"""
+import bisect
+import json
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.config.settings import (
+    EVENT_LOG_DIR,
+    EVENT_LOG_ENABLED,
+    EVENT_LOG_FSYNC,
+    EVENT_LOG_RETENTION_SECONDS,
+    EVENT_SNAPSHOT_INTERVAL_SECONDS
+)
+from src.services.state_backend import MUTABLE_FIELDS, Change
+from src.utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+RECORD_HEADER = struct.Struct("<IIQd")
+PAYLOAD_HEADER = struct.Struct("<BH")
+
+# Append-only: codes are stored in the log, so new fields go at the end
+LOGGED_FIELDS = [
+    (dataset, field)
+    for dataset in ('ambulances', 'hospitals', 'personnel')
+    for field in MUTABLE_FIELDS[dataset]
+]
+FIELD_CODES = {key: code for code, key in enumerate(LOGGED_FIELDS)}
+
+# (dataset, record_id, field) -> (timestamp, value)
+State = Dict[Tuple[str, str, str], Tuple[float, Any]]
+
+
+class EventLogLocked(Exception):
+    """Raised when another process already writes to an event log directory."""
+
+
+def _segment_path(directory: Path, first_seq: int) -> Path:
+    return directory / f"events-{first_seq:016d}.log"
+
+
+def _snapshot_path(directory: Path, seq: int, timestamp: float) -> Path:
+    # The timestamp is in the name so recovery need not parse every snapshot;
+    # rounded up, so a snapshot is never used for a moment before it was taken
+    return directory / f"snapshot-{seq:016d}-{math.ceil(timestamp * 1000)}.json"
+
+
+def _name_seq(path: Path) -> int:
+    return int(path.stem.split('-')[1])
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Make renames and deletions in directory durable (where the platform allows)."""
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _read_segment(path: Path, truncate: bool = False) -> Iterator[Tuple[int, float, Tuple[str, str, str], Any]]:
+    """
+    Yield (seq, timestamp, key, value) records from a segment, stopping at
+    the first incomplete or corrupt record (truncating it away if asked).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    position = 0
+    while position + RECORD_HEADER.size <= len(data):
+        length, crc, seq, timestamp = RECORD_HEADER.unpack_from(data, position)
+        start = position + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        code, id_length = PAYLOAD_HEADER.unpack_from(payload, 0)
+        id_end = PAYLOAD_HEADER.size + id_length
+        dataset, field = LOGGED_FIELDS[code]
+        record_id = str(payload[PAYLOAD_HEADER.size:id_end], 'utf-8')
+        yield seq, timestamp, (dataset, record_id, field), json.loads(payload[id_end:])
+        position = start + length
+    if truncate and position < len(data):
+        logger.warning(f"Truncating {len(data) - position} torn bytes from {path.name}")
+        with open(path, 'r+b') as f:
+            f.truncate(position)
+
+
+class EventLog:
+    """
+    Durable history of the mutable resource fields (see MUTABLE_FIELDS).
+
+    append() writes changes to the current segment and keeps the latest
+    value of every field in memory; write_snapshot() compacts that state
+    to disk and rotates the segment, normally from a background thread
+    (start_snapshots), which also prunes history beyond retention_seconds.
+    Only one process may write to a directory.
+    """
+
+    def __init__(
+        self,
+        directory: Path = EVENT_LOG_DIR,
+        fsync: bool = EVENT_LOG_FSYNC,
+        retention_seconds: float = EVENT_LOG_RETENTION_SECONDS
+    ):
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self.retention_seconds = retention_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._lock_file = open(self.directory / "LOCK", 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock_file.close()
+                raise EventLogLocked(f"Event log {self.directory} is in use by another process") from None
+
+        self._state: State = {}
+        self._seq = 0
+        # (timestamp, seq, path) of snapshots on disk, oldest first
+        self._snapshots: List[Tuple[float, int, Path]] = []
+        self._cached_snapshot: Optional[Tuple[int, State]] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop_snapshots = threading.Event()
+        self._recover()
+        self._segment = open(_segment_path(self.directory, self._seq + 1), 'ab')
+
+    def _segment_starts(self) -> List[int]:
+        return sorted(_name_seq(path) for path in self.directory.glob("events-*.log"))
+
+    def _load_snapshot(self, seq: int, path: Path) -> State:
+        if self._cached_snapshot is not None and self._cached_snapshot[0] == seq:
+            return self._cached_snapshot[1]
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        state = {
+            (dataset, record_id, field): (timestamp, value)
+            for dataset, record_id, field, timestamp, value in payload['state']
+        }
+        self._cached_snapshot = (seq, state)
+        return state
+
+    def _replay(self, state: State, after_seq: int, until: Optional[float] = None, truncate: bool = False) -> int:
+        """Apply records after after_seq (up to timestamp until) to state. Returns the last seq applied."""
+        starts = self._segment_starts()
+        # The segment holding after_seq + 1, and every one after it
+        first = max(bisect.bisect_right(starts, after_seq + 1) - 1, 0)
+        last_seq = after_seq
+        for index, start in enumerate(starts[first:], first):
+            is_last = index == len(starts) - 1
+            for seq, timestamp, key, value in _read_segment(_segment_path(self.directory, start), truncate and is_last):
+                if seq <= last_seq:
+                    continue
+                if until is not None and timestamp > until:
+                    return last_seq
+                state[key] = (timestamp, value)
+                last_seq = seq
+        return last_seq
+
+    def _recover(self) -> None:
+        """Rebuild the latest state from the newest readable snapshot and the log tail."""
+        snapshot_seq = 0
+        self._snapshots = sorted(
+            (int(path.stem.split('-')[2]) / 1000, _name_seq(path), path)
+            for path in self.directory.glob("snapshot-*.json")
+        )
+        while self._snapshots:
+            _, seq, path = self._snapshots[-1]
+            try:
+                self._state = dict(self._load_snapshot(seq, path))
+                snapshot_seq = seq
+                break
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable event snapshot {path.name}: {str(e)}")
+                self._snapshots.pop()
+        self._seq = self._replay(self._state, snapshot_seq, truncate=True)
+        if self._seq or self._state:
+            logger.info(f"Recovered {len(self._state)} fields from event log (seq {self._seq})")
+
+    def latest(self) -> State:
+        """Copy of the latest (timestamp, value) of every logged field."""
+        with self._lock:
+            return dict(self._state)
+
+    def append(self, changes: Iterable[Change], only_changed: bool = False, timestamp: Optional[float] = None) -> int:
+        """
+        Log field changes; with only_changed, values equal to the logged
+        state are skipped. Returns the number of events written.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        return self.append_many([(timestamp, changes, only_changed)])
+
+    def append_many(self, batches: Iterable[Tuple[float, Iterable[Change], bool]]) -> int:
+        """
+        Log (timestamp, changes, only_changed) batches, oldest first, with a
+        single flush. Returns the number of events written.
+        """
+        written = 0
+        with self._lock:
+            for timestamp, changes, only_changed in batches:
+                for dataset, record_id, field, value in changes:
+                    key = (dataset, record_id, field)
+                    if only_changed and key in self._state and self._state[key][1] == value:
+                        continue
+                    code = FIELD_CODES.get((dataset, field))
+                    if code is None:
+                        continue
+                    encoded_id = record_id.encode('utf-8')
+                    payload = PAYLOAD_HEADER.pack(code, len(encoded_id)) + encoded_id + \
+                        json.dumps(value, separators=(',', ':')).encode('utf-8')
+                    self._seq += 1
+                    self._segment.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload), self._seq, timestamp))
+                    self._segment.write(payload)
+                    self._state[key] = (timestamp, value)
+                    written += 1
+            if written:
+                self._segment.flush()
+                if self.fsync:
+                    os.fsync(self._segment.fileno())
+        return written
+
+    def state_at(self, timestamp: float) -> Optional[State]:
+        """
+        Logged fields as they were at timestamp: the latest snapshot taken
+        at or before it plus a partial replay. None if the log starts later
+        or that part of the history has been pruned.
+        """
+        with self._snapshot_lock:
+            index = bisect.bisect_right([taken_at for taken_at, _, _ in self._snapshots], timestamp)
+            seq = 0
+            state = {}
+            if index:
+                _, seq, path = self._snapshots[index - 1]
+                state = dict(self._load_snapshot(seq, path))
+            else:
+                starts = self._segment_starts()
+                if starts and starts[0] > 1:
+                    return None
+        self._replay(state, seq, until=timestamp)
+        return state or None
+
+    def write_snapshot(self) -> bool:
+        """Compact the current state to disk and start a new segment. Returns False if nothing changed."""
+        with self._snapshot_lock:
+            with self._lock:
+                if not self._seq or (self._snapshots and self._snapshots[-1][1] == self._seq):
+                    return False
+                seq, state, timestamp = self._seq, dict(self._state), time.time()
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+                self._segment.close()
+                self._segment = open(_segment_path(self.directory, seq + 1), 'ab')
+
+            # Serialize outside the append lock
+            path = _snapshot_path(self.directory, seq, timestamp)
+            temp_path = path.with_suffix(".tmp")
+            with open(temp_path, 'w') as f:
+                json.dump({
+                    "seq": seq,
+                    "timestamp": timestamp,
+                    "state": [[*key, logged_at, value] for key, (logged_at, value) in state.items()]
+                }, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            temp_path.replace(path)
+            _fsync_directory(self.directory)
+            self._snapshots.append((timestamp, seq, path))
+            self._cached_snapshot = (seq, state)
+            self._prune(timestamp)
+        logger.info(f"Wrote event log snapshot at seq {seq} ({len(state)} fields)")
+        return True
+
+    def _prune(self, now: float) -> None:
+        """
+        Delete snapshots and segments only needed for times before the
+        retention cutoff. Caller holds the snapshot lock.
+        """
+        if self.retention_seconds <= 0:
+            return
+        cutoff = now - self.retention_seconds
+        # The latest snapshot at or before the cutoff still answers queries there
+        keep = bisect.bisect_right([taken_at for taken_at, _, _ in self._snapshots], cutoff) - 1
+        if keep <= 0:
+            return
+        _, keep_seq, _ = self._snapshots[keep]
+        removed = 0
+        for _, _, path in self._snapshots[:keep]:
+            path.unlink(missing_ok=True)
+            removed += 1
+        self._snapshots = self._snapshots[keep:]
+
+        starts = self._segment_starts()
+        for start, next_start in zip(starts, starts[1:]):
+            # Every event in this segment is covered by the kept snapshot
+            if next_start - 1 <= keep_seq:
+                _segment_path(self.directory, start).unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            _fsync_directory(self.directory)
+            logger.info(f"Pruned {removed} event log files older than {self.retention_seconds:.0f}s")
+
+    def start_snapshots(self, interval: float = EVENT_SNAPSHOT_INTERVAL_SECONDS) -> None:
+        """Write snapshots in a background thread every interval seconds."""
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+        self._stop_snapshots.clear()
+
+        def run():
+            while not self._stop_snapshots.wait(interval):
+                try:
+                    self.write_snapshot()
+                except Exception as e:
+                    logger.error(f"Error writing event log snapshot: {str(e)}")
+
+        self._snapshot_thread = threading.Thread(target=run, name="event-snapshots", daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        """Stop the background snapshot thread, if running."""
+        self._stop_snapshots.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def close(self) -> None:
+        self.stop_snapshots()
+        with self._lock:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._segment.close()
+        self._lock_file.close()
+
+
+def create_event_log() -> Optional[EventLog]:
+    """Event log configured by EVENT_LOG_ENABLED/EVENT_LOG_DIR, or None."""
+    if not EVENT_LOG_ENABLED:
+        return None
+    try:
+        return EventLog(EVENT_LOG_DIR)
+    except EventLogLocked as e:
+        logger.warning(f"Not recording resource history: {str(e)}")
+        return None
@@ -0,0 +1,190 @@
+# src/services/fleet_tracker.py
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config.settings import SPATIAL_INDEX_CELL_KM
+from src.models.position_update import PositionUpdate
+from src.services.spatial_index import SpatialIndex, Predicate
+from src.utils.timestamps import to_epoch, to_iso
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FleetTracker:
+    """
+    Moving-object index for live ambulance positions.
+
+    Position updates are applied in place on a grid-bucket SpatialIndex
+    (O(1) per update) and updates older than the last one seen for a unit
+    are dropped. A single lock covers both updates and queries, so a
+    nearest-unit query never observes a half-applied batch. Ingests are
+    also serialized through the write-through to the data manager, so
+    positions reach it in the order they were applied here.
+    """
+
+    def __init__(
+        self,
+        data_manager=None,
+        cell_size_km: float = SPATIAL_INDEX_CELL_KM
+    ):
+        self._lock = threading.Lock()
+        # Held from apply through write-through; never taken by listeners
+        self._ingest_lock = threading.Lock()
+        self._index = SpatialIndex(cell_size_km)
+        self._last_updated: Dict[str, float] = {}
+        self._applied = 0
+        self._stale = 0
+        self.data_manager = data_manager
+
+        if data_manager is not None:
+            self.load(data_manager.get_ambulances())
+            data_manager.add_listener(self._on_data_change)
+
+    def load(self, ambulances: Iterable[Dict], prune: bool = False) -> None:
+        """
+        Seed the index from ambulance records. Positions older than the one
+        already tracked for a unit are ignored; with prune=True, units
+        missing from the records are dropped.
+        """
+        with self._lock:
+            seen = set()
+            for amb in ambulances:
+                seen.add(amb['ambulance_id'])
+                self._track(amb)
+            if prune:
+                for unit_id in set(self._last_updated) - seen:
+                    self._index.remove(unit_id)
+                    del self._last_updated[unit_id]
+        logger.info(f"Fleet tracker loaded {len(self._index)} units")
+
+    def _track(self, amb: Dict) -> None:
+        unit_id = amb['ambulance_id']
+        location = amb['location']
+        last_updated = location.get('last_updated')
+        last_updated = to_epoch(last_updated) if last_updated else 0.0
+        if unit_id in self._last_updated and last_updated <= self._last_updated[unit_id]:
+            return
+        self._index.move(unit_id, location['lat'], location['lng'])
+        self._last_updated[unit_id] = last_updated
+
+    def _on_data_change(self, event: str, record: Dict) -> None:
+        if event == 'data_reloaded':
+            self.load(self.data_manager.get_ambulances(), prune=True)
+        elif event == 'ambulance_location':
+            # Positions written by other workers, or echoes of our own (skipped as not newer)
+            with self._lock:
+                self._track(record)
+
+    def _apply(self, update: PositionUpdate) -> bool:
+        previous = self._last_updated.get(update.unit_id)
+        if previous is not None and update.last_updated <= previous:
+            self._stale += 1
+            return False
+
+        self._index.move(update.unit_id, update.lat, update.lng)
+        self._last_updated[update.unit_id] = update.last_updated
+        self._applied += 1
+        return True
+
+    def _write_through(self, updates: List[PositionUpdate]) -> None:
+        # Outside the tracker lock (the data manager notifies listeners,
+        # including us) but inside the ingest lock, so writes stay in order
+        if self.data_manager is not None and updates:
+            self.data_manager.update_ambulance_locations([
+                (update.unit_id, update.lat, update.lng, to_iso(update.last_updated))
+                for update in updates
+            ])
+
+    def _is_known(self, snapshot, unit_id: str) -> bool:
+        # Without a data manager any unit may be tracked
+        return snapshot is None or snapshot.get('ambulances', unit_id) is not None
+
+    def ingest(self, update: PositionUpdate) -> bool:
+        """Apply one position update. Returns False if it was stale or for an unknown unit."""
+        snapshot = self.data_manager.snapshot() if self.data_manager is not None else None
+        if not self._is_known(snapshot, update.unit_id):
+            logger.warning(f"Ignoring position update for unknown unit {update.unit_id}")
+            return False
+        with self._ingest_lock:
+            with self._lock:
+                applied = self._apply(update)
+            if applied:
+                self._write_through([update])
+        return applied
+
+    def ingest_batch(self, updates: Iterable[PositionUpdate]) -> Dict[str, int]:
+        """
+        Apply a batch of position updates under a single lock acquisition.
+        Updates for units the data manager does not know are skipped.
+        Returns counts of applied, stale and unknown updates.
+        """
+        snapshot = self.data_manager.snapshot() if self.data_manager is not None else None
+        known = []
+        unknown = 0
+        for update in updates:
+            if self._is_known(snapshot, update.unit_id):
+                known.append(update)
+            else:
+                unknown += 1
+        if unknown:
+            logger.warning(f"Ignored {unknown} position updates for unknown units")
+
+        applied = []
+        stale = 0
+        with self._ingest_lock:
+            with self._lock:
+                for update in known:
+                    if self._apply(update):
+                        applied.append(update)
+                    else:
+                        stale += 1
+            # One state-backend transaction for the whole batch
+            self._write_through(applied)
+        return {"applied": len(applied), "stale": stale, "unknown": unknown}
+
+    def remove(self, unit_id: str) -> bool:
+        """Stop tracking a unit."""
+        with self._lock:
+            self._last_updated.pop(unit_id, None)
+            return self._index.remove(unit_id)
+
+    def position(self, unit_id: str) -> Optional[Dict]:
+        """Return the latest known position of a unit."""
+        with self._lock:
+            position = self._index.position(unit_id)
+            if position is None:
+                return None
+            return {
+                "lat": position[0],
+                "lng": position[1],
+                "last_updated": to_iso(self._last_updated[unit_id])
+            }
+
+    def nearest(
+        self,
+        location: Tuple[float, float],
+        k: int = 1,
+        max_distance: Optional[float] = None,
+        predicate: Predicate = None
+    ) -> List[Tuple[str, float]]:
+        """Return up to k (unit_id, distance_km) pairs nearest to location."""
+        with self._lock:
+            return self._index.nearest(location[0], location[1], k, max_distance, predicate)
+
+    def within(
+        self,
+        location: Tuple[float, float],
+        radius_km: float,
+        predicate: Predicate = None
+    ) -> List[Tuple[str, float]]:
+        """Return (unit_id, distance_km) pairs within radius_km of location."""
+        with self._lock:
+            return self._index.within(location[0], location[1], radius_km, predicate)
+
+    def stats(self) -> Dict[str, int]:
+        """Return ingestion counters."""
+        return {
+            "tracked_units": len(self._index),
+            "applied_updates": self._applied,
+            "stale_updates": self._stale
+        }
@@ -1,12 +1,64 @@
 # src/services/geolocation.py
-from typing import Dict, Tuple, List
+import asyncio
+from typing import Dict, Tuple, List, Optional, Sequence
+import numpy as np
 from geopy.distance import geodesic
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Mean Earth radius (IUGG) used by the haversine kernel
+EARTH_RADIUS_KM = 6371.0088
+
+# Haversine deviates from the WGS-84 geodesic by at most ~0.5%, so candidate
+# filtering is widened by this factor before exact refinement.
+HAVERSINE_TOLERANCE = 0.005
+
+
+def haversine_distances(
+        origin: Tuple[float, float],
+        lats: np.ndarray,
+        lngs: np.ndarray
+) -> np.ndarray:
+    """
+    Great-circle distances in kilometers from origin to every (lat, lng) pair.
+    origin may itself hold arrays, giving element-wise pairwise distances.
+    """
+    lat1 = np.radians(origin[0])
+    lng1 = np.radians(origin[1])
+    lat2 = np.radians(lats)
+    lng2 = np.radians(lngs)
+
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def coordinate_arrays(resources: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract latitude and longitude arrays from resources with a `location` dict.
+    """
+    count = len(resources)
+    lats = np.fromiter(
+        (resource['location']['lat'] for resource in resources),
+        dtype=np.float64,
+        count=count
+    )
+    lngs = np.fromiter(
+        (resource['location']['lng'] for resource in resources),
+        dtype=np.float64,
+        count=count
+    )
+    return lats, lngs
+
 
 class GeolocationService:
+    def __init__(self, travel_time_engine=None, eta_service=None):
+        # Optional TravelTimeEngine enabling road travel-time ranking
+        self.travel_time_engine = travel_time_engine
+        # Optional ETAService enabling live Distance Matrix ranking
+        self.eta_service = eta_service
+
     def calculate_distance(
             self,
             point1: Tuple[float, float],
@@ -21,39 +73,162 @@ class GeolocationService:
             logger.error(f"Error calculating distance: {str(e)}")
             raise
 
+    def nearest_indices(
+            self,
+            incident_location: Tuple[float, float],
+            lats: np.ndarray,
+            lngs: np.ndarray,
+            k: Optional[int] = None,
+            max_distance: Optional[float] = None,
+            exact: bool = False
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank coordinates by distance from incident_location.
+        Returns (index, distance_km) pairs sorted nearest first, limited to
+        the k nearest and/or those within max_distance. With exact=True the
+        selected candidates are re-measured with the geodesic distance.
+        """
+        try:
+            if len(lats) == 0 or (k is not None and k <= 0):
+                return []
+
+            distances = haversine_distances(incident_location, lats, lngs)
+
+            if max_distance is None:
+                candidates = np.arange(len(distances))
+            else:
+                limit = max_distance * (1 + HAVERSINE_TOLERANCE) if exact else max_distance
+                candidates = np.flatnonzero(distances <= limit)
+
+            if k is not None and k < len(candidates):
+                # Keep some slack for exact refinement to reorder the boundary
+                pool = min(len(candidates), 2 * k) if exact else k
+                if pool < len(candidates):
+                    selected = np.argpartition(distances[candidates], pool - 1)[:pool]
+                    candidates = candidates[selected]
+
+            order = candidates[np.argsort(distances[candidates], kind='stable')]
+
+            if not exact:
+                ranked = [(int(i), float(distances[i])) for i in order]
+                return ranked if k is None else ranked[:k]
+
+            ranked = []
+            for i in order:
+                distance = geodesic(
+                    incident_location,
+                    (float(lats[i]), float(lngs[i]))
+                ).kilometers
+                if max_distance is None or distance <= max_distance:
+                    ranked.append((int(i), distance))
+            ranked.sort(key=lambda pair: pair[1])
+            return ranked if k is None else ranked[:k]
+
+        except Exception as e:
+            logger.error(f"Error ranking coordinates: {str(e)}")
+            raise
+
     def find_nearest_resources(
             self,
             incident_location: Tuple[float, float],
             resources: List[Dict],
-            max_distance: float = None
+            max_distance: float = None,
+            k: Optional[int] = None,
+            exact: bool = False
     ) -> List[Dict]:
         """
         Find nearest resources within optional max_distance.
-        Returns sorted list of resources with distances.
+        Returns sorted list of resources with distances. Only the selected
+        resources are copied; use nearest_indices to avoid copies entirely.
         """
         try:
-            resources_with_distances = []
-            for resource in resources:
-                resource_location = (
-                    resource['location']['lat'],
-                    resource['location']['lng']
-                )
-                distance = self.calculate_distance(
-                    incident_location,
-                    resource_location
-                )
-
-                if max_distance is None or distance <= max_distance:
-                    resources_with_distances.append({
-                        **resource,
-                        'distance': distance
-                    })
-
-            return sorted(
-                resources_with_distances,
-                key=lambda x: x['distance']
+            lats, lngs = coordinate_arrays(resources)
+            ranked = self.nearest_indices(
+                incident_location,
+                lats,
+                lngs,
+                k=k,
+                max_distance=max_distance,
+                exact=exact
             )
+            return [
+                {**resources[i], 'distance': distance}
+                for i, distance in ranked
+            ]
 
         except Exception as e:
             logger.error(f"Error finding nearest resources: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def find_fastest_resources(
+            self,
+            incident_location: Tuple[float, float],
+            resources: List[Dict],
+            id_field: str,
+            k: Optional[int] = None,
+            max_eta: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Rank resources by estimated road travel time (seconds) from
+        incident_location using the offline travel-time engine.
+        Resources without a precomputed ETA are left out.
+        """
+        if self.travel_time_engine is None:
+            raise ValueError("No travel time engine configured")
+
+        try:
+            etas = self.travel_time_engine.etas(incident_location)
+            ranked = []
+            for resource in resources:
+                eta = etas.get(resource[id_field])
+                if eta is not None and (max_eta is None or eta <= max_eta):
+                    ranked.append((eta, resource))
+            ranked.sort(key=lambda pair: pair[0])
+            if k is not None:
+                ranked = ranked[:k]
+            return [
+                {**resource, 'eta_seconds': eta}
+                for eta, resource in ranked
+            ]
+
+        except Exception as e:
+            logger.error(f"Error finding fastest resources: {str(e)}")
+            raise
+
+    async def find_fastest_resources_live(
+            self,
+            incident_location: Tuple[float, float],
+            resources: List[Dict],
+            k: Optional[int] = None,
+            max_eta: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Rank resources by live Distance Matrix travel time (seconds) from
+        their location to incident_location. Lookups go through the batching
+        ETA service, so concurrent rankings share matrix calls. Resources
+        without an ETA are left out.
+        """
+        if self.eta_service is None:
+            raise ValueError("No ETA service configured")
+
+        try:
+            etas = await asyncio.gather(*(
+                self.eta_service.eta((resource['location']['lat'], resource['location']['lng']), incident_location)
+                for resource in resources
+            ))
+            ranked = [
+                (eta, resource)
+                for eta, resource in zip(etas, resources)
+                if eta is not None and (max_eta is None or eta <= max_eta)
+            ]
+            ranked.sort(key=lambda pair: pair[0])
+            if k is not None:
+                ranked = ranked[:k]
+            return [
+                {**resource, 'eta_seconds': eta}
+                for eta, resource in ranked
+            ]
+
+        except Exception as e:
+            logger.error(f"Error finding fastest resources by live ETA: {str(e)}")
+            raise
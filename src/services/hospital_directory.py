@@ -0,0 +1,213 @@
+# src/services/hospital_directory.py
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.config.settings import DATA_DIR, PLACES_HOSPITALS_PATH, HOSPITAL_DEDUPE_DISTANCE_KM
+from src.services.spatial_index import SpatialIndex
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class HospitalDirectory:
+    """
+    Indexed local hospital directory.
+
+    Starts from the curated hospitals dataset and any hospitals previously
+    learned from the Places API. Places results are merged in only when
+    local coverage is missing, deduplicated by place_id or by proximity to
+    a known hospital, and persisted so the next lookup is a local read.
+
+    With a data manager, emergency department occupancy of local hospitals
+    is read from its live snapshot at query time, so capacity filters see
+    PATCH, state-backend and reload updates.
+    """
+
+    def __init__(
+        self,
+        data_manager=None,
+        places_path: Optional[Path] = PLACES_HOSPITALS_PATH,
+        dedupe_distance_km: float = HOSPITAL_DEDUPE_DISTANCE_KM
+    ):
+        self.data_manager = data_manager
+        self.places_path = places_path
+        self.dedupe_distance_km = dedupe_distance_km
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._by_place_id: Dict[str, str] = {}
+        self._index = SpatialIndex()
+
+        if data_manager is not None:
+            hospitals = data_manager.get_hospitals()
+        else:
+            hospitals = self._read(DATA_DIR / "hospitals.json").get('hospitals', [])
+        for hospital in hospitals:
+            self._add({**hospital, 'source': 'local'})
+
+        if places_path is not None:
+            learned = self._read(places_path)
+            for hospital in learned.get('hospitals', []):
+                self._add(hospital)
+            for place_id, hospital_id in learned.get('place_aliases', {}).items():
+                if hospital_id in self._entries:
+                    self._by_place_id[place_id] = hospital_id
+
+        logger.info(f"Hospital directory loaded {len(self._entries)} hospitals")
+
+    @staticmethod
+    def _read(path: Path) -> Dict:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error reading hospital directory {path}: {str(e)}")
+            return {}
+
+    def _add(self, entry: Dict) -> None:
+        hospital_id = entry['hospital_id']
+        self._entries[hospital_id] = entry
+        if entry.get('place_id'):
+            self._by_place_id[entry['place_id']] = hospital_id
+        self._index.insert(hospital_id, entry['location']['lat'], entry['location']['lng'])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _current(self, hospital_id: str) -> Dict:
+        """Directory entry with the live emergency department state, where known."""
+        entry = self._entries[hospital_id]
+        if self.data_manager is not None and entry.get('source') == 'local':
+            live = self.data_manager.get_hospital(hospital_id)
+            if live is not None and 'emergency_department' in live:
+                return {**entry, 'emergency_department': live['emergency_department']}
+        return entry
+
+    def get(self, hospital_id: str) -> Optional[Dict]:
+        if hospital_id not in self._entries:
+            return None
+        return self._current(hospital_id)
+
+    @staticmethod
+    def _is_capable(
+        entry: Dict,
+        specialties: Optional[List[str]],
+        require_capacity: bool
+    ) -> bool:
+        if specialties and not set(specialties).issubset(entry.get('specialties', [])):
+            return False
+        if require_capacity:
+            department = entry.get('emergency_department')
+            if not department or department['current_occupancy'] >= department['capacity']:
+                return False
+        return True
+
+    def nearest(
+        self,
+        location: Tuple[float, float],
+        k: int = 1,
+        radius_km: Optional[float] = None,
+        specialties: Optional[List[str]] = None,
+        require_capacity: bool = False
+    ) -> List[Dict]:
+        """
+        Return up to k hospitals nearest to location, optionally limited to
+        those within radius_km, offering all specialties and with free
+        emergency department capacity. Each result carries `distance` (km).
+        """
+        with self._lock:
+            matches = self._index.nearest(
+                location[0],
+                location[1],
+                k=k,
+                max_distance=radius_km,
+                predicate=lambda hospital_id: self._is_capable(
+                    self._current(hospital_id), specialties, require_capacity
+                )
+            )
+            return [{**self._current(hospital_id), 'distance': distance} for hospital_id, distance in matches]
+
+    def merge_places_results(self, places: List[Dict]) -> int:
+        """
+        Merge Places API results into the directory and persist them.
+        Returns the number of hospitals added.
+        """
+        added = []
+        aliased = []
+        with self._lock:
+            for place in places:
+                place_id = place.get('place_id')
+                coordinates = place.get('geometry', {}).get('location')
+                if not place_id or not coordinates:
+                    continue
+                if place_id in self._by_place_id:
+                    continue
+
+                duplicate = self._index.nearest(
+                    coordinates['lat'],
+                    coordinates['lng'],
+                    k=1,
+                    max_distance=self.dedupe_distance_km
+                )
+                if duplicate:
+                    # Same facility already known: remember its place_id only
+                    self._by_place_id[place_id] = duplicate[0][0]
+                    aliased.append(place_id)
+                    continue
+
+                entry = {
+                    'hospital_id': f"PLACE-{place_id}",
+                    'name': place.get('name', 'Unknown'),
+                    'place_id': place_id,
+                    'rating': place.get('rating'),
+                    'location': {
+                        'lat': coordinates['lat'],
+                        'lng': coordinates['lng'],
+                        'address': place.get('vicinity', '')
+                    },
+                    'source': 'places'
+                }
+                self._add(entry)
+                added.append(entry)
+
+            if added or aliased:
+                self._persist()
+
+        if added:
+            logger.info(f"Added {len(added)} hospitals from Places API to directory")
+        return len(added)
+
+    def _persist(self) -> None:
+        if self.places_path is None:
+            return
+        learned = [entry for entry in self._entries.values() if entry.get('source') == 'places']
+        aliases = {
+            place_id: hospital_id
+            for place_id, hospital_id in self._by_place_id.items()
+            if self._entries[hospital_id].get('place_id') != place_id
+        }
+        tmp_path = Path(str(self.places_path) + ".tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'hospitals': learned, 'place_aliases': aliases}, f, indent=2)
+            os.replace(tmp_path, self.places_path)
+        except Exception as e:
+            logger.error(f"Error persisting hospital directory: {str(e)}")
+
+    @staticmethod
+    def as_place(entry: Dict) -> Dict:
+        """Shape a directory entry like a Places API result."""
+        location = entry['location']
+        return {
+            'name': entry.get('name', 'Unknown'),
+            'vicinity': location.get('address', ''),
+            'rating': entry.get('rating'),
+            'place_id': entry.get('place_id', ''),
+            'geometry': {'location': {'lat': location['lat'], 'lng': location['lng']}},
+            'hospital_id': entry['hospital_id'],
+            'distance': entry.get('distance'),
+            'source': entry.get('source', 'local')
+        }
@@ -0,0 +1,225 @@
+# src/services/incident_scheduler.py
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+from src.config.settings import (
+    SCHEDULER_MAX_CONCURRENT_INCIDENTS,
+    SCHEDULER_STAGE_CONCURRENCY,
+    SCHEDULER_DEFER_QUEUE_DEPTH,
+    SCHEDULER_SHED_QUEUE_DEPTH,
+    SCHEDULER_LOW_ACUITY_MAX_SEVERITY,
+    SCHEDULER_AGING_SECONDS,
+    SCHEDULER_DEFER_SECONDS
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+SEVERITY_LEVELS = (1, 2, 3, 4, 5)
+DEFAULT_SEVERITY = 3
+
+# Wait samples kept per priority class for percentiles
+WAIT_SAMPLES = 1024
+
+# Priority key of the incident being processed in the current task, so
+# stages entered from deep inside the handler queue at its priority
+_current_priority: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "incident_priority", default=None
+)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when low-acuity work is shed because the queue is too deep."""
+
+    def __init__(self, severity: int, queue_depth: int, retry_after: float):
+        self.severity = severity
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        super().__init__(
+            f"Severity {severity} incident shed with {queue_depth} incidents queued; retry in {retry_after:.0f}s"
+        )
+
+
+class PriorityGate:
+    """
+    Semaphore whose waiters are admitted lowest key first instead of in
+    arrival order. A released slot is handed straight to the next waiter.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: List = []
+        self._order = itertools.count()
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, key: float) -> None:
+        if self.in_use < self.limit and not self.queued():
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (key, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Granted a slot just as we were cancelled: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_use -= 1
+
+
+class IncidentScheduler:
+    """
+    In-process priority scheduler for incident processing.
+
+    Incidents are admitted up to max_concurrent at a time, most severe
+    first; waiting ages a request by one severity level every
+    aging_seconds, so low-acuity work is delayed but never starved. The
+    handler's stages (e.g. the LLM-backed agents) have their own
+    concurrency limits, queued at the priority of the incident that
+    entered them.
+
+    Admission control applies to low-acuity work (severity at most
+    low_acuity_max_severity): beyond defer_queue_depth queued incidents
+    it is queued as if it had arrived defer_seconds later, and beyond
+    shed_queue_depth it is rejected with SchedulerOverloaded.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = SCHEDULER_MAX_CONCURRENT_INCIDENTS,
+        stage_limits: Optional[Dict[str, int]] = None,
+        defer_queue_depth: int = SCHEDULER_DEFER_QUEUE_DEPTH,
+        shed_queue_depth: int = SCHEDULER_SHED_QUEUE_DEPTH,
+        low_acuity_max_severity: int = SCHEDULER_LOW_ACUITY_MAX_SEVERITY,
+        aging_seconds: float = SCHEDULER_AGING_SECONDS,
+        defer_seconds: float = SCHEDULER_DEFER_SECONDS
+    ):
+        if aging_seconds <= 0:
+            raise ValueError("aging_seconds must be positive")
+        self.max_concurrent = max_concurrent
+        self.defer_queue_depth = defer_queue_depth
+        self.shed_queue_depth = shed_queue_depth
+        self.low_acuity_max_severity = low_acuity_max_severity
+        self.aging_seconds = aging_seconds
+        self.defer_seconds = defer_seconds
+
+        self._admission = PriorityGate(max_concurrent)
+        limits = SCHEDULER_STAGE_CONCURRENCY if stage_limits is None else stage_limits
+        self._stages = {stage: PriorityGate(limit) for stage, limit in limits.items()}
+
+        self._queued = {severity: 0 for severity in SEVERITY_LEVELS}
+        self._admitted = {severity: 0 for severity in SEVERITY_LEVELS}
+        self._deferred = {severity: 0 for severity in SEVERITY_LEVELS}
+        self._shed = {severity: 0 for severity in SEVERITY_LEVELS}
+        self._waits: Dict[int, Deque[float]] = {
+            severity: deque(maxlen=WAIT_SAMPLES) for severity in SEVERITY_LEVELS
+        }
+
+    def _key(self, severity: int, arrived_at: float) -> float:
+        # Lower runs first. Aging is linear in the wait, so it shifts every
+        # waiter's key equally and the key can be fixed at arrival
+        return arrived_at / self.aging_seconds - severity
+
+    def queue_depth(self) -> int:
+        """Incidents waiting for admission."""
+        return sum(self._queued.values())
+
+    async def submit(self, severity: Optional[int], work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run work() once admitted at the given triage severity (1-5, 5 most
+        urgent) and return its result. Raises SchedulerOverloaded if shed.
+        """
+        severity = DEFAULT_SEVERITY if severity is None else min(max(int(severity), 1), 5)
+        queue_depth = self.queue_depth()
+        arrived_at = time.monotonic()
+        low_acuity = severity <= self.low_acuity_max_severity
+
+        if low_acuity and queue_depth >= self.shed_queue_depth:
+            self._shed[severity] += 1
+            logger.warning(f"Shedding severity {severity} incident, {queue_depth} incidents queued")
+            raise SchedulerOverloaded(severity, queue_depth, self.defer_seconds)
+        key = self._key(severity, arrived_at)
+        if low_acuity and queue_depth >= self.defer_queue_depth:
+            self._deferred[severity] += 1
+            key += self.defer_seconds / self.aging_seconds
+
+        self._queued[severity] += 1
+        try:
+            await self._admission.acquire(key)
+        finally:
+            self._queued[severity] -= 1
+        self._admitted[severity] += 1
+        self._waits[severity].append(time.monotonic() - arrived_at)
+
+        token = _current_priority.set(key)
+        try:
+            return await work()
+        finally:
+            _current_priority.reset(token)
+            self._admission.release()
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Hold one of a stage's slots, queued at the current incident's priority."""
+        gate = self._stages.get(name)
+        if gate is None:
+            yield
+            return
+        key = _current_priority.get()
+        if key is None:
+            key = self._key(DEFAULT_SEVERITY, time.monotonic())
+        await gate.acquire(key)
+        try:
+            yield
+        finally:
+            gate.release()
+
+    def stats(self) -> Dict:
+        """Running and queued incidents, and per-class queue depth, counters and wait percentiles."""
+
+        def percentile(waits: List[float], fraction: float) -> Optional[float]:
+            if not waits:
+                return None
+            return waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000
+
+        classes = {}
+        for severity in SEVERITY_LEVELS:
+            waits = sorted(self._waits[severity])
+            classes[severity] = {
+                "queued": self._queued[severity],
+                "admitted": self._admitted[severity],
+                "deferred": self._deferred[severity],
+                "shed": self._shed[severity],
+                "wait_p50_ms": percentile(waits, 0.5),
+                "wait_p99_ms": percentile(waits, 0.99)
+            }
+        return {
+            "running": self._admission.in_use,
+            "max_concurrent": self.max_concurrent,
+            "queued": self.queue_depth(),
+            "classes": classes,
+            "stages": {
+                name: {"limit": gate.limit, "in_use": gate.in_use, "queued": gate.queued()}
+                for name, gate in self._stages.items()
+            }
+        }
@@ -0,0 +1,336 @@
+# src/services/incident_store.py
+import bisect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from src.config.settings import INCIDENT_LOG_PATH, INCIDENT_CACHE_SIZE
+from src.utils.logger import get_logger
+from src.utils.timestamps import to_epoch, to_iso
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+INCIDENT_STATUSES = ("queued", "processing", "processed", "failed", "shed")
+
+# Logs shorter than this are never compacted
+COMPACT_MIN_LINES = 1000
+
+
+class IncidentMeta(NamedTuple):
+    """What the indexes need of an incident, kept for every incident."""
+    status: str
+    severity: Optional[int]
+    created_at: float
+    offset: int
+    length: int
+
+
+class IncidentStore:
+    """
+    Incident records in an append-only JSON-lines log, fronted by an
+    in-memory LRU of recently written or read incidents.
+
+    Every put/update appends the full record, so the last line for an id
+    is its current state. Only the indexes (status, severity, creation
+    time) and each incident's log offset are held for every incident;
+    evicted records are read back from the log by offset.
+
+    Several processes (e.g. uvicorn workers) may share a log: appends hold
+    an exclusive flock on a lock file beside it and reads a shared one,
+    and each first indexes whatever other processes appended. A torn last
+    line (crash mid-write) is truncated and corrupt lines elsewhere are
+    skipped. Once the log holds over twice as many lines as incidents it
+    is compacted to the latest line per incident, on a background thread.
+
+    Every call may block on file I/O or on another process's lock, so
+    async callers should run them in an executor.
+    """
+
+    def __init__(self, path: Path = INCIDENT_LOG_PATH, cache_size: int = INCIDENT_CACHE_SIZE):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._meta: Dict[str, IncidentMeta] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_severity: Dict[Optional[int], Set[str]] = {}
+        # (created_at, incident_id), oldest first
+        self._by_time: List[Tuple[float, str]] = []
+        # Log bytes indexed so far, and the lines in them (superseded included)
+        self._end = 0
+        self._lines = 0
+        self._log = None
+        self._reader = None
+        self._inode = None
+        self._compact_thread: Optional[threading.Thread] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self._lock_file = open(self.path.with_name(self.path.name + ".lock"), 'a')
+        with self._lock, self._file_lock(exclusive=True):
+            if self._meta:
+                logger.info(f"Recovered {len(self._meta)} incidents from {self.path.name}")
+            if self._needs_compaction():
+                self._compact()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold the cross-process lock, with the indexes caught up to the log."""
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            if self._inode is None or os.stat(self.path).st_ino != self._inode:
+                # First use, or another process compacted the log
+                self._open(reset=True)
+            self._scan(truncate=exclusive)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open(self, reset: bool) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._reader.close()
+        self._log = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+        self._inode = os.fstat(self._reader.fileno()).st_ino
+        if reset:
+            self._cache.clear()
+            self._meta.clear()
+            self._by_status.clear()
+            self._by_severity.clear()
+            self._by_time = []
+            self._end = 0
+            self._lines = 0
+
+    def _scan(self, truncate: bool) -> None:
+        """Index lines appended since the last scan; with truncate, drop a torn last line."""
+        self._reader.seek(self._end)
+        data = self._reader.read()
+        position = 0
+        while position < len(data):
+            end = data.find(b'\n', position)
+            if end == -1:
+                break
+            try:
+                record = json.loads(data[position:end])
+                if not isinstance(record, dict) or not {'incident_id', 'status', 'created_at'} <= record.keys():
+                    raise ValueError("not an incident record")
+            except ValueError:
+                if end + 1 == len(data):
+                    # Possibly torn: treat like a line with no newline
+                    break
+                logger.warning(f"Skipping corrupt line at byte {self._end + position} of {self.path.name}")
+            else:
+                self._index(record, self._end + position, end + 1 - position)
+                self._remember(record['incident_id'], record)
+            self._lines += 1
+            position = end + 1
+        self._end += position
+        if truncate and position < len(data):
+            logger.warning(f"Truncating {len(data) - position} torn bytes from {self.path.name}")
+            os.ftruncate(self._log.fileno(), self._end)
+
+    def _needs_compaction(self) -> bool:
+        return self._lines >= COMPACT_MIN_LINES and self._lines > 2 * len(self._meta)
+
+    def _compact(self) -> None:
+        # Latest line per incident, in log order, swapped in by rename
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        lines = self._lines
+        meta = {}
+        with open(temp_path, 'wb') as f:
+            for incident_id in sorted(self._meta, key=lambda incident_id: self._meta[incident_id].offset):
+                current = self._meta[incident_id]
+                self._reader.seek(current.offset)
+                meta[incident_id] = current._replace(offset=f.tell())
+                f.write(self._reader.read(current.length))
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(self.path)
+        directory = os.open(str(self.path.parent), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+        # Same records at new offsets, so the other indexes stand
+        self._meta = meta
+        self._open(reset=False)
+        self._end = os.fstat(self._reader.fileno()).st_size
+        self._lines = len(meta)
+        logger.info(f"Compacted {self.path.name} from {lines} to {len(meta)} lines")
+
+    def _index(self, record: Dict, offset: int, length: int) -> None:
+        incident_id = record['incident_id']
+        previous = self._meta.get(incident_id)
+        if previous is not None:
+            self._by_status[previous.status].discard(incident_id)
+            self._by_severity[previous.severity].discard(incident_id)
+            created_at = previous.created_at
+        else:
+            created_at = to_epoch(record['created_at'])
+            bisect.insort(self._by_time, (created_at, incident_id))
+        meta = IncidentMeta(record['status'], record.get('severity_level'), created_at, offset, length)
+        self._meta[incident_id] = meta
+        self._by_status.setdefault(meta.status, set()).add(incident_id)
+        self._by_severity.setdefault(meta.severity, set()).add(incident_id)
+
+    def _remember(self, incident_id: str, record: Dict) -> None:
+        self._cache[incident_id] = record
+        self._cache.move_to_end(incident_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _append(self, record: Dict) -> None:
+        # Called under the exclusive file lock, so nobody else is appending
+        line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+        offset = os.fstat(self._log.fileno()).st_size
+        self._log.write(line)
+        self._log.flush()
+        self._end = offset + len(line)
+        self._lines += 1
+        self._index(record, offset, len(line))
+        self._remember(record['incident_id'], record)
+        if self._needs_compaction() and (self._compact_thread is None or not self._compact_thread.is_alive()):
+            self._compact_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compact_thread.start()
+
+    def _load(self, incident_id: str) -> Optional[Dict]:
+        record = self._cache.get(incident_id)
+        if record is not None:
+            self._cache.move_to_end(incident_id)
+            return record
+        meta = self._meta.get(incident_id)
+        if meta is None:
+            return None
+        self._reader.seek(meta.offset)
+        record = json.loads(self._reader.read(meta.length))
+        self._remember(incident_id, record)
+        return record
+
+    def put(self, record: Dict) -> Dict:
+        """
+        Store a new incident. record needs incident_id and status; created_at
+        (ISO-8601) defaults to now.
+        """
+        now = to_iso(time.time())
+        record = {'created_at': now, **record, 'updated_at': now}
+        if record['status'] not in INCIDENT_STATUSES:
+            raise ValueError(f"Unknown incident status: {record['status']}")
+        with self._lock, self._file_lock(exclusive=True):
+            if record['incident_id'] in self._meta:
+                raise ValueError(f"Incident {record['incident_id']} already exists")
+            self._append(record)
+        return record
+
+    def update(self, incident_id: str, **fields) -> Optional[Dict]:
+        """Change an incident's fields (e.g. status). Returns the new record, None if unknown."""
+        if 'status' in fields and fields['status'] not in INCIDENT_STATUSES:
+            raise ValueError(f"Unknown incident status: {fields['status']}")
+        with self._lock, self._file_lock(exclusive=True):
+            record = self._load(incident_id)
+            if record is None:
+                return None
+            fields.pop('incident_id', None)
+            fields.pop('created_at', None)
+            record = {**record, **fields, 'updated_at': to_iso(time.time())}
+            self._append(record)
+        return record
+
+    def get(self, incident_id: str) -> Optional[Dict]:
+        with self._lock, self._file_lock(exclusive=False):
+            return self._load(incident_id)
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[int] = None,
+        min_severity: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Dict]:
+        """
+        Incidents matching every given filter (times in epoch seconds,
+        since inclusive, until exclusive), newest first.
+        """
+        with self._lock, self._file_lock(exclusive=False):
+            low = 0 if since is None else bisect.bisect_left(self._by_time, (since, ''))
+            high = len(self._by_time) if until is None else bisect.bisect_left(self._by_time, (until, ''))
+
+            # Start from the smallest candidate set the filters allow
+            candidates = None
+            if status is not None:
+                candidates = self._by_status.get(status, set())
+            if severity is not None:
+                matching = self._by_severity.get(severity, set())
+                candidates = matching if candidates is None or len(matching) < len(candidates) else candidates
+            elif min_severity is not None:
+                levels = [
+                    ids for level, ids in self._by_severity.items()
+                    if level is not None and level >= min_severity
+                ]
+                if candidates is None or sum(len(ids) for ids in levels) < len(candidates):
+                    candidates = set().union(*levels)
+
+            def matches(meta: IncidentMeta) -> bool:
+                return (
+                    (status is None or meta.status == status)
+                    and (severity is None or meta.severity == severity)
+                    and (min_severity is None or (meta.severity is not None and meta.severity >= min_severity))
+                    and (since is None or meta.created_at >= since)
+                    and (until is None or meta.created_at < until)
+                )
+
+            if candidates is not None and len(candidates) < high - low:
+                ids = sorted(
+                    (incident_id for incident_id in candidates if matches(self._meta[incident_id])),
+                    key=lambda incident_id: self._meta[incident_id].created_at,
+                    reverse=True
+                )[:limit]
+            else:
+                ids = []
+                for index in range(high - 1, low - 1, -1):
+                    if len(ids) >= limit:
+                        break
+                    incident_id = self._by_time[index][1]
+                    if matches(self._meta[incident_id]):
+                        ids.append(incident_id)
+            return [self._load(incident_id) for incident_id in ids]
+
+    def stats(self) -> Dict:
+        """Incident counts by status and severity, how many are cached, and the log's length in lines."""
+        with self._lock, self._file_lock(exclusive=False):
+            return {
+                "incidents": len(self._meta),
+                "cached": len(self._cache),
+                "log_lines": self._lines,
+                "by_status": {status: len(ids) for status, ids in self._by_status.items() if ids},
+                "by_severity": {
+                    str(severity): len(ids) for severity, ids in self._by_severity.items() if ids
+                }
+            }
+
+    def compact(self) -> None:
+        """Rewrite the log with only the latest line per incident."""
+        with self._lock, self._file_lock(exclusive=True):
+            self._compact()
+
+    def close(self) -> None:
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+        with self._lock:
+            self._log.close()
+            self._reader.close()
+            self._lock_file.close()
@@ -0,0 +1,170 @@
+# src/services/maps_cache.py
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from src.config.settings import (
+    MAPS_CACHE_PATH,
+    MAPS_CACHE_PRECISION,
+    MAPS_CACHE_MEMORY_ENTRIES,
+    MAPS_CACHE_TTLS,
+    MAPS_CACHE_NEGATIVE_TTL
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL = 3600
+
+
+class GeoCache:
+    """
+    Two-tier cache for Maps lookups: an in-memory LRU in front of SQLite.
+
+    Keys are the endpoint plus coordinates quantized to `precision` decimal
+    places (and the search radius, if any), so nearby repeat lookups share
+    an entry. Empty results are cached too, under a shorter negative TTL.
+    SQLite access has its own lock, so memory lookups (memory_only=True)
+    never wait on a disk read or commit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = MAPS_CACHE_PATH,
+        precision: int = MAPS_CACHE_PRECISION,
+        max_entries: int = MAPS_CACHE_MEMORY_ENTRIES,
+        ttls: Optional[Dict[str, int]] = None,
+        negative_ttl: int = MAPS_CACHE_NEGATIVE_TTL
+    ):
+        self.precision = precision
+        self.max_entries = max_entries
+        self.ttls = {**MAPS_CACHE_TTLS, **(ttls or {})}
+        self.negative_ttl = negative_ttl
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._db = None
+
+        if path is not None:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS maps_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Maps cache database unavailable, using memory only: {str(e)}")
+                self._db = None
+
+    def key(self, endpoint: str, location: Tuple[float, float], radius: Optional[int] = None) -> str:
+        lat = f"{round(location[0], self.precision):.{self.precision}f}"
+        lng = f"{round(location[1], self.precision):.{self.precision}f}"
+        return f"{endpoint}:{lat},{lng}:{radius if radius is not None else ''}"
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        counters = self._stats.setdefault(endpoint, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(
+        self,
+        endpoint: str,
+        location: Tuple[float, float],
+        radius: Optional[int] = None,
+        memory_only: bool = False
+    ) -> Tuple[bool, Any]:
+        """
+        Return (hit, value). value may be None on a hit for a cached empty
+        result. With memory_only, a memory miss returns (False, None)
+        without touching disk or counting a miss.
+        """
+        key = self.key(endpoint, location, radius)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._count(endpoint, "memory_hits")
+                    return True, entry[1]
+                del self._memory[key]
+            if memory_only:
+                return False, None
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM maps_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    logger.error(f"Error reading maps cache: {str(e)}")
+        with self._lock:
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                self._count(endpoint, "disk_hits")
+                return True, value
+            self._count(endpoint, "misses")
+            return False, None
+
+    def set(
+        self,
+        endpoint: str,
+        location: Tuple[float, float],
+        value: Any,
+        radius: Optional[int] = None
+    ) -> None:
+        """Store a lookup result; falsy results use the negative TTL."""
+        key = self.key(endpoint, location, radius)
+        ttl = self.ttls.get(endpoint, DEFAULT_TTL) if value else self.negative_ttl
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO maps_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), expires_at)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"Error writing maps cache: {str(e)}")
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from disk. Returns the number removed."""
+        if self._db is None:
+            return 0
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM maps_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict:
+        """Per-endpoint hit/miss counters and hit ratios."""
+        with self._lock:
+            result = {}
+            for endpoint, counters in self._stats.items():
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                total = hits + counters["misses"]
+                result[endpoint] = {**counters, "hit_ratio": hits / total if total else 0.0}
+            return result
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
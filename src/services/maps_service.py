@@ -1,85 +1,82 @@
-from typing import Dict, Tuple, List
-import googlemaps
-from datetime import datetime
+from typing import Dict, Tuple, List, Optional
+import asyncio
+import threading
 import os
 from dotenv import load_dotenv
 import logging
+from src.config.settings import GOOGLE_MAPS_BASE_URL
+from src.services.async_maps_service import AsyncMapsService
+from src.services.hospital_directory import HospitalDirectory
+from src.services.maps_cache import GeoCache
 
 logger = logging.getLogger(__name__)
 
 
 class MapsService:
-    def __init__(self):
+    """
+    Synchronous facade over AsyncMapsService. Calls are run on a private
+    background event loop so blocking callers share one connection pool.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[GeoCache] = None,
+        directory: Optional[HospitalDirectory] = None,
+        base_url: str = GOOGLE_MAPS_BASE_URL,
+        data_manager=None
+    ):
         # Load environment variables
         load_dotenv()
 
-        # Get API key
+        # Get API key (a stand-in base URL does not need one)
         self.api_key = os.getenv('GOOGLE_MAPS_API_KEY')
-        if not self.api_key:
-            logger.error("Google Maps API key not found in environment variables")
-            raise ValueError("Google Maps API key not configured")
 
         try:
-            self.gmaps = googlemaps.Client(key=self.api_key)
+            self.async_service = AsyncMapsService(
+                api_key=self.api_key,
+                base_url=base_url,
+                cache=cache,
+                directory=directory,
+                data_manager=data_manager
+            )
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="maps-service-loop",
+                daemon=True
+            )
+            self._thread.start()
             logger.info("Google Maps client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Google Maps client: {str(e)}")
             raise
 
-    def get_nearest_hospital(self, location: Tuple[float, float], radius: int = 5000) -> Dict:
-        """Find the nearest hospital within radius (meters)"""
-        try:
-            logger.debug(f"Searching for hospitals near {location}")
-
-            # Use places nearby search
-            places_result = self.gmaps.places_nearby(
-                location=location,
-                radius=radius,
-                keyword='hospital',
-                type='hospital'
-            )
-
-            logger.debug(f"Places API response: {places_result}")
+    @property
+    def cache(self) -> GeoCache:
+        return self.async_service.cache
 
-            if places_result and 'results' in places_result and places_result['results']:
-                hospitals = places_result['results']
-                # Sort by rating if available
-                sorted_hospitals = sorted(
-                    hospitals,
-                    key=lambda x: x.get('rating', 0),
-                    reverse=True
-                )
-                return sorted_hospitals[0]
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
 
-            logger.warning(f"No hospitals found near {location}")
-            return None
-
-        except Exception as e:
-            logger.error(f"Error in get_nearest_hospital: {str(e)}")
-            return None
+    def get_nearest_hospital(self, location: Tuple[float, float], radius: int = 5000) -> Dict:
+        """Find the nearest hospital within radius (meters)"""
+        return self._run(self.async_service.get_nearest_hospital(location, radius))
 
     def get_location_details(self, location: Tuple[float, float]) -> Dict:
         """Get detailed information about a location"""
-        try:
-            logger.debug(f"Getting location details for {location}")
-
-            # Get reverse geocoding results
-            reverse_geocode_result = self.gmaps.reverse_geocode(location)
-
-            logger.debug(f"Reverse geocode response: {reverse_geocode_result}")
-
-            if reverse_geocode_result:
-                address = reverse_geocode_result[0]
-                return {
-                    'formatted_address': address.get('formatted_address', 'Unknown'),
-                    'place_id': address.get('place_id', ''),
-                    'location_type': address.get('geometry', {}).get('location_type', ''),
-                    'components': address.get('address_components', [])
-                }
-
-            logger.warning(f"No location details found for {location}")
-            return None
-
-        except Exception as e:
-            logger.error(f"Error in get_location_details: {str(e)}")
-            return None
\ No newline at end of file
+        return self._run(self.async_service.get_location_details(location))
+
+    def get_distance_matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        mode: str = "driving",
+        departure_time: Optional[str] = None
+    ) -> Dict:
+        """Raw Distance Matrix response for origins x destinations; departure_time opts into traffic"""
+        return self._run(self.async_service.get_distance_matrix(origins, destinations, mode, departure_time))
+
+    def close(self) -> None:
+        """Close the connection pool and stop the background loop"""
+        self._run(self.async_service.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
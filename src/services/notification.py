@@ -1,13 +1,320 @@
 # src/services/notification.py
-from typing import Dict, List
+import asyncio
+import functools
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 import aiohttp
+from src.config.settings import (
+    NOTIFICATION_EMERGENCY_SERVICES_URL,
+    NOTIFICATION_HOSPITAL_URL,
+    NOTIFICATION_STATUS_URL,
+    NOTIFICATION_MAX_CONNECTIONS,
+    NOTIFICATION_CONCURRENCY,
+    NOTIFICATION_TIMEOUT_SECONDS,
+    NOTIFICATION_MAX_RETRIES,
+    NOTIFICATION_OUTBOX_ENABLED,
+    NOTIFICATION_OUTBOX_BATCH_SIZE,
+    NOTIFICATION_OUTBOX_POLL_SECONDS,
+    NOTIFICATION_DESTINATION_RATE,
+    NOTIFICATION_COALESCE_WINDOW_SECONDS
+)
+from src.services.notification_outbox import NotificationOutbox, OutboxMessage
+from src.utils.rate_limiter import TokenBucket
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-class NotificationService:
+CHANNELS = ("emergency_services", "hospital", "status")
+
+BACKOFF_BASE_SECONDS = 0.1
+BACKOFF_MAX_SECONDS = 2.0
+
+# Latency samples kept per channel for percentiles
+LATENCY_SAMPLES = 1024
+
+# Channels held in the outbox for the coalescing window before delivery;
+# emergency services are always told straight away. Without an outbox
+# nothing is coalesced
+COALESCED_CHANNELS = ("hospital", "status")
+
+
+def _coalesce_key(message: OutboxMessage) -> Tuple:
+    """Messages sharing a key supersede one another; only the newest is sent."""
+    payload = message.payload
+    if message.channel == "status" and payload.get("incident_id") is not None:
+        # A newer status for the same incident supersedes the older one
+        return ("incident", payload.get("recipient"), payload["incident_id"])
+    # Anything else is sent as is, even if an equal payload is also queued
+    return ("message", message.id)
+
+
+def coalesce(messages: List[OutboxMessage]) -> List[Tuple[Dict[str, Any], List[OutboxMessage]]]:
+    """
+    Collapse superseded status updates, oldest first; every other message
+    is kept. Returns (payload to send, messages it accounts for) pairs.
+    """
+    entries: Dict[Tuple, Tuple[Dict[str, Any], List[OutboxMessage]]] = {}
+    for message in sorted(messages, key=lambda message: message.id):
+        key = _coalesce_key(message)
+        covered = entries.pop(key, (None, []))[1]
+        covered.append(message)
+        # Re-inserted, so the survivor keeps the newest message's position
+        entries[key] = (message.payload, covered)
+    return list(entries.values())
+
+
+class ChannelMetrics:
+    """Delivery counters and recent latencies for one channel."""
+
     def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.logged = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> Dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "logged": self.logged,
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "max_ms": latencies[-1] * 1000 if latencies else None
+        }
+
+
+class NotificationService:
+    """
+    Delivers notifications as JSON webhooks on a shared aiohttp connection
+    pool. Fan-outs run concurrently under one semaphore, each delivery has
+    its own timeout, and transient failures (timeouts, connection errors,
+    HTTP 429/5xx) are retried with full-jitter backoff. A channel with no
+    URL configured falls back to logging the notification.
+
+    Without an outbox (the default) notifications are sent within the
+    call and not recorded anywhere, so a crash loses undelivered ones.
+    With an outbox (NOTIFICATION_OUTBOX_ENABLED), webhook
+    notifications are committed to it and the notify/send calls return
+    straight away; a background task delivers them as
+    {"notifications": [...]} batches, so receivers must accept that body
+    instead of a single notification, with one batch in flight per
+    destination, under a per-destination rate limit, with the outbox
+    handling retries and backoff. Hospital and status notifications wait
+    out a coalescing window first so bursts share batches; within a
+    destination's batch, a status update for an incident replaces the
+    older ones for the same recipient. Coalescing needs the outbox: direct
+    sends go out one by one as they are made. The outbox is committed separately
+    from the caller's own records (e.g. the incident log), not atomically.
+    Instances are bound to the event loop they are first used on.
+    """
+
+    def __init__(
+        self,
+        emergency_services_url: Optional[str] = NOTIFICATION_EMERGENCY_SERVICES_URL,
+        hospital_url: Optional[str] = NOTIFICATION_HOSPITAL_URL,
+        status_url: Optional[str] = NOTIFICATION_STATUS_URL,
+        max_connections: int = NOTIFICATION_MAX_CONNECTIONS,
+        concurrency: int = NOTIFICATION_CONCURRENCY,
+        timeout_seconds: float = NOTIFICATION_TIMEOUT_SECONDS,
+        max_retries: int = NOTIFICATION_MAX_RETRIES,
+        outbox: Optional[NotificationOutbox] = None,
+        use_outbox: bool = NOTIFICATION_OUTBOX_ENABLED,
+        batch_size: int = NOTIFICATION_OUTBOX_BATCH_SIZE,
+        destination_rate: float = NOTIFICATION_DESTINATION_RATE,
+        poll_seconds: float = NOTIFICATION_OUTBOX_POLL_SECONDS,
+        coalesce_window_seconds: float = NOTIFICATION_COALESCE_WINDOW_SECONDS
+    ):
         self.logger = logger
+        self.urls = {
+            "emergency_services": emergency_services_url,
+            "hospital": hospital_url,
+            "status": status_url,
+        }
+        self.max_connections = max_connections
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.metrics = {channel: ChannelMetrics() for channel in CHANNELS}
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.outbox = outbox if outbox is not None or not use_outbox else NotificationOutbox()
+        self.batch_size = batch_size
+        self.destination_rate = destination_rate
+        self.poll_seconds = poll_seconds
+        self.coalesce_window_seconds = coalesce_window_seconds
+        # Outbox messages delivered, and the payloads actually sent for them
+        self.coalesced_messages = 0
+        self.coalesced_payloads = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    def _url(self, channel: str, **fields) -> Optional[str]:
+        recipient = fields.get("recipient")
+        if channel == "status" and recipient and recipient.startswith(("http://", "https://")):
+            return recipient
+        template = self.urls[channel]
+        return template.format(**fields) if template else None
+
+    async def _backoff(self, attempt: int) -> None:
+        await asyncio.sleep(random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+    async def deliver(
+        self,
+        channel: str,
+        url: Optional[str],
+        payload: Dict,
+        max_retries: Optional[int] = None
+    ) -> bool:
+        """
+        POST payload to url, retrying transient failures. Returns True once
+        the receiver accepts it (or it was logged, with no url).
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        metrics = self.metrics[channel]
+        if url is None:
+            self.logger.info(f"[{channel}] {payload}")
+            metrics.logged += 1
+            return True
+
+        session = await self._get_session()
+        started = time.perf_counter()
+        async with self._semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    async with session.post(url, json=payload) as response:
+                        if response.status < 400:
+                            metrics.sent += 1
+                            metrics.latencies.append(time.perf_counter() - started)
+                            return True
+                        reason = f"HTTP {response.status}"
+                        retryable = response.status >= 500 or response.status == 429
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    reason = type(e).__name__
+                    retryable = True
+                if not retryable or attempt == max_retries:
+                    break
+                metrics.retries += 1
+                await self._backoff(attempt)
+
+        metrics.failed += 1
+        self.logger.error(f"Failed to deliver {channel} notification to {url}: {reason}")
+        return False
+
+    async def _outbox_call(self, method, *args):
+        # SQLite commits block, so they run off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args))
+
+    async def _send(self, channel: str, url: Optional[str], payload: Dict) -> bool:
+        """Queue a webhook notification in the outbox, or deliver it directly without one."""
+        if url is None or self.outbox is None:
+            return await self.deliver(channel, url, payload)
+        await self._outbox_call(self.outbox.enqueue, channel, url, payload, self._window(channel))
+        self.start()
+        return True
+
+    def _window(self, channel: str) -> float:
+        return self.coalesce_window_seconds if channel in COALESCED_CHANNELS else 0.0
+
+    def start(self) -> None:
+        """Start the outbox delivery task on the running loop, if not already running."""
+        if self.outbox is None or (self._worker is not None and not self._worker.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._run_outbox())
+
+    def _bucket(self, destination: str) -> TokenBucket:
+        if destination not in self._buckets:
+            self._buckets[destination] = TokenBucket(self.destination_rate)
+        return self._buckets[destination]
+
+    async def _run_outbox(self) -> None:
+        in_flight: Dict[str, asyncio.Task] = {}
+
+        def finished(destination: str):
+            in_flight.pop(destination, None)
+            self._wakeup.set()
+
+        while True:
+            self._wakeup.clear()
+            try:
+                messages = await self._outbox_call(self.outbox.claim, self.batch_size * 4, list(in_flight))
+            except Exception as e:
+                self.logger.error(f"Error reading notification outbox: {str(e)}")
+                messages = []
+
+            by_destination: Dict[str, List[OutboxMessage]] = {}
+            for message in messages:
+                by_destination.setdefault(message.destination, []).append(message)
+            for destination, group in by_destination.items():
+                task = asyncio.create_task(self._deliver_outbox(destination, group))
+                in_flight[destination] = task
+                task.add_done_callback(lambda _, destination=destination: finished(destination))
+
+            if not messages:
+                try:
+                    due_in = await self._outbox_call(self.outbox.next_due_in)
+                except Exception as e:
+                    self.logger.error(f"Error reading notification outbox: {str(e)}")
+                    due_in = None
+                timeout = self.poll_seconds if due_in is None else min(due_in, self.poll_seconds)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _deliver_outbox(self, destination: str, messages: List[OutboxMessage]) -> None:
+        """Deliver one destination's claimed messages in coalesced, rate-limited batches."""
+        by_channel: Dict[str, List[OutboxMessage]] = {}
+        for message in messages:
+            by_channel.setdefault(message.channel, []).append(message)
+        for channel, channel_messages in by_channel.items():
+            entries = coalesce(channel_messages)
+            for start in range(0, len(entries), self.batch_size):
+                batch = entries[start:start + self.batch_size]
+                covered = [message for _, messages in batch for message in messages]
+                # Count re-attempted rows as retries, matching the direct path
+                self.metrics[channel].retries += sum(1 for message in covered if message.attempts > 0)
+                await self._bucket(destination).acquire()
+                try:
+                    # The outbox retries with backoff, so one attempt per pass
+                    delivered = await self.deliver(
+                        channel,
+                        destination,
+                        {"notifications": [payload for payload, _ in batch]},
+                        max_retries=0
+                    )
+                    if delivered:
+                        await self._outbox_call(self.outbox.complete, [message.id for message in covered])
+                        self.coalesced_messages += len(covered)
+                        self.coalesced_payloads += len(batch)
+                    else:
+                        await self._outbox_call(self.outbox.fail, covered, "delivery failed")
+                except Exception as e:
+                    self.logger.error(f"Error delivering outbox batch to {destination}: {str(e)}")
 
     async def notify_emergency_services(
         self,
@@ -18,12 +325,14 @@ class NotificationService:
         Notify emergency services about a new incident.
         """
         try:
-            # Implementation for emergency services notification
-            # This could be an API call, webhook, etc.
             self.logger.info(
                 f"Notifying emergency services about incident {incident_id}"
             )
-            return True
+            return await self._send(
+                "emergency_services",
+                self._url("emergency_services", incident_id=incident_id),
+                {"incident_id": incident_id, "details": details}
+            )
         except Exception as e:
             self.logger.error(
                 f"Failed to notify emergency services: {str(e)}"
@@ -39,11 +348,14 @@ class NotificationService:
         Notify hospital about incoming patient.
         """
         try:
-            # Implementation for hospital notification
             self.logger.info(
                 f"Notifying hospital {hospital_id} about incoming patient"
             )
-            return True
+            return await self._send(
+                "hospital",
+                self._url("hospital", hospital_id=hospital_id),
+                {"hospital_id": hospital_id, "patient": patient_details}
+            )
         except Exception as e:
             self.logger.error(
                 f"Failed to notify hospital: {str(e)}"
@@ -53,21 +365,75 @@ class NotificationService:
     async def send_status_update(
         self,
         recipients: List[str],
-        message: str
+        message: str,
+        incident_id: Optional[str] = None
     ) -> Dict[str, bool]:
         """
-        Send status updates to list of recipients.
+        Send status updates to list of recipients, concurrently.
+        An update about incident_id supersedes that recipient's earlier
+        ones still waiting to be delivered.
         Returns dict of recipient and success status.
         """
-        results = {}
-        for recipient in recipients:
+        recipients = list(dict.fromkeys(recipients))
+        payload = {"message": message}
+        if incident_id is not None:
+            payload["incident_id"] = incident_id
+        queued = [
+            (recipient, url) for recipient, url in
+            ((recipient, self._url("status", recipient=recipient)) for recipient in recipients)
+            if url is not None and self.outbox is not None
+        ]
+        if queued:
+            # One outbox transaction for the whole fan-out
+            await self._outbox_call(
+                self.outbox.enqueue_many,
+                [("status", url, {"recipient": recipient, **payload}) for recipient, url in queued],
+                self._window("status")
+            )
+            self.start()
+        queued_recipients = {recipient for recipient, _ in queued}
+
+        async def send(recipient: str) -> bool:
+            if recipient in queued_recipients:
+                return True
             try:
-                # Implementation for sending updates
-                # This could be SMS, email, push notification, etc.
-                results[recipient] = True
+                return await self.deliver(
+                    "status",
+                    self._url("status", recipient=recipient),
+                    {"recipient": recipient, **payload}
+                )
             except Exception as e:
                 self.logger.error(
                     f"Failed to send update to {recipient}: {str(e)}"
                 )
-                results[recipient] = False
-        return results
\ No newline at end of file
+                return False
+
+        results = await asyncio.gather(*(send(recipient) for recipient in recipients))
+        return dict(zip(recipients, results))
+
+    def stats(self) -> Dict:
+        """
+        Per-channel delivery counters and latency percentiles, plus the
+        outbox backlog and coalescing ratio (messages per payload sent).
+        """
+        stats = {channel: metrics.snapshot() for channel, metrics in self.metrics.items()}
+        if self.outbox is not None:
+            stats["outbox"] = self.outbox.stats()
+            stats["coalescing"] = {
+                "messages": self.coalesced_messages,
+                "payloads": self.coalesced_payloads,
+                "ratio": self.coalesced_messages / self.coalesced_payloads if self.coalesced_payloads else None
+            }
+        return stats
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,164 @@
+# src/services/notification_outbox.py
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+from src.config.settings import NOTIFICATION_OUTBOX_PATH, NOTIFICATION_OUTBOX_MAX_ATTEMPTS
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 300.0
+# How long a claimed message is reserved for the worker delivering it
+LEASE_SECONDS = 60.0
+
+
+class OutboxMessage(NamedTuple):
+    id: int
+    channel: str
+    destination: str
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: float
+
+
+class NotificationOutbox:
+    """
+    Durable queue of outgoing notifications in SQLite (WAL mode).
+
+    enqueue() returns once the message is committed, so a notification
+    survives a crash between the incident being accepted and the receiver
+    being told. A delivery worker claims due messages under a lease (an
+    expired lease makes them claimable again, so delivery is at-least-once),
+    then completes them or reschedules them with exponential backoff until
+    max_attempts, after which they are kept as dead letters.
+
+    A message enqueued with a delay waits out a coalescing window, but is
+    claimed early alongside any due message for the same destination, so
+    the first message of a burst opens the window for the rest.
+    """
+
+    def __init__(
+        self,
+        path: Path = NOTIFICATION_OUTBOX_PATH,
+        max_attempts: int = NOTIFICATION_OUTBOX_MAX_ATTEMPTS
+    ):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, destination TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, leased_until REAL NOT NULL DEFAULT 0, "
+            "dead INTEGER NOT NULL DEFAULT 0, last_error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (dead, next_attempt_at)")
+        self._db.commit()
+
+    def enqueue(self, channel: str, destination: str, payload: Dict, delay: float = 0.0) -> int:
+        """Commit one notification for delivery after delay seconds. Returns its id."""
+        return self.enqueue_many([(channel, destination, payload)], delay)[0]
+
+    def enqueue_many(self, messages: Iterable[Sequence], delay: float = 0.0) -> List[int]:
+        """Commit (channel, destination, payload) notifications in one transaction."""
+        now = time.time()
+        with self._lock:
+            ids = [
+                self._db.execute(
+                    "INSERT INTO outbox (channel, destination, payload, created_at, next_attempt_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (channel, destination, json.dumps(payload), now, now + delay)
+                ).lastrowid
+                for channel, destination, payload in messages
+            ]
+            self._db.commit()
+        return ids
+
+    def claim(self, limit: int, exclude_destinations: Iterable[str] = ()) -> List[OutboxMessage]:
+        """
+        Lease up to limit due messages, oldest first, skipping destinations
+        that already have a batch in flight. Undelivered messages still in
+        their coalescing window come along with their destination's due ones.
+        """
+        now = time.time()
+        exclude = list(exclude_destinations)
+        placeholders = ",".join("?" * len(exclude))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, channel, destination, payload, attempts, created_at FROM outbox "
+                "WHERE dead = 0 AND leased_until <= ? "
+                f"AND destination NOT IN ({placeholders}) "
+                "AND (next_attempt_at <= ? OR (attempts = 0 AND destination IN ("
+                "SELECT destination FROM outbox WHERE dead = 0 AND next_attempt_at <= ? AND leased_until <= ?"
+                "))) ORDER BY id LIMIT ?",
+                (now, *exclude, now, now, now, limit)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE outbox SET leased_until = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, row[0]) for row in rows]
+            )
+            self._db.commit()
+        return [
+            OutboxMessage(id, channel, destination, json.loads(payload), attempts, created_at)
+            for id, channel, destination, payload, attempts, created_at in rows
+        ]
+
+    def complete(self, ids: Sequence[int]) -> None:
+        """Remove delivered messages."""
+        with self._lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(id,) for id in ids])
+            self._db.commit()
+
+    def fail(self, messages: Sequence[OutboxMessage], error: str) -> None:
+        """Reschedule failed messages with backoff, or retire them as dead letters."""
+        now = time.time()
+        updates = []
+        for message in messages:
+            attempts = message.attempts + 1
+            delay = random.uniform(0.5, 1.0) * min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts)
+            dead = attempts >= self.max_attempts
+            if dead:
+                logger.error(f"Giving up on {message.channel} notification {message.id} after {attempts} attempts")
+            updates.append((attempts, now + delay, int(dead), error, message.id))
+        with self._lock:
+            self._db.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, leased_until = 0, dead = ?, last_error = ? "
+                "WHERE id = ?",
+                updates
+            )
+            self._db.commit()
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next pending message is due (0 if overdue), or None if empty."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(MAX(next_attempt_at, leased_until)) FROM outbox WHERE dead = 0"
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def stats(self) -> Dict:
+        """Pending and dead-letter counts, and the age of the oldest pending message."""
+        with self._lock:
+            pending, oldest = self._db.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE dead = 0"
+            ).fetchone()
+            dead = self._db.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+        return {
+            "pending": pending,
+            "dead": dead,
+            "oldest_pending_seconds": time.time() - oldest if oldest is not None else None
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
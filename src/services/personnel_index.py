@@ -0,0 +1,131 @@
+# src/services/personnel_index.py
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Facet -> path of the record field it indexes; certifications is a list
+FACET_PATHS = {
+    'certification': ('certifications',),
+    'specialization': ('specialization',),
+    'type': ('type',),
+    'hospital': ('location', 'hospital_id'),
+    'status': ('status',),
+}
+
+
+def _lookup(record: Dict, path: Tuple[str, ...]):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+def _rows(bits: int) -> Iterable[int]:
+    """Row numbers of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class PersonnelIndex:
+    """
+    Inverted index from certification, specialization, type, hospital and
+    status to the set of personnel holding them, each stored as a bitset
+    (a Python int with one bit per person). A conjunctive query is a
+    chain of bitwise ANDs; only the matching rows are ever decoded.
+
+    Status is the one mutable facet: set_status() moves a person between
+    status bitsets when DataManager applies an update.
+    """
+
+    def __init__(self, records: Iterable[Dict], id_field: str = 'id'):
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {facet: {} for facet in FACET_PATHS}
+        for row, record in enumerate(records):
+            record_id = record[id_field]
+            self._ids.append(record_id)
+            self._rows[record_id] = row
+            bit = 1 << row
+            for facet, path in FACET_PATHS.items():
+                values = _lookup(record, path)
+                if not isinstance(values, list):
+                    values = [values]
+                postings = self._postings[facet]
+                for value in values:
+                    if isinstance(value, str):
+                        postings[value] = postings.get(value, 0) | bit
+        self._all = (1 << len(self._ids)) - 1
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def values(self, facet: str) -> List[str]:
+        """Distinct values indexed for a facet, e.g. every certification."""
+        return sorted(self._postings[facet])
+
+    def bits(self, facet: str, value: str) -> int:
+        """Bitset of the personnel with value in facet (0 if none)."""
+        return self._postings[facet].get(value, 0)
+
+    def set_status(self, person_id: str, old: Optional[str], new: Optional[str]) -> None:
+        """Move a person between status bitsets. Caller serializes writers."""
+        row = self._rows.get(person_id)
+        if row is None:
+            return
+        bit = 1 << row
+        postings = self._postings['status']
+        if old is not None and old in postings:
+            postings[old] &= ~bit
+        if new is not None:
+            postings[new] = postings.get(new, 0) | bit
+
+    def match(
+        self,
+        certifications: Sequence[str] = (),
+        specialization: Optional[str] = None,
+        staff_type: Optional[str] = None,
+        hospital_id: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> int:
+        """Bitset of the personnel meeting every given criterion."""
+        criteria = [('certification', name) for name in certifications]
+        criteria += [
+            (facet, value)
+            for facet, value in (
+                ('specialization', specialization),
+                ('type', staff_type),
+                ('hospital', hospital_id),
+                ('status', status)
+            )
+            if value is not None
+        ]
+        # Intersect the rarest postings first so the running set shrinks fastest
+        postings = sorted(
+            (self.bits(facet, value) for facet, value in criteria),
+            key=lambda bits: bin(bits).count("1")
+        )
+        bits = self._all
+        for posting in postings:
+            bits &= posting
+            if not bits:
+                break
+        return bits
+
+    def ids(self, bits: int) -> List[str]:
+        """Personnel ids for a bitset returned by match()."""
+        return [self._ids[row] for row in _rows(bits)]
+
+    def query(self, **criteria) -> List[str]:
+        """Ids of the personnel meeting every criterion (see match)."""
+        return self.ids(self.match(**criteria))
+
+    def query_by_hospital(self, **criteria) -> Dict[str, List[str]]:
+        """Matching personnel grouped by hospital, omitting hospitals without matches."""
+        bits = self.match(**criteria)
+        grouped = {}
+        for hospital_id, hospital_bits in self._postings['hospital'].items():
+            matched = bits & hospital_bits
+            if matched:
+                grouped[hospital_id] = self.ids(matched)
+        return grouped
@@ -0,0 +1,89 @@
+# src/services/shift_index.py
+import math
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+from src.utils.timestamps import to_epoch
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (start path, end path) of the shift interval in each dataset's records
+SHIFT_FIELDS = {
+    'ambulances': (('current_shift_start',), ('current_shift_end',)),
+    'personnel': (('shift', 'start'), ('shift', 'end')),
+}
+
+
+def _lookup(record: Dict, path: Sequence[str]):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+class ShiftIndex:
+    """
+    Sorted-boundary index over [start, end) shift intervals, in epoch
+    seconds. One array of rows is sorted by shift start and another by
+    shift end (latest first); a query bisects both and filters only the
+    shorter of the two candidate runs, so no timestamp is parsed and no
+    unrelated row is visited per query.
+    """
+
+    def __init__(self, ids: Sequence[str], starts: np.ndarray, ends: np.ndarray):
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        # Rows without a usable shift are never on duty
+        valid = np.flatnonzero(~np.isnan(starts) & ~np.isnan(ends))
+        self._ids = np.asarray(ids, dtype=object)[valid]
+        self._starts = starts[valid]
+        self._ends = ends[valid]
+        self._by_start = np.argsort(self._starts, kind='stable')
+        self._sorted_starts = self._starts[self._by_start]
+        self._by_end = np.argsort(-self._ends, kind='stable')
+        self._sorted_neg_ends = -self._ends[self._by_end]
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], id_field: str, start_path, end_path) -> 'ShiftIndex':
+        """Build from records, parsing each shift boundary once."""
+        ids, starts, ends = [], [], []
+        for record in records:
+            ids.append(record[id_field])
+            starts.append(cls.parse(_lookup(record, start_path)))
+            ends.append(cls.parse(_lookup(record, end_path)))
+        return cls(ids, np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64))
+
+    @staticmethod
+    def parse(value) -> float:
+        """Epoch seconds of a shift boundary, NaN if missing or unparseable."""
+        if value is None:
+            return math.nan
+        try:
+            return to_epoch(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring unparseable shift time {value!r}")
+            return math.nan
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def on_shift(self, at: float, min_remaining: float = 0.0) -> List[str]:
+        """
+        Ids on shift at epoch time at (start <= at < end) whose shift lasts
+        at least min_remaining more seconds.
+        """
+        until = at + min_remaining
+        started = int(np.searchsorted(self._sorted_starts, at, side='right'))
+        # "At least N more seconds" includes a shift ending exactly at until;
+        # plain on-duty excludes one ending at at
+        side = 'right' if min_remaining > 0 else 'left'
+        lasting = int(np.searchsorted(self._sorted_neg_ends, -until, side=side))
+        if started <= lasting:
+            rows = self._by_start[:started]
+            ends = self._ends[rows]
+            rows = rows[ends >= until] if min_remaining > 0 else rows[ends > until]
+        else:
+            rows = self._by_end[:lasting]
+            rows = rows[self._starts[rows] <= at]
+        return self._ids[rows].tolist()
@@ -0,0 +1,257 @@
+# src/services/spatial_index.py
+import heapq
+import math
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from src.config.settings import SPATIAL_INDEX_CELL_KM
+from src.services.geolocation import haversine_distances
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Shortest length of one degree of latitude on the WGS-84 ellipsoid
+KM_PER_DEGREE_MIN = 110.57
+
+Cell = Tuple[int, int]
+Predicate = Optional[Callable[[Hashable], bool]]
+
+
+class SpatialIndex:
+    """
+    Grid-bucket index over located entities (ambulances, hospitals, ...).
+
+    Entities are hashed into fixed-size latitude/longitude cells, so insert,
+    remove and move are O(1) and queries only touch the cells that can hold
+    an answer instead of every entity.
+    """
+
+    def __init__(self, cell_size_km: float = SPATIAL_INDEX_CELL_KM):
+        if cell_size_km <= 0:
+            raise ValueError("cell_size_km must be positive")
+        self.cell_size_km = cell_size_km
+        self._step = cell_size_km / KM_PER_DEGREE_MIN
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    @classmethod
+    def from_resources(
+            cls,
+            resources: Iterable[Dict],
+            id_field: str,
+            cell_size_km: float = SPATIAL_INDEX_CELL_KM
+    ) -> "SpatialIndex":
+        """Build an index from resources carrying an id and a `location` dict."""
+        index = cls(cell_size_km)
+        for resource in resources:
+            location = resource['location']
+            index.insert(resource[id_field], location['lat'], location['lng'])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, entity_id: Hashable) -> bool:
+        return entity_id in self._positions
+
+    def position(self, entity_id: Hashable) -> Optional[Tuple[float, float]]:
+        """Return the indexed (lat, lng) of an entity, if present."""
+        return self._positions.get(entity_id)
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return math.floor(lat / self._step), math.floor(lng / self._step)
+
+    def insert(self, entity_id: Hashable, lat: float, lng: float) -> None:
+        """Insert an entity, replacing its previous position if already indexed."""
+        if entity_id in self._positions:
+            self.move(entity_id, lat, lng)
+            return
+        self._positions[entity_id] = (lat, lng)
+        self._cells.setdefault(self._cell(lat, lng), set()).add(entity_id)
+
+    def remove(self, entity_id: Hashable) -> bool:
+        """Remove an entity. Returns False if it was not indexed."""
+        position = self._positions.pop(entity_id, None)
+        if position is None:
+            return False
+        cell = self._cell(*position)
+        bucket = self._cells[cell]
+        bucket.discard(entity_id)
+        if not bucket:
+            del self._cells[cell]
+        return True
+
+    def move(self, entity_id: Hashable, lat: float, lng: float) -> None:
+        """Update an entity's position, re-bucketing only if its cell changed."""
+        old_position = self._positions.get(entity_id)
+        if old_position is None:
+            self.insert(entity_id, lat, lng)
+            return
+
+        old_cell = self._cell(*old_position)
+        new_cell = self._cell(lat, lng)
+        self._positions[entity_id] = (lat, lng)
+        if old_cell != new_cell:
+            bucket = self._cells[old_cell]
+            bucket.discard(entity_id)
+            if not bucket:
+                del self._cells[old_cell]
+            self._cells.setdefault(new_cell, set()).add(entity_id)
+
+    def _measure(
+            self,
+            lat: float,
+            lng: float,
+            entity_ids: List[Hashable]
+    ) -> np.ndarray:
+        positions = self._positions
+        lats = np.fromiter((positions[e][0] for e in entity_ids), dtype=np.float64, count=len(entity_ids))
+        lngs = np.fromiter((positions[e][1] for e in entity_ids), dtype=np.float64, count=len(entity_ids))
+        return haversine_distances((lat, lng), lats, lngs)
+
+    def _lng_span(self, lat: float, radius_km: float) -> int:
+        """Number of cells to scan east/west to cover radius_km at this latitude."""
+        lat_extent = min(abs(lat) + radius_km / KM_PER_DEGREE_MIN, 89.9)
+        km_per_degree = 111.32 * math.cos(math.radians(lat_extent))
+        return math.ceil(radius_km / km_per_degree / self._step)
+
+    def within(
+            self,
+            lat: float,
+            lng: float,
+            radius_km: float,
+            predicate: Predicate = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Return (entity_id, distance_km) pairs within radius_km, nearest first.
+        Only entities accepted by the optional predicate are considered.
+        """
+        try:
+            center_row, center_col = self._cell(lat, lng)
+            row_span = math.ceil(radius_km / KM_PER_DEGREE_MIN / self._step)
+            col_span = self._lng_span(lat, radius_km)
+
+            candidates: List[Hashable] = []
+            if (2 * row_span + 1) * (2 * col_span + 1) > len(self._cells):
+                # Sparse grid: cheaper to walk occupied cells than the box
+                for (row, col), bucket in self._cells.items():
+                    if abs(row - center_row) <= row_span and abs(col - center_col) <= col_span:
+                        candidates.extend(bucket)
+            else:
+                for row in range(center_row - row_span, center_row + row_span + 1):
+                    for col in range(center_col - col_span, center_col + col_span + 1):
+                        bucket = self._cells.get((row, col))
+                        if bucket:
+                            candidates.extend(bucket)
+
+            if predicate is not None:
+                candidates = [entity_id for entity_id in candidates if predicate(entity_id)]
+            if not candidates:
+                return []
+
+            distances = self._measure(lat, lng, candidates)
+            hits = np.flatnonzero(distances <= radius_km)
+            hits = hits[np.argsort(distances[hits], kind='stable')]
+            return [(candidates[i], float(distances[i])) for i in hits]
+
+        except Exception as e:
+            logger.error(f"Error in radius query: {str(e)}")
+            raise
+
+    def nearest(
+            self,
+            lat: float,
+            lng: float,
+            k: int = 1,
+            max_distance: Optional[float] = None,
+            predicate: Predicate = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Return up to k (entity_id, distance_km) pairs, nearest first, among
+        entities accepted by the optional predicate.
+        Scans rings of cells outward and stops once no unvisited cell can
+        hold anything closer than the current k-th candidate.
+        """
+        try:
+            if k <= 0 or not self._positions:
+                return []
+            if max_distance is not None:
+                return self.within(lat, lng, max_distance, predicate)[:k]
+
+            center_row, center_col = self._cell(lat, lng)
+
+            best: List[Tuple[float, int, Hashable]] = []  # max-heap via negation
+            counter = 0
+            visited = 0
+            ring = 0
+            while visited < len(self._positions):
+                if (2 * ring + 1) ** 2 > 4 * len(self._cells):
+                    # Rings have outgrown the occupied grid; finish with a scan
+                    return self._scan_nearest(lat, lng, k, predicate)
+
+                ring_members: List[Hashable] = []
+                for row, col in self._ring_cells(center_row, center_col, ring):
+                    bucket = self._cells.get((row, col))
+                    if bucket:
+                        ring_members.extend(bucket)
+                visited += len(ring_members)
+
+                if predicate is not None:
+                    ring_members = [entity_id for entity_id in ring_members if predicate(entity_id)]
+                if ring_members:
+                    distances = self._measure(lat, lng, ring_members)
+                    for entity_id, distance in zip(ring_members, distances.tolist()):
+                        counter += 1
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, counter, entity_id))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, counter, entity_id))
+
+                # Anything beyond this ring is at least `ring` full cells away
+                if len(best) == k and -best[0][0] <= self._ring_bound_km(lat, ring):
+                    break
+                ring += 1
+
+            return [(entity_id, -neg) for neg, _, entity_id in sorted(best, reverse=True)]
+
+        except Exception as e:
+            logger.error(f"Error in nearest query: {str(e)}")
+            raise
+
+    def _scan_nearest(
+            self,
+            lat: float,
+            lng: float,
+            k: int,
+            predicate: Predicate = None
+    ) -> List[Tuple[Hashable, float]]:
+        entity_ids = list(self._positions)
+        if predicate is not None:
+            entity_ids = [entity_id for entity_id in entity_ids if predicate(entity_id)]
+        if not entity_ids:
+            return []
+        distances = self._measure(lat, lng, entity_ids)
+        if k < len(entity_ids):
+            selected = np.argpartition(distances, k - 1)[:k]
+        else:
+            selected = np.arange(len(entity_ids))
+        selected = selected[np.argsort(distances[selected], kind='stable')]
+        return [(entity_ids[i], float(distances[i])) for i in selected]
+
+    def _ring_bound_km(self, lat: float, ring: int) -> float:
+        """Lower bound on the distance to any cell outside the given ring."""
+        degrees = ring * self._step
+        lat_extent = min(abs(lat) + degrees, 89.9)
+        km_per_degree = min(KM_PER_DEGREE_MIN, 111.32 * math.cos(math.radians(lat_extent)))
+        return degrees * km_per_degree
+
+    @staticmethod
+    def _ring_cells(center_row: int, center_col: int, ring: int) -> Iterable[Cell]:
+        if ring == 0:
+            yield center_row, center_col
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield center_row - ring, col
+            yield center_row + ring, col
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield row, center_col - ring
+            yield row, center_col + ring
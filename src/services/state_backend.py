@@ -0,0 +1,407 @@
+# src/services/state_backend.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+from src.config.settings import (
+    STATE_BACKEND,
+    STATE_DB_PATH,
+    STATE_BUSY_TIMEOUT_MS,
+    STATE_CHANGE_RETENTION_SECONDS
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Top-level record fields that change at runtime; everything else is reference data
+MUTABLE_FIELDS = {
+    'ambulances': ('status', 'location'),
+    'hospitals': ('emergency_department', 'resources'),
+    'personnel': ('status',),
+}
+
+# Pseudo-field carrying a record's version in load() and changes_since()
+VERSION_FIELD = '_version'
+
+# (dataset, record_id, field, value)
+Change = Tuple[str, str, str, Any]
+
+# (dataset, record_id) -> version after a write
+Versions = Dict[Tuple[str, str], int]
+
+
+class VersionConflict(Exception):
+    """Raised when a compare-and-set update names a version that is no longer current."""
+
+    def __init__(self, dataset: str, record_id: str, expected: int, current: int):
+        super().__init__(f"{dataset} {record_id} is at version {current}, not {expected}")
+        self.dataset = dataset
+        self.record_id = record_id
+        self.expected = expected
+        self.current = current
+
+
+def merge_field(current: Any, patch: Any) -> Any:
+    """Value of a field after a partial update: dicts are merged one level deep."""
+    if isinstance(current, dict) and isinstance(patch, dict):
+        return {**current, **patch}
+    return patch
+
+
+def adjust_beds(field_value: Optional[Dict], bed_type: str, count: int) -> Optional[Dict]:
+    """
+    New value of a hospital bed field after reserving (count > 0) or
+    releasing (count < 0) beds, or None if that would over- or underflow.
+    """
+    if not isinstance(field_value, dict):
+        return None
+    if bed_type == 'emergency':
+        occupancy = field_value.get('current_occupancy', 0) + count
+        if occupancy < 0 or occupancy > field_value.get('capacity', 0):
+            return None
+        return {**field_value, 'current_occupancy': occupancy}
+    if bed_type == 'icu':
+        available = field_value.get('available_icu_beds', 0) - count
+        if available < 0:
+            return None
+        return {**field_value, 'available_icu_beds': available}
+    raise ValueError(f"Unknown bed type {bed_type!r}")
+
+
+BED_FIELDS = {
+    'emergency': 'emergency_department',
+    'icu': 'resources',
+}
+
+
+class StateBackend(ABC):
+    """
+    Store for the mutable fields of resource records, shared by every
+    DataManager (and worker process) that uses it. Reference data still
+    comes from the data files; the backend is authoritative for the
+    fields in MUTABLE_FIELDS once they have been changed at runtime.
+
+    Every write bumps the version of each record it touches; load() and
+    changes_since() report versions as VERSION_FIELD changes.
+    """
+
+    @abstractmethod
+    def seed(self, records: Dict[str, Iterable[Dict]]) -> None:
+        """Record reference values for fields that were never changed at runtime."""
+
+    @abstractmethod
+    def load(self) -> Tuple[int, List[Change]]:
+        """Return the current change sequence and every runtime-changed field."""
+
+    @abstractmethod
+    def changes_since(self, seq: int) -> Optional[Tuple[int, List[Change]]]:
+        """
+        Changes made by other DataManagers after seq, and the new sequence.
+        None if the log no longer reaches back to seq (call load() instead).
+        """
+
+    @abstractmethod
+    def set_fields(self, changes: Sequence[Change]) -> Versions:
+        """Write a batch of field values in one transaction. Returns the new versions."""
+
+    @abstractmethod
+    def update_records(
+        self,
+        updates: Sequence[Tuple[str, str, Dict[str, Any], Optional[int]]]
+    ) -> List[Tuple[bool, int, Dict[str, Any]]]:
+        """
+        Apply (dataset, record_id, patch, expected_version) updates in one
+        transaction, each merged into the stored fields with merge_field.
+        An update whose expected_version is set and not current is skipped.
+        Returns (applied, version, new field values) per update.
+        """
+
+    @abstractmethod
+    def update_field(
+        self,
+        dataset: str,
+        record_id: str,
+        field: str,
+        update: Callable[[Any], Optional[Any]]
+    ) -> Optional[Tuple[Any, int]]:
+        """
+        Atomically replace a field with update(current). If update returns
+        None nothing is written. Returns the new value and version, or None.
+        """
+
+    @abstractmethod
+    def compare_and_set(
+        self,
+        dataset: str,
+        candidates: Sequence[str],
+        field: str,
+        expected: Any,
+        value: Any
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Set field to value on the first candidate whose field equals
+        expected, atomically. Returns that record id and its version, or None.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    StateBackend on a SQLite database in WAL mode, safe to share between
+    processes. Readers never block writers; writes take the database lock
+    with BEGIN IMMEDIATE, so claims and bed reservations are atomic across
+    workers. Every write is also appended to a change log that other
+    workers poll to refresh their in-memory records.
+    """
+
+    def __init__(
+        self,
+        path: Path = STATE_DB_PATH,
+        busy_timeout_ms: int = STATE_BUSY_TIMEOUT_MS,
+        change_retention_seconds: float = STATE_CHANGE_RETENTION_SECONDS
+    ):
+        self.path = Path(path)
+        self.change_retention_seconds = change_retention_seconds
+        self.origin = f"{os.getpid()}-{uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly below
+        self._db = sqlite3.connect(
+            str(self.path),
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        self._db.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        # Durable at checkpoints; a power loss can only drop the last commits
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resource_state ("
+            "dataset TEXT NOT NULL, record_id TEXT NOT NULL, field TEXT NOT NULL, "
+            "value TEXT NOT NULL, seq INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (dataset, record_id, field)) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS state_changes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, created_at REAL NOT NULL, "
+            "dataset TEXT NOT NULL, record_id TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        if 'version' not in {row[1] for row in self._db.execute("PRAGMA table_info(state_changes)")}:
+            # Databases created before records were versioned
+            self._db.execute("ALTER TABLE state_changes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS record_versions ("
+            "dataset TEXT NOT NULL, record_id TEXT NOT NULL, version INTEGER NOT NULL, "
+            "PRIMARY KEY (dataset, record_id)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS state_changes_created ON state_changes (created_at)")
+
+    def _transaction(self, mode: str = "IMMEDIATE"):
+        db = self._db
+
+        class Transaction:
+            def __enter__(self):
+                db.execute(f"BEGIN {mode}")
+                return db
+
+            def __exit__(self, exc_type, exc, tb):
+                db.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return Transaction()
+
+    def _version(self, db: sqlite3.Connection, dataset: str, record_id: str) -> int:
+        row = db.execute(
+            "SELECT version FROM record_versions WHERE dataset = ? AND record_id = ?",
+            (dataset, record_id)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _log(self, db: sqlite3.Connection, changes: Sequence[Tuple[str, str, str, str]]) -> Versions:
+        """
+        Write encoded changes to the state table and the change log, bumping
+        each touched record's version once. Caller is in a transaction.
+        """
+        now = time.time()
+        versions: Versions = {}
+        for dataset, record_id, _, _ in changes:
+            key = (dataset, record_id)
+            if key not in versions:
+                versions[key] = self._version(db, dataset, record_id) + 1
+        db.executemany(
+            "INSERT INTO record_versions (dataset, record_id, version) VALUES (?, ?, ?) "
+            "ON CONFLICT (dataset, record_id) DO UPDATE SET version = excluded.version",
+            [(dataset, record_id, version) for (dataset, record_id), version in versions.items()]
+        )
+        for dataset, record_id, field, value in changes:
+            cursor = db.execute(
+                "INSERT INTO state_changes (origin, created_at, dataset, record_id, field, value, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.origin, now, dataset, record_id, field, value, versions[(dataset, record_id)])
+            )
+            db.execute(
+                "INSERT INTO resource_state (dataset, record_id, field, value, seq) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (dataset, record_id, field) DO UPDATE SET value = excluded.value, seq = excluded.seq",
+                (dataset, record_id, field, value, cursor.lastrowid)
+            )
+        return versions
+
+    def seed(self, records: Dict[str, Iterable[Dict]]) -> None:
+        rows = [
+            (dataset, record[id_field], field, json.dumps(record[field]))
+            for dataset, id_field in (('ambulances', 'ambulance_id'), ('hospitals', 'hospital_id'), ('personnel', 'id'))
+            for record in records.get(dataset, ())
+            for field in MUTABLE_FIELDS[dataset]
+            if field in record
+        ]
+        with self._lock, self._transaction() as db:
+            # Reference values only replace fields nobody has changed at runtime (seq 0)
+            db.executemany(
+                "INSERT INTO resource_state (dataset, record_id, field, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (dataset, record_id, field) DO UPDATE SET value = excluded.value "
+                "WHERE resource_state.seq = 0",
+                rows
+            )
+
+    def _current_seq(self, db: sqlite3.Connection) -> int:
+        row = db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'state_changes'").fetchone()
+        return row[0] if row else 0
+
+    def load(self) -> Tuple[int, List[Change]]:
+        with self._lock, self._transaction("DEFERRED") as db:
+            seq = self._current_seq(db)
+            rows = db.execute(
+                "SELECT dataset, record_id, field, value FROM resource_state WHERE seq > 0"
+            ).fetchall()
+            versions = db.execute("SELECT dataset, record_id, version FROM record_versions").fetchall()
+        changes = [(dataset, record_id, field, json.loads(value)) for dataset, record_id, field, value in rows]
+        changes.extend((dataset, record_id, VERSION_FIELD, version) for dataset, record_id, version in versions)
+        return seq, changes
+
+    def changes_since(self, seq: int) -> Optional[Tuple[int, List[Change]]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, origin, dataset, record_id, field, value, version FROM state_changes "
+                "WHERE seq > ? ORDER BY seq",
+                (seq,)
+            ).fetchall()
+            if rows and rows[0][0] > seq + 1:
+                oldest = self._db.execute("SELECT MIN(seq) FROM state_changes").fetchone()[0]
+                if oldest > seq + 1:
+                    # Entries after seq were pruned
+                    return None
+        if not rows:
+            return seq, []
+        changes = []
+        for _, origin, dataset, record_id, field, value, version in rows:
+            if origin != self.origin:
+                changes.append((dataset, record_id, field, json.loads(value)))
+                changes.append((dataset, record_id, VERSION_FIELD, version))
+        return rows[-1][0], changes
+
+    def set_fields(self, changes: Sequence[Change]) -> Versions:
+        encoded = [(dataset, record_id, field, json.dumps(value)) for dataset, record_id, field, value in changes]
+        with self._lock, self._transaction() as db:
+            return self._log(db, encoded)
+
+    def update_records(
+        self,
+        updates: Sequence[Tuple[str, str, Dict[str, Any], Optional[int]]]
+    ) -> List[Tuple[bool, int, Dict[str, Any]]]:
+        results = []
+        with self._lock, self._transaction() as db:
+            for dataset, record_id, patch, expected_version in updates:
+                version = self._version(db, dataset, record_id)
+                if expected_version is not None and expected_version != version:
+                    results.append((False, version, {}))
+                    continue
+                values = {}
+                for field, value in patch.items():
+                    row = db.execute(
+                        "SELECT value FROM resource_state WHERE dataset = ? AND record_id = ? AND field = ?",
+                        (dataset, record_id, field)
+                    ).fetchone()
+                    values[field] = merge_field(json.loads(row[0]) if row else None, value)
+                versions = self._log(db, [
+                    (dataset, record_id, field, json.dumps(value)) for field, value in values.items()
+                ])
+                results.append((True, versions.get((dataset, record_id), version), values))
+        return results
+
+    def update_field(
+        self,
+        dataset: str,
+        record_id: str,
+        field: str,
+        update: Callable[[Any], Optional[Any]]
+    ) -> Optional[Tuple[Any, int]]:
+        with self._lock, self._transaction() as db:
+            row = db.execute(
+                "SELECT value FROM resource_state WHERE dataset = ? AND record_id = ? AND field = ?",
+                (dataset, record_id, field)
+            ).fetchone()
+            if row is None:
+                return None
+            value = update(json.loads(row[0]))
+            if value is None:
+                return None
+            versions = self._log(db, [(dataset, record_id, field, json.dumps(value))])
+            return value, versions[(dataset, record_id)]
+
+    def compare_and_set(
+        self,
+        dataset: str,
+        candidates: Sequence[str],
+        field: str,
+        expected: Any,
+        value: Any
+    ) -> Optional[Tuple[str, int]]:
+        expected_json, value_json = json.dumps(expected), json.dumps(value)
+        with self._lock, self._transaction() as db:
+            for record_id in candidates:
+                row = db.execute(
+                    "SELECT value FROM resource_state WHERE dataset = ? AND record_id = ? AND field = ?",
+                    (dataset, record_id, field)
+                ).fetchone()
+                if row is not None and row[0] == expected_json:
+                    versions = self._log(db, [(dataset, record_id, field, value_json)])
+                    return record_id, versions[(dataset, record_id)]
+        return None
+
+    def prune_changes(self) -> int:
+        """Drop change-log entries older than the retention window."""
+        cutoff = time.time() - self.change_retention_seconds
+        with self._lock, self._transaction() as db:
+            # Always keep the newest entry so sequence gaps stay detectable
+            return db.execute(
+                "DELETE FROM state_changes WHERE created_at < ? AND seq < (SELECT MAX(seq) FROM state_changes)",
+                (cutoff,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+STATE_BACKENDS = {
+    'sqlite': SQLiteStateBackend,
+}
+
+
+def create_state_backend(name: str = STATE_BACKEND) -> Optional[StateBackend]:
+    """Backend configured by STATE_BACKEND; None keeps state in process memory."""
+    if name == 'memory':
+        return None
+    if name not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state backend {name!r}, expected 'memory' or one of {sorted(STATE_BACKENDS)}")
+    return STATE_BACKENDS[name]()
@@ -0,0 +1,380 @@
+# src/services/travel_time.py
+import argparse
+import gzip
+import heapq
+import json
+import math
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.config.settings import DATA_DIR, ROAD_GRAPH_PATH, ETA_TABLE_PATH, ETA_GRID_CELL_KM
+from src.services.geolocation import haversine_distances
+from src.services.spatial_index import SpatialIndex, KM_PER_DEGREE_MIN
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Free-flow speeds (km/h) for OSM highway classes without a usable maxspeed
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 100, "motorway_link": 60,
+    "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40,
+    "secondary": 50, "secondary_link": 35,
+    "tertiary": 40, "tertiary_link": 30,
+    "unclassified": 30, "residential": 25,
+    "living_street": 10, "service": 15,
+}
+
+# Speed assumed between an arbitrary point and the nearest road node
+ACCESS_SPEED_KMH = 20.0
+
+ETA_TABLE_VERSION = 1
+
+
+def _parse_maxspeed(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(mph)?", value)
+    if not match:
+        return None
+    speed = float(match.group(1))
+    return speed * 1.609344 if match.group(2) else speed
+
+
+class RoadGraph:
+    """
+    Directed road graph in compressed sparse row form.
+    Edge weights are free-flow travel times in seconds.
+    """
+
+    def __init__(
+        self,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray
+    ):
+        self.lats = lats
+        self.lngs = lngs
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._node_index: Optional[SpatialIndex] = None
+        self._adjacency: Optional[Tuple[List[int], List[int], List[float]]] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lats)
+
+    @classmethod
+    def from_edges(
+        cls,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray
+    ) -> "RoadGraph":
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(len(lats) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(lats)), out=indptr[1:])
+        return cls(
+            lats,
+            lngs,
+            indptr,
+            targets[order].astype(np.int32),
+            weights[order].astype(np.float32)
+        )
+
+    @classmethod
+    def from_osm(cls, path: Path) -> "RoadGraph":
+        """
+        Load drivable ways from an OSM XML extract (.osm or .osm.gz).
+        """
+        opener = gzip.open if str(path).endswith('.gz') else open
+        node_coords: Dict[str, Tuple[float, float]] = {}
+        ways: List[Tuple[List[str], float, int]] = []
+
+        try:
+            with opener(path, 'rb') as f:
+                for _, element in ET.iterparse(f, events=('end',)):
+                    if element.tag == 'node':
+                        node_coords[element.get('id')] = (
+                            float(element.get('lat')),
+                            float(element.get('lon'))
+                        )
+                        element.clear()
+                    elif element.tag == 'way':
+                        tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+                        highway = tags.get('highway')
+                        if highway in HIGHWAY_SPEEDS_KMH:
+                            speed = _parse_maxspeed(tags.get('maxspeed')) or HIGHWAY_SPEEDS_KMH[highway]
+                            oneway = tags.get('oneway', '')
+                            if oneway in ('yes', 'true', '1') or tags.get('junction') == 'roundabout':
+                                direction = 1
+                            elif oneway == '-1':
+                                direction = -1
+                            else:
+                                direction = 0
+                            refs = [nd.get('ref') for nd in element.iter('nd')]
+                            ways.append((refs, speed, direction))
+                        element.clear()
+        except Exception as e:
+            logger.error(f"Error reading road graph {path}: {str(e)}")
+            raise
+
+        node_ids: Dict[str, int] = {}
+        sources: List[int] = []
+        targets: List[int] = []
+        speeds: List[float] = []
+
+        for refs, speed, direction in ways:
+            refs = [ref for ref in refs if ref in node_coords]
+            for a, b in zip(refs, refs[1:]):
+                u = node_ids.setdefault(a, len(node_ids))
+                v = node_ids.setdefault(b, len(node_ids))
+                if direction >= 0:
+                    sources.append(u)
+                    targets.append(v)
+                    speeds.append(speed)
+                if direction <= 0:
+                    sources.append(v)
+                    targets.append(u)
+                    speeds.append(speed)
+
+        lats = np.empty(len(node_ids), dtype=np.float64)
+        lngs = np.empty(len(node_ids), dtype=np.float64)
+        for ref, i in node_ids.items():
+            lats[i], lngs[i] = node_coords[ref]
+
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        lengths_km = haversine_distances(
+            (lats[sources], lngs[sources]),
+            lats[targets],
+            lngs[targets]
+        )
+        seconds = lengths_km / np.asarray(speeds, dtype=np.float64) * 3600.0
+
+        logger.info(f"Loaded road graph with {len(node_ids)} nodes and {len(sources)} edges")
+        return cls.from_edges(lats, lngs, sources, targets, seconds)
+
+    def reversed(self) -> "RoadGraph":
+        """Return the graph with every edge direction flipped."""
+        sources = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        graph = RoadGraph.from_edges(self.lats, self.lngs, self.indices.astype(np.int64), sources, self.weights)
+        graph._node_index = self._node_index
+        return graph
+
+    def snap(self, location: Tuple[float, float]) -> Tuple[int, float]:
+        """Return (node, distance_km) of the road node nearest to location."""
+        if self._node_index is None:
+            index = SpatialIndex()
+            for node in range(self.node_count):
+                index.insert(node, float(self.lats[node]), float(self.lngs[node]))
+            self._node_index = index
+        node, distance = self._node_index.nearest(location[0], location[1], k=1)[0]
+        return node, distance
+
+    def shortest_times(self, source: int, target: Optional[int] = None) -> np.ndarray:
+        """
+        Dijkstra from source. Returns seconds to every node (inf if
+        unreachable); stops early once target is settled.
+        """
+        times = [math.inf] * self.node_count
+        times[source] = 0.0
+        if self._adjacency is None:
+            # Plain lists index much faster than NumPy scalars in this loop
+            self._adjacency = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        indptr, indices, weights = self._adjacency
+        heap = [(0.0, source)]
+        while heap:
+            elapsed, node = heapq.heappop(heap)
+            if elapsed > times[node]:
+                continue
+            if node == target:
+                break
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                candidate = elapsed + weights[edge]
+                if candidate < times[neighbour]:
+                    times[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return np.asarray(times)
+
+
+class TravelTimeEngine:
+    """
+    Offline road travel-time engine.
+
+    precompute() runs one reverse Dijkstra per destination (e.g. hospital)
+    and folds the results into a grid-cell -> destination ETA table, so
+    eta() is a constant-time array lookup. Tables can be saved and loaded
+    without the road graph.
+    """
+
+    def __init__(self, graph: Optional[RoadGraph] = None, cell_size_km: float = ETA_GRID_CELL_KM):
+        self.graph = graph
+        self.cell_size_km = cell_size_km
+        self._destination_ids: List[str] = []
+        self._destination_slots: Dict[str, int] = {}
+        self._table: Optional[np.ndarray] = None  # (destinations, rows, cols) seconds
+        self._origin = (0.0, 0.0)
+        self._steps = (1.0, 1.0)
+
+    @classmethod
+    def from_osm(cls, path: Path, cell_size_km: float = ETA_GRID_CELL_KM) -> "TravelTimeEngine":
+        return cls(RoadGraph.from_osm(path), cell_size_km)
+
+    @property
+    def destinations(self) -> List[str]:
+        return list(self._destination_ids)
+
+    def precompute(self, destinations: Dict[str, Tuple[float, float]]) -> None:
+        """Build the grid ETA table for the given destination coordinates."""
+        if self.graph is None:
+            raise ValueError("A road graph is required to precompute ETA tables")
+
+        graph = self.graph
+        lat_min, lat_max = float(graph.lats.min()), float(graph.lats.max())
+        lng_min, lng_max = float(graph.lngs.min()), float(graph.lngs.max())
+        mid_lat = math.radians((lat_min + lat_max) / 2)
+        lat_step = self.cell_size_km / KM_PER_DEGREE_MIN
+        lng_step = self.cell_size_km / (111.32 * math.cos(mid_lat))
+        rows = int((lat_max - lat_min) / lat_step) + 1
+        cols = int((lng_max - lng_min) / lng_step) + 1
+
+        # Snap every cell centre to the road network once
+        cell_nodes = np.empty(rows * cols, dtype=np.int64)
+        access_seconds = np.empty(rows * cols, dtype=np.float64)
+        for cell in range(rows * cols):
+            row, col = divmod(cell, cols)
+            center = (lat_min + (row + 0.5) * lat_step, lng_min + (col + 0.5) * lng_step)
+            node, distance = graph.snap(center)
+            cell_nodes[cell] = node
+            access_seconds[cell] = distance / ACCESS_SPEED_KMH * 3600.0
+
+        reverse = graph.reversed()
+        table = np.empty((len(destinations), rows, cols), dtype=np.float32)
+        for slot, (destination_id, location) in enumerate(destinations.items()):
+            node, distance = graph.snap(location)
+            to_destination = reverse.shortest_times(node) + distance / ACCESS_SPEED_KMH * 3600.0
+            table[slot] = (to_destination[cell_nodes] + access_seconds).reshape(rows, cols)
+
+        self._destination_ids = list(destinations)
+        self._destination_slots = {d: i for i, d in enumerate(self._destination_ids)}
+        self._table = table
+        self._origin = (lat_min, lng_min)
+        self._steps = (lat_step, lng_step)
+        logger.info(f"Precomputed ETA table: {len(destinations)} destinations x {rows}x{cols} cells")
+
+    def _cell(self, location: Tuple[float, float]) -> Optional[Tuple[int, int]]:
+        if self._table is None:
+            return None
+        row = int((location[0] - self._origin[0]) // self._steps[0])
+        col = int((location[1] - self._origin[1]) // self._steps[1])
+        _, rows, cols = self._table.shape
+        if 0 <= row < rows and 0 <= col < cols:
+            return row, col
+        return None
+
+    def eta(self, origin: Tuple[float, float], destination_id: str) -> Optional[float]:
+        """
+        Estimated seconds from origin to a precomputed destination, or None
+        if the destination is unknown, origin is off-grid or unreachable.
+        """
+        slot = self._destination_slots.get(destination_id)
+        cell = self._cell(origin)
+        if slot is None or cell is None:
+            return None
+        seconds = float(self._table[slot, cell[0], cell[1]])
+        return seconds if math.isfinite(seconds) else None
+
+    def etas(self, origin: Tuple[float, float]) -> Dict[str, float]:
+        """Estimated seconds from origin to every reachable destination."""
+        cell = self._cell(origin)
+        if cell is None:
+            return {}
+        column = self._table[:, cell[0], cell[1]].tolist()
+        return {
+            destination_id: seconds
+            for destination_id, seconds in zip(self._destination_ids, column)
+            if math.isfinite(seconds)
+        }
+
+    def route_time(self, origin: Tuple[float, float], destination: Tuple[float, float]) -> Optional[float]:
+        """On-demand point-to-point travel time in seconds over the road graph."""
+        if self.graph is None:
+            return None
+        source, source_km = self.graph.snap(origin)
+        target, target_km = self.graph.snap(destination)
+        seconds = float(self.graph.shortest_times(source, target)[target])
+        if not math.isfinite(seconds):
+            return None
+        return seconds + (source_km + target_km) / ACCESS_SPEED_KMH * 3600.0
+
+    def save(self, path: Path) -> None:
+        """Persist the ETA table (without the graph)."""
+        if self._table is None:
+            raise ValueError("No ETA table to save; call precompute() first")
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                version=ETA_TABLE_VERSION,
+                table=self._table,
+                origin=np.array(self._origin),
+                steps=np.array(self._steps),
+                cell_size_km=self.cell_size_km,
+                destinations=np.array(json.dumps(self._destination_ids))
+            )
+
+    @classmethod
+    def load(cls, path: Path, graph: Optional[RoadGraph] = None) -> "TravelTimeEngine":
+        """Load a table written by save()."""
+        with np.load(path) as data:
+            if int(data['version']) != ETA_TABLE_VERSION:
+                raise ValueError(f"Unsupported ETA table version: {int(data['version'])}")
+            engine = cls(graph, float(data['cell_size_km']))
+            engine._table = data['table']
+            engine._origin = tuple(data['origin'].tolist())
+            engine._steps = tuple(data['steps'].tolist())
+            engine._destination_ids = json.loads(str(data['destinations']))
+        engine._destination_slots = {d: i for i, d in enumerate(engine._destination_ids)}
+        return engine
+
+
+def load_travel_time_engine(path: Path = ETA_TABLE_PATH) -> Optional[TravelTimeEngine]:
+    """Load the configured ETA table, or None if it has not been built."""
+    if not Path(path).exists():
+        return None
+    try:
+        return TravelTimeEngine.load(path)
+    except Exception as e:
+        logger.error(f"Error loading ETA table {path}: {str(e)}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute hospital ETA tables from an OSM extract")
+    parser.add_argument("--graph", type=Path, default=ROAD_GRAPH_PATH)
+    parser.add_argument("--output", type=Path, default=ETA_TABLE_PATH)
+    parser.add_argument("--cell-size-km", type=float, default=ETA_GRID_CELL_KM)
+    args = parser.parse_args()
+
+    with open(DATA_DIR / "hospitals.json", 'r') as f:
+        hospitals = json.load(f).get('hospitals', [])
+
+    engine = TravelTimeEngine.from_osm(args.graph, args.cell_size_km)
+    engine.precompute({
+        hospital['hospital_id']: (hospital['location']['lat'], hospital['location']['lng'])
+        for hospital in hospitals
+    })
+    engine.save(args.output)
+    print(f"ETA table written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
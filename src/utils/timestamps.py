@@ -0,0 +1,26 @@
+# src/utils/timestamps.py
+from datetime import datetime, timezone
+from typing import Union
+
+Timestamp = Union[str, int, float, datetime]
+
+
+def to_epoch(value: Timestamp) -> float:
+    """
+    Convert an ISO-8601 string (e.g. "2024-02-20T10:30:00Z"), datetime or
+    epoch number to epoch seconds. Naive values are treated as UTC.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def to_iso(epoch: float) -> str:
+    """Format epoch seconds the way the datasets store timestamps."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,181 @@
+# tests/benchmark_memory_layout.py
+"""
+Memory and scan-time comparison of the DataManager layouts.
+
+Builds synthetic regional datasets, then measures the memory retained by
+the parsed-JSON dict layout and by the columnar layout, plus parse+build
+time, the median time of an "available" status scan (which materializes
+dicts on the columnar side), a nearest-unit distance scan over all
+coordinates, and a by-id lookup on each.
+
+    python tests/benchmark_memory_layout.py --sizes 10000 100000
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.services.columnar import ColumnarSnapshot
+from src.services.data_manager import DataSnapshot
+from src.services.geolocation import coordinate_arrays, haversine_distances
+from src.utils.timestamps import to_iso
+
+STATUSES = ["available", "responding", "at_scene", "transporting", "maintenance"]
+PERSONNEL_STATUSES = ["on_duty", "off_duty", "on_call"]
+VEHICLE_TYPES = ["Type I", "Type II", "Type III"]
+EQUIPMENT = ["defibrillator", "ventilator", "cardiac_monitor", "oxygen", "stretcher", "suction_unit"]
+SPECIALTIES = ["trauma_center_level_1", "cardiac_care", "stroke_center", "burn_unit", "pediatric_emergency"]
+CERTIFICATIONS = ["ACLS", "ATLS", "PALS", "BLS", "NRP", "PHTLS"]
+STAFF_TYPES = ["emergency_physician", "nurse", "paramedic", "surgeon"]
+SPECIALIZATIONS = ["trauma", "cardiology", "neurology", "pediatrics", "general"]
+
+
+def synthetic_datasets(units: int, seed: int = 7) -> Dict[str, List[Dict]]:
+    """Ambulances and staff at the given scale, with one hospital per 50 units."""
+    rng = random.Random(seed)
+    base = 1708416000
+
+    def shift():
+        start = base + rng.randrange(0, 24) * 3600
+        return to_iso(start), to_iso(start + 12 * 3600)
+
+    ambulances = []
+    for i in range(units):
+        start, end = shift()
+        ambulances.append({
+            "ambulance_id": f"AMB-{i:06d}",
+            "vehicle_type": rng.choice(VEHICLE_TYPES),
+            "location": {
+                "lat": 40.5 + rng.random() * 0.5,
+                "lng": -74.3 + rng.random() * 0.6,
+                "last_updated": to_iso(base + rng.randrange(0, 86400))
+            },
+            "status": rng.choice(STATUSES),
+            "crew": {"paramedic": rng.randint(1, 2), "emt": rng.randint(0, 2)},
+            "equipment": {name: rng.random() < 0.7 for name in EQUIPMENT},
+            "current_shift_start": start,
+            "current_shift_end": end
+        })
+
+    hospitals = []
+    for i in range(max(1, units // 50)):
+        capacity = rng.randint(20, 120)
+        hospitals.append({
+            "hospital_id": f"HOSP-{i:05d}",
+            "name": f"Regional Hospital {i}",
+            "location": {
+                "lat": 40.5 + rng.random() * 0.5,
+                "lng": -74.3 + rng.random() * 0.6,
+                "address": f"{rng.randint(1, 999)} Main Street, New York, NY"
+            },
+            "emergency_department": {
+                "capacity": capacity,
+                "current_occupancy": rng.randint(0, capacity),
+                "wait_time_minutes": rng.randint(5, 120)
+            },
+            "specialties": [s for s in SPECIALTIES if rng.random() < 0.4],
+            "resources": {
+                "available_icu_beds": rng.randint(0, 20),
+                "available_operating_rooms": rng.randint(0, 6),
+                "available_ventilators": rng.randint(0, 15)
+            },
+            "helicopter_pad": rng.random() < 0.3
+        })
+
+    personnel = []
+    for i in range(units):
+        start, end = shift()
+        personnel.append({
+            "id": f"MD-{i:06d}",
+            "type": rng.choice(STAFF_TYPES),
+            "specialization": rng.choice(SPECIALIZATIONS),
+            "status": rng.choice(PERSONNEL_STATUSES),
+            "location": {"hospital_id": rng.choice(hospitals)["hospital_id"], "department": "emergency"},
+            "shift": {"start": start, "end": end},
+            "certifications": [c for c in CERTIFICATIONS if rng.random() < 0.5]
+        })
+
+    return {"ambulances": ambulances, "hospitals": hospitals, "personnel": personnel}
+
+
+def build(layout, payload: str):
+    parsed = json.loads(payload)
+    return layout(parsed["ambulances"], parsed["hospitals"], parsed["personnel"])
+
+
+def measure(layout, payload: str, repeats: int = 5) -> Dict:
+    """Report what a snapshot built from the JSON payload retains, and how fast it is."""
+    gc.collect()
+    tracemalloc.start()
+    snapshot = build(layout, payload)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del snapshot
+    gc.collect()
+
+    started = time.perf_counter()
+    snapshot = build(layout, payload)
+    build_seconds = time.perf_counter() - started
+
+    scans = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        snapshot.by_status("ambulances", "available")
+        scans.append(time.perf_counter() - started)
+
+    # Coordinate scan feeding the vectorized distance kernel
+    started = time.perf_counter()
+    if isinstance(snapshot, ColumnarSnapshot):
+        table = snapshot.tables["ambulances"]
+        lats, lngs = table.column(("location", "lat")), table.column(("location", "lng"))
+    else:
+        lats, lngs = coordinate_arrays(snapshot.records("ambulances"))
+    haversine_distances((40.7128, -74.0060), lats, lngs).argmin()
+    coords_seconds = time.perf_counter() - started
+
+    ids = [f"AMB-{i:06d}" for i in range(1000)]
+    started = time.perf_counter()
+    for ambulance_id in ids:
+        snapshot.get("ambulances", ambulance_id)
+    lookup_us = (time.perf_counter() - started) / len(ids) * 1e6
+
+    return {
+        "retained_mb": retained / 2 ** 20,
+        "build_s": build_seconds,
+        "scan_ms": sorted(scans)[len(scans) // 2] * 1000,
+        "coords_ms": coords_seconds * 1000,
+        "lookup_us": lookup_us
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and columnar DataManager layouts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(
+        f"{'units':>8} {'layout':>9} {'retained MB':>12} {'build s':>8}"
+        f" {'scan ms':>8} {'nearest ms':>10} {'get us':>7}"
+    )
+    for units in args.sizes:
+        payload = json.dumps(synthetic_datasets(units))
+        for name, layout in (("dict", DataSnapshot), ("columnar", ColumnarSnapshot)):
+            result = measure(layout, payload)
+            print(
+                f"{units:>8} {name:>9} {result['retained_mb']:>12.1f} {result['build_s']:>8.2f}"
+                f" {result['scan_ms']:>8.1f} {result['coords_ms']:>10.1f} {result['lookup_us']:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
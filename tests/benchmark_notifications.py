@@ -0,0 +1,213 @@
+# tests/benchmark_notifications.py
+"""
+Notification delivery throughput and latency against the local webhook sink.
+
+Starts tests/webhook_sink.py in a child process on localhost, drives
+NotificationService.notify_hospital at an open-loop rate (0 = all at
+once) across a number of hospital endpoints, and reports per mode:
+
+    direct   each notification POSTed by the caller, with in-call retries
+    outbox   notifications committed to a temporary outbox and delivered
+             in batches by the background worker
+
+Latency is end to end, from the notify call to the sink receiving it.
+In-flight is the peak number of undelivered notifications (pending
+tasks for direct, pending outbox rows for outbox); memory is the growth
+in peak RSS, or the traced Python heap peak with --tracemalloc.
+Retries count re-sent notifications: in-call retries for direct,
+re-attempted outbox rows for outbox.
+
+    python tests/benchmark_notifications.py --count 5000 --rate 2000
+    python tests/benchmark_notifications.py --latency-ms 20 --error-rate 0.05 --modes direct
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict
+
+import aiohttp
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.services.notification import NotificationService
+from src.services.notification_outbox import NotificationOutbox
+from tests.webhook_sink import run as run_sink
+
+SAMPLE_INTERVAL_SECONDS = 0.02
+
+
+async def sink_request(session: aiohttp.ClientSession, base_url: str, method: str, path: str) -> Dict:
+    async with session.request(method, base_url + path) as response:
+        return await response.json()
+
+
+async def wait_for_sink(base_url: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                await sink_request(session, base_url, "GET", "/_sink/stats")
+                return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise SystemExit(f"Webhook sink did not start at {base_url}")
+                await asyncio.sleep(0.05)
+
+
+async def run_mode(mode: str, args, base_url: str, session: aiohttp.ClientSession) -> Dict:
+    await sink_request(session, base_url, "POST", "/_sink/reset")
+    outbox_dir = tempfile.TemporaryDirectory()
+    outbox = NotificationOutbox(Path(outbox_dir.name) / "outbox.sqlite3") if mode == "outbox" else None
+    service = NotificationService(
+        hospital_url=base_url + "/hospital/{hospital_id}",
+        concurrency=args.concurrency,
+        max_connections=args.concurrency,
+        outbox=outbox,
+        use_outbox=mode == "outbox",
+        batch_size=args.batch_size,
+        destination_rate=args.destination_rate,
+        coalesce_window_seconds=args.coalesce_window,
+        poll_seconds=0.05
+    )
+    service.start()
+
+    tasks = set()
+    peak_in_flight = 0
+    done = asyncio.Event()
+
+    def in_flight() -> int:
+        return outbox.stats()["pending"] if outbox is not None else len(tasks)
+
+    async def sample():
+        nonlocal peak_in_flight
+        while not done.is_set():
+            peak_in_flight = max(peak_in_flight, in_flight())
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sampler = asyncio.create_task(sample())
+    started = time.time()
+    clock = time.monotonic()
+
+    for i in range(args.count):
+        if args.rate:
+            delay = clock + i / args.rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        task = asyncio.create_task(service.notify_hospital(
+            f"H{i % args.destinations:04d}",
+            {"seq": i, "sent_at": time.time()}
+        ))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        if not args.rate and i % 1000 == 999:
+            # Let the loop breathe during an unpaced burst
+            await asyncio.sleep(0)
+
+    while tasks:
+        await asyncio.gather(*tasks)
+    if outbox is not None:
+        deadline = time.monotonic() + args.timeout
+        while outbox.stats()["pending"] and time.monotonic() < deadline:
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    done.set()
+    await sampler
+    peak_in_flight = max(peak_in_flight, in_flight())
+    memory_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    if args.tracemalloc:
+        memory_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    received = await sink_request(session, base_url, "GET", "/_sink/stats")
+    metrics = service.stats()["hospital"]
+    await service.close()
+    if outbox is not None:
+        outbox.close()
+    outbox_dir.cleanup()
+
+    elapsed = (received["last_at"] or time.time()) - started
+    return {
+        "mode": mode,
+        "delivered": received["notifications"],
+        "requests": received["requests"],
+        "throughput": received["notifications"] / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": received["latency_p50_ms"],
+        "p99_ms": received["latency_p99_ms"],
+        "retries": metrics["retries"],
+        "failed": metrics["failed"],
+        "peak_in_flight": peak_in_flight,
+        "memory_mb": memory_mb
+    }
+
+
+def format_ms(value) -> str:
+    return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+
+async def run(args) -> None:
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_for_sink(base_url)
+    memory_label = "heap MB" if args.tracemalloc else "RSS+ MB"
+    print(
+        f"{'mode':>7} {'delivered':>9} {'requests':>8} {'notif/s':>9} {'p50 ms':>8} {'p99 ms':>8}"
+        f" {'retries':>7} {'failed':>6} {'in-flight':>9} {memory_label:>8}"
+    )
+    async with aiohttp.ClientSession() as session:
+        for mode in args.modes:
+            result = await run_mode(mode, args, base_url, session)
+            print(
+                f"{result['mode']:>7} {result['delivered']:>9} {result['requests']:>8}"
+                f" {result['throughput']:>9.0f} {format_ms(result['p50_ms'])} {format_ms(result['p99_ms'])}"
+                f" {result['retries']:>7} {result['failed']:>6} {result['peak_in_flight']:>9}"
+                f" {result['memory_mb']:>8.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notification delivery against a local webhook sink")
+    parser.add_argument("--modes", nargs="+", choices=["direct", "outbox"], default=["direct", "outbox"])
+    parser.add_argument("--count", type=int, default=5000, help="Notifications per mode")
+    parser.add_argument("--rate", type=float, default=0.0, help="Notifications per second (0 = all at once)")
+    parser.add_argument("--destinations", type=int, default=20, help="Distinct hospital endpoints")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--destination-rate", type=float, default=1000.0, help="Outbox batches/s per endpoint")
+    parser.add_argument("--coalesce-window", type=float, default=0.0, help="Outbox coalescing window (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the outbox to drain")
+    parser.add_argument("--tracemalloc", action="store_true", help="Report traced heap peak instead of RSS growth")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Sink response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of sink HTTP 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of sink HTTP 429 responses")
+    args = parser.parse_args()
+
+    # Per-notification log lines would dominate the measurement
+    logging.disable(logging.INFO)
+    sink = multiprocessing.Process(
+        target=run_sink,
+        args=("127.0.0.1", args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, 0),
+        daemon=True
+    )
+    sink.start()
+    try:
+        asyncio.run(run(args))
+    finally:
+        sink.terminate()
+        sink.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# tests/benchmark_snapshot_load.py
+"""
+Worker start-up cost: JSON datasets vs the compiled memory-mapped snapshot.
+
+For each size, writes synthetic JSON datasets to a temporary directory,
+compiles them with src.services.binary_snapshot, then times loading each
+way and reports the private (Python heap) memory each load retains.
+Mapped snapshot pages are file-backed and shared between workers, so
+they do not show up in the heap figure.
+
+    python tests/benchmark_snapshot_load.py --sizes 10000 100000
+"""
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.services.binary_snapshot import compile_snapshot, load_snapshot
+from src.services.columnar import ColumnarSnapshot
+from src.services.data_manager import DATA_FILES, DataSnapshot
+from tests.benchmark_memory_layout import synthetic_datasets
+
+
+def load_json(data_dir: Path, layout) -> object:
+    records = {}
+    for dataset, filename in DATA_FILES.items():
+        with open(data_dir / filename, 'r') as f:
+            records[dataset] = json.load(f).get(dataset, [])
+    return layout(records['ambulances'], records['hospitals'], records['personnel'])
+
+
+def measure(load: Callable[[], object], repeats: int = 3) -> Dict:
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        snapshot = load()
+        timings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        snapshot.get("ambulances", "AMB-000042")
+        first_get = time.perf_counter() - started
+        del snapshot
+
+    gc.collect()
+    tracemalloc.start()
+    snapshot = load()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "load_ms": min(timings) * 1000,
+        "first_get_us": first_get * 1e6,
+        "heap_mb": retained / 2 ** 20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and mmap snapshot start-up")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'units':>8} {'source':>16} {'load ms':>9} {'first get us':>13} {'heap MB':>8}")
+    for units in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            datasets = synthetic_datasets(units)
+            for dataset, filename in DATA_FILES.items():
+                with open(data_dir / filename, 'w') as f:
+                    json.dump({dataset: datasets[dataset]}, f)
+            snapshot_path = data_dir / "reference_data.snap"
+            compile_snapshot(snapshot_path, data_dir)
+            del datasets
+
+            sources = (
+                ("json (dict)", lambda: load_json(data_dir, DataSnapshot)),
+                ("json (columnar)", lambda: load_json(data_dir, ColumnarSnapshot)),
+                ("mmap snapshot", lambda: load_snapshot(snapshot_path)),
+            )
+            for name, load in sources:
+                result = measure(load)
+                print(
+                    f"{units:>8} {name:>16} {result['load_ms']:>9.1f}"
+                    f" {result['first_get_us']:>13.1f} {result['heap_mb']:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
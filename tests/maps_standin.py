@@ -0,0 +1,175 @@
+# tests/maps_standin.py
+"""
+Record/replay stand-in for the Google Maps web services.
+
+record: proxies requests to the real API and writes each response to a
+        fixture file (the API key is never stored).
+replay: serves recorded fixtures locally, with optional latency and
+        error injection, so Maps-heavy paths run without network access.
+
+Point the application at the stand-in with GOOGLE_MAPS_BASE_URL, e.g.
+
+    python tests/maps_standin.py record --port 8089
+    GOOGLE_MAPS_BASE_URL=http://localhost:8089 python tests/simulation_runner.py
+    python tests/maps_standin.py replay --port 8089 --latency-ms 40 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+import aiohttp
+from aiohttp import web
+from dotenv import load_dotenv
+
+project_root = Path(__file__).parent.parent
+DEFAULT_FIXTURES_DIR = project_root / "tests" / "fixtures" / "maps"
+UPSTREAM_URL = "https://maps.googleapis.com"
+
+# Query parameters that must not influence (or leak into) fixtures
+IGNORED_PARAMS = {"key", "client", "signature"}
+
+
+def fixture_key(path: str, params: Dict[str, str]) -> str:
+    """Stable fixture name for a request, independent of the API key."""
+    canonical = json.dumps(
+        {"path": path, "params": {k: v for k, v in sorted(params.items()) if k not in IGNORED_PARAMS}},
+        sort_keys=True
+    )
+    endpoint = path.strip('/').replace('/', '_')
+    return f"{endpoint}_{hashlib.sha1(canonical.encode()).hexdigest()[:16]}"
+
+
+class MapsStandIn:
+    def __init__(
+        self,
+        fixtures_dir: Path = DEFAULT_FIXTURES_DIR,
+        mode: str = "replay",
+        upstream_url: str = UPSTREAM_URL,
+        api_key: Optional[str] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        quota_error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.upstream_url = upstream_url.rstrip('/')
+        self.api_key = api_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "replayed": 0, "recorded": 0, "missing": 0, "injected_errors": 0}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def fixture_path(self, path: str, params: Dict[str, str]) -> Path:
+        return self.fixtures_dir / f"{fixture_key(path, params)}.json"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        params = dict(request.query)
+
+        if self.mode == "record":
+            return await self._record(request.path, params)
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000.0)
+
+        roll = self.random.random()
+        if roll < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return web.json_response({"status": "UNKNOWN_ERROR"}, status=500)
+        if roll < self.error_rate + self.quota_error_rate:
+            self.stats["injected_errors"] += 1
+            return web.json_response({"status": "OVER_QUERY_LIMIT", "error_message": "Injected quota error"})
+
+        fixture = self.fixture_path(request.path, params)
+        if not fixture.exists():
+            self.stats["missing"] += 1
+            return web.json_response(
+                {"status": "NOT_FOUND", "error_message": f"No recorded fixture for {request.path}"},
+                status=404
+            )
+
+        with open(fixture, 'r') as f:
+            recorded = json.load(f)
+        self.stats["replayed"] += 1
+        return web.json_response(recorded["body"], status=recorded["status"])
+
+    async def _record(self, path: str, params: Dict[str, str]) -> web.Response:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        upstream_params = {**params, "key": self.api_key or params.get("key", "")}
+        async with self._session.get(self.upstream_url + path, params=upstream_params) as response:
+            body = await response.json(content_type=None)
+            status = response.status
+
+        with open(self.fixture_path(path, params), 'w') as f:
+            json.dump({
+                "request": {"path": path, "params": {k: v for k, v in params.items() if k not in IGNORED_PARAMS}},
+                "status": status,
+                "body": body
+            }, f, indent=2)
+        self.stats["recorded"] += 1
+        return web.json_response(body, status=status)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def close(self, app: web.Application) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_standin/stats", self.handle_stats)
+        app.router.add_get("/maps/api/{tail:.*}", self.handle)
+        app.on_cleanup.append(self.close)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Maps record/replay stand-in server")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--upstream", default=UPSTREAM_URL)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument("--quota-error-rate", type=float, default=0.0, help="Fraction of OVER_QUERY_LIMIT responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+    if args.mode == "record" and not api_key:
+        raise SystemExit("Recording needs GOOGLE_MAPS_API_KEY for the upstream API")
+
+    standin = MapsStandIn(
+        fixtures_dir=args.fixtures,
+        mode=args.mode,
+        upstream_url=args.upstream,
+        api_key=api_key,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        quota_error_rate=args.quota_error_rate,
+        seed=args.seed
+    )
+    print(f"Maps stand-in ({args.mode}) on http://{args.host}:{args.port}, fixtures in {args.fixtures}")
+    web.run_app(standin.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
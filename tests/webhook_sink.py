@@ -0,0 +1,198 @@
+# tests/webhook_sink.py
+"""
+Local stand-in for notification webhook receivers.
+
+An ASGI app that accepts any POST, records the delivery and answers 200,
+with optional latency and failure injection, so NotificationService can
+be exercised and measured without real endpoints. Point the
+NOTIFICATION_*_URL settings at it, e.g.
+
+    python tests/webhook_sink.py --port 8090 --latency-ms 20 --error-rate 0.05
+    NOTIFICATION_HOSPITAL_URL=http://localhost:8090/hospital/{hospital_id} ...
+
+Batched outbox deliveries ({"notifications": [...]}) are counted per
+notification. A notification carrying a sent_at epoch timestamp, at its
+top level or one level down (e.g. in details or patient), contributes an
+end-to-end delivery latency. GET /_sink/stats returns the counters and
+POST /_sink/reset clears them.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import uvicorn
+
+# Delivery latencies kept for percentiles
+LATENCY_SAMPLES = 100000
+
+
+def _sent_at(notification) -> Optional[float]:
+    if not isinstance(notification, dict):
+        return None
+    if "sent_at" in notification:
+        return notification["sent_at"]
+    for value in notification.values():
+        if isinstance(value, dict) and "sent_at" in value:
+            return value["sent_at"]
+    return None
+
+
+def percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class WebhookSink:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.notifications = 0
+        self.bytes = 0
+        self.injected_errors = 0
+        self.by_path: Dict[str, int] = {}
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+
+    def stats(self) -> Dict:
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        return {
+            "requests": self.requests,
+            "notifications": self.notifications,
+            "bytes": self.bytes,
+            "injected_errors": self.injected_errors,
+            "by_path": self.by_path,
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+            "latency_p50_ms": percentile(latencies_ms, 0.5),
+            "latency_p99_ms": percentile(latencies_ms, 0.99),
+            "latency_max_ms": max(latencies_ms) if latencies_ms else None
+        }
+
+    def record(self, path: str, body: bytes) -> None:
+        now = time.time()
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict) and isinstance(payload.get("notifications"), list):
+            notifications = payload["notifications"]
+        else:
+            notifications = [payload]
+
+        self.requests += 1
+        self.notifications += len(notifications)
+        self.bytes += len(body)
+        self.by_path[path] = self.by_path.get(path, 0) + len(notifications)
+        self.first_at = now if self.first_at is None else self.first_at
+        self.last_at = now
+        for notification in notifications:
+            sent_at = _sent_at(notification)
+            if isinstance(sent_at, (int, float)):
+                self.latencies.append(now - sent_at)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        path, method = scope["path"], scope["method"]
+
+        if path == "/_sink/stats" and method == "GET":
+            return await self._respond(send, 200, self.stats())
+        if path == "/_sink/reset" and method == "POST":
+            self.reset()
+            return await self._respond(send, 200, {"status": "reset"})
+        if method != "POST":
+            return await self._respond(send, 405, {"error": "POST only"})
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000.0)
+
+        roll = self.random.random()
+        if roll < self.error_rate:
+            self.injected_errors += 1
+            return await self._respond(send, 503, {"error": "Injected failure"})
+        if roll < self.error_rate + self.throttle_rate:
+            self.injected_errors += 1
+            return await self._respond(send, 429, {"error": "Injected throttling"})
+
+        self.record(path, body)
+        await self._respond(send, 200, {"status": "received"})
+
+    async def _respond(self, send, status: int, body: Dict) -> None:
+        encoded = json.dumps(body).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(encoded)).encode())]
+        })
+        await send({"type": "http.response.body", "body": encoded})
+
+
+def run(
+    host: str = "127.0.0.1",
+    port: int = 8090,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    seed: Optional[int] = None
+) -> None:
+    """Serve a sink; a large accept backlog keeps connection bursts from stalling on SYN retries."""
+    sink = WebhookSink(latency_ms, jitter_ms, error_rate, throttle_rate, seed)
+    uvicorn.run(sink, host=host, port=port, backlog=4096, log_level="warning", access_log=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local webhook receiver for notification testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of HTTP 429 responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Webhook sink on http://{args.host}:{args.port} (stats at /_sink/stats)")
+    run(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()